@@ -0,0 +1,94 @@
+"""
+Benchmarks importing users one at a time against ``legal_gennie.onboarding``.
+
+    python benchmarks/bulk_import.py --users 10000
+    python benchmarks/bulk_import.py --users 1000 --passwords --hash-workers 4
+
+Runs against a throwaway test database (created from DATABASE_URL, an
+in-memory one for SQLite). The per-user path is what registration does:
+``User.objects.create_user`` plus ``AuthRefreshToken.for_user``. The bulk path
+is ``import_users`` plus ``issue_tokens``. Both issue a token per user.
+
+Passwords are off by default: at tens of milliseconds per argon2 hash they
+dominate both paths equally unless ``--hash-workers`` spreads them over cores.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+os.environ.setdefault("CACHE_URL", "locmemcache://")
+
+import django  # noqa: E402
+
+
+def rows(count, prefix, passwords):
+    return [
+        {
+            "email": f"{prefix}{index}@firm.example",
+            "name": f"Associate {index}",
+            "password": f"password-{index}" if passwords else "",
+            "is_lawyer": "yes" if index % 2 else "",
+        }
+        for index in range(count)
+    ]
+
+
+def per_user(count, passwords):
+    from legal_gennie.models import LawyerMetadata, User
+    from utils.authentication import AuthRefreshToken
+
+    for row in rows(count, "single", passwords):
+        user = User.objects.create_user(
+            row["email"], row["name"], row["password"] or None, is_lawyer=bool(row["is_lawyer"])
+        )
+        if user.is_lawyer:
+            LawyerMetadata.objects.create(user=user)
+        AuthRefreshToken.for_user(user)
+
+
+def bulk(count, passwords, batch_size, hash_workers):
+    from legal_gennie.onboarding import import_users, issue_tokens
+
+    users, _ = import_users(rows(count, "bulk", passwords), batch_size, hash_workers)
+    issue_tokens(users, batch_size)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=10000, help="users to import per path")
+    parser.add_argument("--batch-size", type=int, default=1000, help="rows per bulk insert")
+    parser.add_argument("--passwords", action="store_true", help="give every user a password")
+    parser.add_argument("--hash-workers", type=int, default=os.cpu_count(), help="hashing processes for the bulk path")
+    args = parser.parse_args()
+
+    django.setup()
+    from django.db import connection
+
+    test_db = connection.creation.create_test_db(verbosity=0)
+    try:
+        print(f"{args.users} users on {connection.vendor} ({test_db}), passwords {'on' if args.passwords else 'off'}")
+        print(f"{'path':<12}{'seconds':>10}{'users/s':>10}{'queries':>10}")
+        for label, run in (
+            ("per user", lambda: per_user(args.users, args.passwords)),
+            ("bulk", lambda: bulk(args.users, args.passwords, args.batch_size, args.hash_workers)),
+        ):
+            queries = []
+
+            def count(execute, sql, params, many, context):
+                queries.append(sql)
+                return execute(sql, params, many, context)
+
+            with connection.execute_wrapper(count):
+                started = time.perf_counter()
+                run()
+                elapsed = time.perf_counter() - started
+            print(f"{label:<12}{elapsed:>10.2f}{args.users / elapsed:>10.0f}{len(queries):>10}")
+    finally:
+        connection.creation.destroy_test_db(test_db, verbosity=0)
+
+
+if __name__ == "__main__":
+    main()
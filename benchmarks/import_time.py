@@ -0,0 +1,94 @@
+"""
+Profiles cold start by running each scenario in a fresh interpreter under
+``python -X importtime`` and summing the reported import times.
+
+    python benchmarks/import_time.py --repeat 5
+    python benchmarks/import_time.py --scenario celery --top 25
+
+Scenarios:
+    setup     django.setup(), what every manage.py command and worker pays
+    urls      setup plus the URLconf, i.e. a web worker ready to serve
+    celery    setup plus legal_gennie.tasks, what the Celery worker loads
+    command   a complete ``manage.py check`` process
+
+Each scenario is run ``--repeat`` times and the fastest run is reported, with
+the packages that took the most import time and which of the heavy
+integrations (openai, bs4, celery, ...) were loaded at all.
+"""
+import argparse
+import collections
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SETUP = "import django; django.setup()"
+SCENARIOS = {
+    "setup": ["-c", SETUP],
+    "urls": ["-c", SETUP + "; import core.urls"],
+    "celery": ["-c", SETUP + "; import legal_gennie.tasks"],
+    "command": ["manage.py", "check"],
+}
+HEAVY = ("openai", "bs4", "soupsieve", "httpx", "celery", "kombu", "requests", "drf_spectacular")
+
+
+def parse_importtime(stderr):
+    """
+    Parses ``-X importtime`` output into ``(module, self_us, cumulative_us)`` rows.
+    """
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:"):].split("|")
+        rows.append((module.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def profile(args):
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE="core.settings")
+    # Settings read CACHE_URL; the profile shouldn't need a Redis server.
+    env.setdefault("CACHE_URL", "locmemcache://")
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        cwd=ROOT, env=env, capture_output=True, text=True,
+    )
+    wall = time.perf_counter() - started
+    if proc.returncode:
+        raise SystemExit(proc.stderr[-2000:])
+    return wall, parse_importtime(proc.stderr)
+
+
+def report(name, wall, rows, top):
+    total = sum(self_us for _, self_us, _ in rows)
+    by_package = collections.Counter()
+    for module, self_us, _ in rows:
+        by_package[module.split(".")[0]] += self_us
+    loaded = [package for package in HEAVY if package in by_package]
+
+    print(f"{name}: {total / 1000:.0f} ms importing {len(rows)} modules, {wall * 1000:.0f} ms wall")
+    print(f"  heavy integrations loaded: {', '.join(loaded) or 'none'}")
+    for package, self_us in by_package.most_common(top):
+        print(f"  {package:<28}{self_us / 1000:>8.1f} ms")
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), action="append",
+                        help="scenario to profile, may be repeated (default: all)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10, help="packages to list per scenario")
+    args = parser.parse_args()
+
+    for name in args.scenario or SCENARIOS:
+        runs = [profile(SCENARIOS[name]) for _ in range(args.repeat)]
+        wall, rows = min(runs, key=lambda run: sum(self_us for _, self_us, _ in run[1]))
+        report(name, wall, rows, args.top)
+
+
+if __name__ == "__main__":
+    main()
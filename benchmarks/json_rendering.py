@@ -0,0 +1,109 @@
+"""
+Benchmarks JSON rendering and parsing of a 10-judgment ``/api/cases`` response:
+DRF's stdlib ``JSONRenderer``/``JSONParser`` vs the orjson-backed pair in
+``utils.renderers`` and ``utils.parsers``.
+
+    python benchmarks/json_rendering.py --iterations 2000
+
+Two payloads: the response as the endpoint returns it (search result
+metadata and headlines), and the same judgments carrying their full
+document text (~40 KB each), as stored cases and detail-enriched judgments do.
+"""
+import argparse
+import io
+import os
+import random
+import sys
+import timeit
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from rest_framework.parsers import JSONParser  # noqa: E402
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+
+from utils.parsers import ORJSONParser  # noqa: E402
+from utils.renderers import ORJSONRenderer, orjson  # noqa: E402
+
+WORDS = (
+    "petitioner respondent appellant court held section act article constitution "
+    "evidence witness tribunal order decree appeal dismissed allowed judgment "
+    "tenancy eviction property partition contract breach damages bail custody"
+).split()
+
+
+def case_response(full_text_words: int = 0):
+    rng = random.Random(0)
+    judgments = []
+    for i in range(10):
+        judgment = {
+            "tid": 100000 + i,
+            "title": f"{rng.choice(WORDS).title()} vs {rng.choice(WORDS).title()} on {i + 1} March, 2019",
+            "doctype": 1000,
+            "publishdate": "2019-03-01",
+            "docsource": "Supreme Court of India",
+            "citation": f"AIR 2019 SC {1000 + i}",
+            "headline": "<b>" + " ".join(rng.choices(WORDS, k=40)) + "</b>",
+        }
+        if full_text_words:
+            judgment["full_text"] = "<p>" + " ".join(rng.choices(WORDS, k=full_text_words)) + "</p>"
+        judgments.append(judgment)
+    return {
+        "external_id": uuid.uuid4(),
+        "prediction": "[prediction_message]",
+        "search_query": "tenancy eviction delhi",
+        "judgments": judgments,
+        "analysis": {
+            "winning_percentage": 62.0,
+            "improvement_steps": [f"Step {i}: " + " ".join(rng.choices(WORDS, k=20)) for i in range(1, 6)],
+            "rationale": " ".join(rng.choices(WORDS, k=80)),
+            "legal_references": [
+                {"section": str(100 + i), "act": "Code of Civil Procedure", "year": "1908",
+                 "description": " ".join(rng.choices(WORDS, k=15))}
+                for i in range(5)
+            ],
+        },
+    }
+
+
+def per_call_us(func, iterations):
+    return min(timeit.repeat(func, number=iterations, repeat=3)) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    if orjson is None:
+        print("orjson is not installed; ORJSONRenderer falls back to JSONRenderer")
+
+    print(f"{'payload':<22}{'size':>9}  {'':<8}{'stdlib':>10}{'orjson':>10}{'speedup':>9}")
+    for label, words, iterations in (
+        ("response", 0, args.iterations),
+        ("with full text", 6000, max(args.iterations // 20, 10)),
+    ):
+        data = case_response(words)
+        body = JSONRenderer().render(data)
+
+        render = (
+            per_call_us(lambda: JSONRenderer().render(data), iterations),
+            per_call_us(lambda: ORJSONRenderer().render(data), iterations),
+        )
+        parse = (
+            per_call_us(lambda: JSONParser().parse(io.BytesIO(body)), iterations),
+            per_call_us(lambda: ORJSONParser().parse(io.BytesIO(body)), iterations),
+        )
+        for name, (stdlib, fast) in (("render", render), ("parse", parse)):
+            size = f"{len(body) / 1024:.0f} KB" if name == "render" else ""
+            print(f"{label if name == 'render' else '':<22}{size:>9}  {name:<8}"
+                  f"{stdlib:>8.0f}us{fast:>8.0f}us{stdlib / fast:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
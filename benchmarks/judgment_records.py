@@ -0,0 +1,110 @@
+"""
+Memory of search results as dicts vs ``utils.judgments.Judgment`` records.
+
+    python benchmarks/judgment_records.py --judgments 100000 --distinct 25000
+
+Builds the judgments of synthetic search responses (pages of ten results,
+decoded from JSON like the real ones) both ways, and reports what the
+results keep alive per judgment (tracemalloc) and how they fare in the cache:
+pickled size and load time per page. Results are drawn from ``--distinct``
+judgments, so popular judgments come back from several searches with the
+same title, court, date and citation, as they do for real; headlines (the
+matching passage) are unique per result.
+"""
+import argparse
+import json
+import os
+import pickle
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.judgments import Judgment  # noqa: E402
+
+COURTS = [
+    "Supreme Court of India", "Delhi High Court", "Bombay High Court", "Madras High Court",
+    "Calcutta High Court", "Allahabad High Court", "Karnataka High Court", "Kerala High Court",
+    "Gujarat High Court", "Punjab-Haryana High Court", "Rajasthan High Court", "Patna High Court",
+    "Orissa High Court", "Gauhati High Court", "Andhra HC (Pre-Telangana)", "Madhya Pradesh High Court",
+    "Himachal Pradesh High Court", "Jharkhand High Court", "Chattisgarh High Court", "Uttarakhand High Court",
+    "National Consumer Disputes Redressal", "Income Tax Appellate Tribunal - Delhi",
+]
+
+
+def judgment(tid: int, rng: random.Random):
+    return {
+        "tid": 100000 + tid,
+        "title": f"Petitioner {tid} vs State Of {rng.choice(['Maharashtra', 'Delhi', 'Kerala'])} on {tid % 28 + 1} May",
+        "doctype": rng.choice([1000, 1001, 1002]),
+        "publishdate": f"{rng.randrange(1990, 2025)}-{rng.randrange(1, 13):02}-{rng.randrange(1, 29):02}",
+        "docsource": rng.choice(COURTS),
+        "citation": rng.choice(["", f"AIR {rng.randrange(1950, 2025)} SC {rng.randrange(1, 3000)}"]),
+    }
+
+
+def pages(count: int, distinct: int, rng: random.Random):
+    """
+    Search responses as JSON bytes, ten results each.
+    """
+    judgments = [judgment(tid, rng) for tid in range(distinct)]
+    responses = []
+    for start in range(0, count, 10):
+        docs = []
+        for result in range(start, min(start + 10, count)):
+            docs.append({
+                **rng.choice(judgments),
+                "headline": f"the <b>tenancy</b> dispute number {result} concerns arrears of rent and eviction",
+            })
+        responses.append(json.dumps({"docs": docs}).encode())
+    return responses
+
+
+def as_dicts(doc):
+    # What _parse_kanoon_search built before the records.
+    return {
+        'tid': doc.get('tid'),
+        'title': doc.get('title', ''),
+        'doctype': doc.get('doctype'),
+        'publishdate': doc.get('publishdate', ''),
+        'docsource': doc.get('docsource', ''),
+        'citation': doc.get('citation', ''),
+        'headline': doc.get('headline', '')
+    }
+
+
+def build(responses, make):
+    return [[make(doc) for doc in json.loads(response)["docs"]] for response in responses]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--judgments", type=int, default=100000, help="search results to build")
+    parser.add_argument("--distinct", type=int, default=25000, help="distinct judgments among the results")
+    args = parser.parse_args()
+
+    responses = pages(args.judgments, args.distinct, random.Random(0))
+    print(f"{args.judgments} judgments ({args.distinct} distinct) in {len(responses)} search pages")
+    print(f"{'form':<10}{'bytes/judgment':>16}{'build s':>10}{'pickle B/page':>15}{'load us/page':>14}")
+    for label, make in (("dict", as_dicts), ("Judgment", Judgment.from_search)):
+        tracemalloc.start()
+        started = time.perf_counter()
+        results = build(responses, make)
+        elapsed = time.perf_counter() - started
+        retained, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        pickled = [pickle.dumps(page, pickle.HIGHEST_PROTOCOL) for page in results]
+        started = time.perf_counter()
+        for payload in pickled:
+            pickle.loads(payload)
+        load_us = (time.perf_counter() - started) / len(pickled) * 1e6
+        size = sum(len(payload) for payload in pickled) / len(pickled)
+        print(f"{label:<10}{retained / args.judgments:>16.0f}{elapsed:>10.2f}{size:>15.0f}{load_us:>14.1f}")
+        del results
+
+
+if __name__ == "__main__":
+    main()
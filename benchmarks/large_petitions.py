@@ -0,0 +1,126 @@
+"""
+Stress test: concurrent case submissions with very large petitions.
+
+    python benchmarks/large_petitions.py --size-mb 10 --requests 16 --concurrency 4
+
+Petitions go through the whole ``/api/cases`` stack (middleware, parsing,
+validation, query extraction, storage) on the Django test client against a
+throwaway database (a temporary file for SQLite). No Indian Kanoon token is
+sent, so nothing leaves the process. Every petition is distinct, so none are
+coalesced.
+
+The process RSS is sampled every 10 ms and the peak growth over the baseline
+is reported, in total and per concurrent request. It includes the request
+bodies the client builds (one copy of each in flight), so compare runs with
+the same arguments. ``--max-length`` overrides ``PETITION_MAX_LENGTH`` to
+check that oversized petitions are turned away before they cost anything.
+"""
+import argparse
+import collections
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+os.environ.setdefault("CACHE_URL", "locmemcache://")
+os.environ.pop("INDIAN_KANOON_API_TOKEN", None)
+
+import django  # noqa: E402
+
+WORDS = (
+    "the petitioner respondent tenancy eviction landlord arrears lease injunction partition "
+    "ancestral property cheque dishonour negotiable instrument bail custody anticipatory "
+    "maintenance alimony land acquisition compensation arbitration award tender contract "
+    "termination pension gratuity service dismissal reinstatement consumer deficiency"
+).split()
+
+
+def petition_body(size: int, rng: random.Random) -> bytes:
+    """
+    A JSON body with a petition of about ``size`` characters, with a
+    ``{marker}`` placeholder to make each submission distinct.
+    """
+    sentence = []
+    while sum(len(word) + 1 for word in sentence) < 4096:
+        sentence.append(rng.choice(WORDS) + rng.choice(("", "", "", ",", ".")))
+    paragraph = " ".join(sentence) + "\n"
+    return ('{"petition": "{marker} ' + paragraph.replace("\n", "\\n") * (size // len(paragraph)) + '"}').encode()
+
+
+class RSSSampler(threading.Thread):
+
+    def __init__(self, interval: float = 0.01):
+        from utils.memory import rss_bytes
+
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.read = rss_bytes
+        self.peak = rss_bytes()
+        self.running = True
+
+    def run(self):
+        while self.running:
+            self.peak = max(self.peak, self.read())
+            time.sleep(self.interval)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=float, default=10, help="petition size in MB")
+    parser.add_argument("--requests", type=int, default=16, help="petitions to submit")
+    parser.add_argument("--concurrency", type=int, default=4, help="concurrent submissions")
+    parser.add_argument("--max-length", type=int, help="override PETITION_MAX_LENGTH")
+    args = parser.parse_args()
+
+    django.setup()
+    from django.conf import settings
+    from django.db import connection
+    from django.test import Client
+
+    from utils.memory import rss_bytes
+
+    if args.max_length is not None:
+        settings.PETITION_MAX_LENGTH = args.max_length
+    body = petition_body(int(args.size_mb * 1024 * 1024), random.Random(0))
+    if connection.vendor == "sqlite":
+        # In-memory SQLite databases can't take concurrent writers.
+        connection.settings_dict["TEST"]["NAME"] = os.path.join(tempfile.mkdtemp(), "large_petitions.sqlite3")
+    test_db = connection.creation.create_test_db(verbosity=0)
+    statuses = []
+
+    def submit(index):
+        response = Client().post(
+            "/api/cases", body.replace(b"{marker}", f"matter{index}".encode()), content_type="application/json"
+        )
+        statuses.append(response.status_code)
+
+    try:
+        # Warm up imports and caches so the baseline doesn't include them.
+        submit(-1)
+        statuses.clear()
+        baseline = rss_bytes()
+        sampler = RSSSampler()
+        sampler.start()
+        started = time.perf_counter()
+        with ThreadPoolExecutor(args.concurrency) as pool:
+            list(pool.map(submit, range(args.requests)))
+        elapsed = time.perf_counter() - started
+        sampler.running = False
+        sampler.join()
+    finally:
+        connection.creation.destroy_test_db(test_db, verbosity=0)
+
+    growth = (sampler.peak - baseline) / 2 ** 20
+    print(f"{args.requests} x {len(body) / 2 ** 20:.1f} MB petitions, {args.concurrency} concurrent, "
+          f"{elapsed:.1f}s, statuses {dict(collections.Counter(statuses))}")
+    print(f"RSS baseline {baseline / 2 ** 20:.0f} MB, peak {sampler.peak / 2 ** 20:.0f} MB, "
+          f"growth {growth:.0f} MB ({growth / args.concurrency:.0f} MB per concurrent request)")
+
+
+if __name__ == "__main__":
+    main()
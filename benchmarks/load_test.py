@@ -0,0 +1,262 @@
+"""
+Load test for the case pipeline: async (ASGI) vs sync (WSGI) serving.
+
+A stub Indian Kanoon server answers searches and documents after a fixed
+latency, and the local LLM backend stands in for OpenAI, so the numbers
+measure how many upstream waits one process can overlap, not the network.
+Every request uses a fresh petition, so nothing is served from cache.
+
+In-process comparison (no web server needed): the async pipeline on one
+event loop vs the sync pipeline on a fixed thread pool, which is what a
+sync worker with N threads gives you:
+
+    python benchmarks/load_test.py pipeline --requests 400 --concurrency 200 --sync-threads 16
+
+It runs against a throwaway test database (created from DATABASE_URL, like
+benchmarks/bulk_import.py), migrated to the current models.
+
+End to end, against a running server pointed at the stub, with its database
+migrated first:
+
+    python benchmarks/load_test.py stub --port 9000
+    python manage.py migrate
+    KANOON_API_URL=http://127.0.0.1:9000 LLM_BACKEND=local LLM_LOCAL_LATENCY=1 LLM_MAX_CONCURRENCY=1000 \\
+        uvicorn core.asgi:application --port 8000
+    python benchmarks/load_test.py http --url http://127.0.0.1:8000/api/cases --requests 400 --concurrency 200
+
+Run the same ``http`` command against the WSGI deployment (e.g.
+``gunicorn core.wsgi:application --threads 16``) for the sync baseline. Use
+Postgres (``DATABASE_URL``) for end-to-end runs; SQLite serializes the writes.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+WORDS = (
+    "tenancy eviction landlord arrears lease injunction partition ancestral property "
+    "cheque dishonour negotiable instrument bail custody anticipatory divorce maintenance "
+    "custody alimony land acquisition compensation arbitration award tender contract "
+    "termination pension gratuity service dismissal reinstatement consumer deficiency"
+).split()
+
+
+def make_petition(rng: random.Random) -> str:
+    # The repeated marker is the most frequent word, so it lands in the search
+    # query and every petition misses the search and document caches.
+    marker = f"matter{rng.randrange(10 ** 9)}"
+    words = rng.sample(WORDS, 12) + [marker] * 3
+    return "The petitioner seeks relief in a dispute concerning " + " ".join(words) + "."
+
+
+def stub_app(latency: float):
+    """
+    Minimal ASGI app mimicking the Indian Kanoon search and document endpoints.
+    """
+    async def app(scope, receive, send):
+        if scope["type"] != "http":
+            return
+        await asyncio.sleep(latency)
+        path = scope["path"]
+        if path.startswith("/search"):
+            base = random.randrange(10 ** 9)
+            body = {"docs": [
+                {"tid": base + i, "title": f"Judgment {base + i}", "headline": " ".join(random.sample(WORDS, 8))}
+                for i in range(10)
+            ]}
+        else:
+            tid = path.strip("/").split("/")[-1]
+            body = {"doc": f"<p>Full text of judgment {tid}. " + " ".join(random.choices(WORDS, k=400)) + "</p>",
+                    "title": f"Judgment {tid}"}
+        payload = json.dumps(body).encode()
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", b"application/json")]})
+        await send({"type": "http.response.body", "body": payload})
+
+    return app
+
+
+def start_stub(port: int, latency: float):
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(stub_app(latency), port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def report(label: str, latencies, errors: int, elapsed: float, peak_threads: int = None):
+    latencies = sorted(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1] if latencies else 0
+    line = (
+        f"{label:<6} {len(latencies) + errors:>5} requests in {elapsed:6.2f}s  "
+        f"{len(latencies) / elapsed:7.1f} ok/s  "
+        f"p50 {statistics.median(latencies) if latencies else 0:5.2f}s  p95 {p95:5.2f}s  errors {errors}"
+    )
+    if peak_threads is not None:
+        line += f"  peak threads {peak_threads}"
+    print(line)
+
+
+class ThreadWatcher:
+    def __init__(self):
+        self.peak = threading.active_count()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._watch, daemon=True)
+
+    def _watch(self):
+        while not self._stop.wait(0.05):
+            self.peak = max(self.peak, threading.active_count())
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+
+
+def pipeline_benchmark(args):
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+    os.environ["KANOON_API_URL"] = f"http://127.0.0.1:{args.stub_port}"
+    os.environ["LLM_BACKEND"] = "local"
+    os.environ["LLM_LOCAL_LATENCY"] = str(args.llm_latency)
+    os.environ["LLM_MAX_CONCURRENCY"] = str(max(args.concurrency, args.sync_threads))
+    os.environ.setdefault("CACHE_URL", "locmemcache://")
+
+    import django
+    django.setup()
+    from django.db import connection
+
+    test_db = connection.creation.create_test_db(verbosity=0)
+    try:
+        run_pipelines(args)
+    finally:
+        connection.creation.destroy_test_db(test_db, verbosity=0)
+
+
+def run_pipelines(args):
+    from legal_gennie.pipeline import arun_case, run_case
+
+    start_stub(args.stub_port, args.upstream_latency)
+    rng = random.Random(0)
+
+    # Latencies are measured from submission, so they include time spent queued.
+    def timed_sync(petition, submitted):
+        status_code, _ = run_case(petition, "token")
+        return status_code, time.perf_counter() - submitted
+
+    async def run_async():
+        slots = asyncio.Semaphore(args.concurrency)
+
+        async def one(petition):
+            submitted = time.perf_counter()
+            async with slots:
+                status_code, _ = await arun_case(petition, "token")
+                return status_code, time.perf_counter() - submitted
+
+        return await asyncio.gather(*(one(make_petition(rng)) for _ in range(args.requests)))
+
+    for label in ("sync", "async"):
+        with ThreadWatcher() as watcher:
+            start = time.perf_counter()
+            if label == "sync":
+                # Requests beyond the thread count queue, as they would on a sync worker.
+                with ThreadPoolExecutor(max_workers=args.sync_threads) as pool:
+                    petitions = [make_petition(rng) for _ in range(args.requests)]
+                    results = list(pool.map(timed_sync, petitions, [start] * len(petitions)))
+            else:
+                results = asyncio.run(run_async())
+            elapsed = time.perf_counter() - start
+        ok = [latency for status_code, latency in results if status_code == 201]
+        report(label, ok, len(results) - len(ok), elapsed, watcher.peak)
+
+
+def http_load(url: str, requests: int, concurrency: int, token: str = "token", timeout: float = 60.0):
+    """
+    Posts ``requests`` fresh petitions to ``url`` with ``concurrency`` in flight.
+
+    Returns:
+        Tuple[List[float], int, float]: Latencies of successful requests, the
+        number of failures and the elapsed seconds
+    """
+    import httpx
+
+    rng = random.Random(0)
+
+    async def run():
+        slots = asyncio.Semaphore(concurrency)
+        limits = httpx.Limits(max_connections=concurrency)
+        async with httpx.AsyncClient(limits=limits, timeout=timeout) as client:
+            async def one():
+                start = time.perf_counter()
+                async with slots:
+                    try:
+                        response = await client.post(url, json={"petition": make_petition(rng), "token": token})
+                        ok = response.status_code == 201
+                    except httpx.HTTPError:
+                        ok = False
+                    return ok, time.perf_counter() - start
+
+            return await asyncio.gather(*(one() for _ in range(requests)))
+
+    start = time.perf_counter()
+    results = asyncio.run(run())
+    elapsed = time.perf_counter() - start
+    ok = [latency for success, latency in results if success]
+    return ok, len(results) - len(ok), elapsed
+
+
+def http_benchmark(args):
+    ok, errors, elapsed = http_load(args.url, args.requests, args.concurrency, args.token, args.timeout)
+    report("http", ok, errors, elapsed)
+
+
+def stub_server(args):
+    print(f"Stub Indian Kanoon API on http://127.0.0.1:{args.port} ({args.upstream_latency}s latency)")
+    start_stub(args.port, args.upstream_latency)
+    threading.Event().wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    pipeline = commands.add_parser("pipeline", help="in-process sync vs async comparison")
+    pipeline.add_argument("--requests", type=int, default=200)
+    pipeline.add_argument("--concurrency", type=int, default=200)
+    pipeline.add_argument("--sync-threads", type=int, default=16)
+    pipeline.add_argument("--stub-port", type=int, default=9000)
+    pipeline.add_argument("--upstream-latency", type=float, default=0.3)
+    pipeline.add_argument("--llm-latency", type=float, default=1.0)
+    pipeline.set_defaults(func=pipeline_benchmark)
+
+    http = commands.add_parser("http", help="load a running server")
+    http.add_argument("--url", required=True)
+    http.add_argument("--token", default="token")
+    http.add_argument("--requests", type=int, default=200)
+    http.add_argument("--concurrency", type=int, default=100)
+    http.add_argument("--timeout", type=float, default=60.0)
+    http.set_defaults(func=http_benchmark)
+
+    stub = commands.add_parser("stub", help="run the stub Indian Kanoon API")
+    stub.add_argument("--port", type=int, default=9000)
+    stub.add_argument("--upstream-latency", type=float, default=0.3)
+    stub.set_defaults(func=stub_server)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Benchmarks password verification, the CPU cost of a login, per hasher.
+
+    python benchmarks/password_hashing.py --seconds 3
+    python benchmarks/password_hashing.py --pool 2 --concurrency 16
+
+The first table is logins per second on one core (a single thread verifying
+in a loop) for Django's defaults and the tuned hashers in ``utils.hashers``.
+
+``--pool N`` then runs ``--concurrency`` threads logging in through
+``utils.hashers.check_password``, inline and with ``PASSWORD_HASHING_WORKERS=N``,
+next to a probe thread that wakes every 10 ms like an I/O-bound request would.
+It reports login throughput and how late the probe woke up: the pool caps
+the cores logins take, so other work keeps getting scheduled.
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+os.environ.setdefault("CACHE_URL", "locmemcache://")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth.hashers import make_password, verify_password  # noqa: E402
+from django.test import override_settings  # noqa: E402
+
+from utils import hashers  # noqa: E402
+
+PASSWORD = "correct horse battery staple"
+HASHERS = (
+    ("pbkdf2 (Django default)", "django.contrib.auth.hashers.PBKDF2PasswordHasher"),
+    ("argon2 (Django default)", "django.contrib.auth.hashers.Argon2PasswordHasher"),
+    ("scrypt (Django default)", "django.contrib.auth.hashers.ScryptPasswordHasher"),
+    ("argon2 (tuned)", "utils.hashers.TunedArgon2PasswordHasher"),
+    ("scrypt (tuned)", "utils.hashers.TunedScryptPasswordHasher"),
+)
+
+
+def logins_per_second(seconds):
+    encoded = make_password(PASSWORD)
+    count, started = 0, time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        assert verify_password(PASSWORD, encoded)[0]
+        count += 1
+    return count / (time.perf_counter() - started)
+
+
+def burst(workers, concurrency, seconds):
+    """
+    Logs in from ``concurrency`` threads for ``seconds``; returns logins per
+    second and the probe's wake-up delays in milliseconds.
+    """
+    encoded = make_password(PASSWORD)
+    stop = threading.Event()
+    logins, delays = [0] * concurrency, []
+
+    def login(slot):
+        while not stop.is_set():
+            hashers.check_password(PASSWORD, encoded)
+            logins[slot] += 1
+
+    def probe():
+        while not stop.is_set():
+            started = time.perf_counter()
+            time.sleep(0.01)
+            delays.append((time.perf_counter() - started - 0.01) * 1000)
+
+    with override_settings(PASSWORD_HASHING_WORKERS=workers):
+        if workers:
+            # Start the pool's processes outside the measurement.
+            list(hashers._executor().map(abs, range(workers)))
+        threads = [threading.Thread(target=login, args=(slot,)) for slot in range(concurrency)]
+        threads.append(threading.Thread(target=probe))
+        for thread in threads:
+            thread.start()
+        time.sleep(seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+    return sum(logins) / seconds, delays
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=3.0, help="measurement time per run")
+    parser.add_argument("--pool", type=int, default=0, help="also compare a hashing pool of this size")
+    parser.add_argument("--concurrency", type=int, default=8, help="login threads for --pool")
+    args = parser.parse_args()
+
+    print(f"{'hasher':<26}{'logins/s/core':>14}{'ms/login':>10}")
+    for label, path in HASHERS:
+        with override_settings(PASSWORD_HASHERS=[path]):
+            rate = logins_per_second(args.seconds)
+        print(f"{label:<26}{rate:>14.1f}{1000 / rate:>10.1f}")
+
+    if args.pool:
+        print(f"\n{settings_hasher()} with {args.concurrency} concurrent logins, {os.cpu_count()} CPU(s)")
+        print(f"{'hashing':<26}{'logins/s':>10}{'probe p50':>11}{'probe p95':>11}")
+        for workers in (0, args.pool):
+            rate, delays = burst(workers, args.concurrency, args.seconds)
+            p50 = statistics.median(delays)
+            p95 = statistics.quantiles(delays, n=20)[-1] if len(delays) > 1 else p50
+            label = "inline" if not workers else f"pool of {workers}"
+            print(f"{label:<26}{rate:>10.1f}{p50:>9.1f}ms{p95:>9.1f}ms")
+
+
+def settings_hasher():
+    from django.conf import settings
+
+    return settings.PASSWORD_HASHERS[0].rsplit(".", 1)[-1]
+
+
+if __name__ == "__main__":
+    main()
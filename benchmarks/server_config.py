@@ -0,0 +1,122 @@
+"""
+Benchmarks gunicorn worker configurations for the case endpoint.
+
+Starts the stub Indian Kanoon server from ``load_test``, then for each
+configuration boots gunicorn with ``gunicorn.conf.py`` (overridden through
+its environment variables), pushes the same load through ``/api/cases`` and
+reports throughput, latency and the resident memory of all gunicorn
+processes. The local LLM backend stands in for OpenAI.
+
+    python benchmarks/server_config.py --requests 300 --concurrency 150
+
+Only the worker model varies between runs, so the differences come from how
+many upstream waits each configuration can overlap per process.
+"""
+import argparse
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from load_test import http_load, report, start_stub  # noqa: E402
+
+# (label, application, environment overrides for gunicorn.conf.py)
+CONFIGS = [
+    ("sync w=4", "core.wsgi:application", {"GUNICORN_WORKER_CLASS": "sync", "WEB_CONCURRENCY": "4"}),
+    ("gthread w=2 t=8", "core.wsgi:application",
+     {"GUNICORN_WORKER_CLASS": "gthread", "WEB_CONCURRENCY": "2", "GUNICORN_THREADS": "8"}),
+    ("gthread w=2 t=32", "core.wsgi:application",
+     {"GUNICORN_WORKER_CLASS": "gthread", "WEB_CONCURRENCY": "2", "GUNICORN_THREADS": "32"}),
+    ("uvicorn w=1", "core.asgi:application", {"WEB_CONCURRENCY": "1"}),
+    ("uvicorn w=2", "core.asgi:application", {"WEB_CONCURRENCY": "2"}),
+]
+
+
+def wait_for_port(port: int, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with socket.socket() as sock:
+            if sock.connect_ex(("127.0.0.1", port)) == 0:
+                return
+        time.sleep(0.2)
+    raise RuntimeError(f"Nothing listening on port {port} after {timeout}s")
+
+
+def tree_rss_mb(pid: int) -> float:
+    """
+    Resident memory of ``pid`` and its children, from /proc (Linux only).
+    """
+    pids = [pid]
+    for entry in os.listdir("/proc"):
+        if entry.isdigit():
+            try:
+                with open(f"/proc/{entry}/stat") as stat:
+                    if int(stat.read().rsplit(")", 1)[1].split()[1]) == pid:
+                        pids.append(int(entry))
+            except OSError:
+                continue
+    total_kb = 0
+    for child in pids:
+        try:
+            with open(f"/proc/{child}/status") as status:
+                for line in status:
+                    if line.startswith("VmRSS:"):
+                        total_kb += int(line.split()[1])
+        except OSError:
+            continue
+    return total_kb / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=150)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--stub-port", type=int, default=9765)
+    parser.add_argument("--upstream-latency", type=float, default=0.3)
+    parser.add_argument("--llm-latency", type=float, default=1.0)
+    parser.add_argument("--database-url", help="defaults to a throwaway SQLite database")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="server_config_")
+    env = dict(
+        os.environ,
+        DATABASE_URL=args.database_url or f"sqlite:///{workdir}/bench.sqlite3",
+        CACHE_URL="locmemcache://",
+        KANOON_API_URL=f"http://127.0.0.1:{args.stub_port}",
+        LLM_BACKEND="local",
+        LLM_LOCAL_LATENCY=str(args.llm_latency),
+        LLM_MAX_CONCURRENCY="1000",
+        GUNICORN_BIND=f"127.0.0.1:{args.port}",
+        GUNICORN_ACCESS_LOG="/dev/null",
+        GUNICORN_LOG_LEVEL="warning",
+    )
+    try:
+        subprocess.run([sys.executable, "manage.py", "migrate", "-v0"], cwd=ROOT, env=env, check=True)
+        start_stub(args.stub_port, args.upstream_latency)
+
+        url = f"http://127.0.0.1:{args.port}/api/cases"
+        for label, app, overrides in CONFIGS:
+            server = subprocess.Popen(["gunicorn", app], cwd=ROOT, env=dict(env, **overrides))
+            try:
+                wait_for_port(args.port)
+                ok, errors, elapsed = http_load(url, args.requests, args.concurrency)
+                rss = tree_rss_mb(server.pid)
+            finally:
+                server.terminate()
+                server.wait()
+            print(f"{label:<18}", end="")
+            report("", ok, errors, elapsed)
+            print(f"{'':<18}rss {rss:.0f} MB")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
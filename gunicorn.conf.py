@@ -0,0 +1,61 @@
+"""
+Production gunicorn configuration, picked up automatically from the working
+directory:
+
+    gunicorn core.asgi:application
+
+Requests spend nearly all their time waiting on Indian Kanoon and OpenAI, so
+the default worker is uvicorn's: one event loop per process overlaps
+hundreds of in-flight cases (see benchmarks/server_config.py for the numbers
+behind the defaults). ``GUNICORN_WORKER_CLASS=gthread`` with
+``core.wsgi:application`` is the threaded fallback.
+
+Every setting can be overridden from the environment.
+"""
+import multiprocessing
+import os
+
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "uvicorn.workers.UvicornWorker")
+_async = "uvicorn" in worker_class
+
+# Under ASGI each request's ORM calls run in a fresh thread, so persistent
+# connections would pile up instead of being reused; Django recommends
+# turning them off there. Threaded workers keep the settings default. This
+# must happen before the settings module is imported (below, and by workers).
+if _async:
+    os.environ.setdefault("CONN_MAX_AGE", "0")
+
+from core import settings as app_settings  # noqa: E402
+
+
+def _env_int(name, default):
+    return int(os.environ.get(name, default))
+
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8000")
+
+# Async workers don't need more processes than cores; threaded ones get the
+# classic 2n + 1 and rely on threads for overlap.
+workers = _env_int("WEB_CONCURRENCY", multiprocessing.cpu_count() if _async else multiprocessing.cpu_count() * 2 + 1)
+# Only meaningful for gthread; gunicorn turns any other worker with threads > 1 into gthread.
+threads = _env_int("GUNICORN_THREADS", 32 if worker_class == "gthread" else 1)
+
+# Idle keep-alive connections are cheap on an event loop; keep them longer
+# than a typical load balancer idle timeout (60s) so it never reuses a
+# connection we just closed.
+keepalive = _env_int("GUNICORN_KEEPALIVE", 75 if _async else 5)
+
+# The slowest legitimate request waits up to CACHE_LOCK_TIMEOUT for another
+# worker's identical case, then runs the pipeline itself (CASE_DEADLINE).
+# Workers silent for longer than that are stuck, and restarts let in-flight
+# cases finish.
+WORST_CASE_LATENCY = int(app_settings.CACHE_LOCK_TIMEOUT + app_settings.CASE_DEADLINE) + 5
+timeout = _env_int("GUNICORN_TIMEOUT", WORST_CASE_LATENCY)
+graceful_timeout = _env_int("GUNICORN_GRACEFUL_TIMEOUT", WORST_CASE_LATENCY)
+
+# Recycle workers now and then to bound slow leaks; jitter avoids restarting them all at once.
+max_requests = _env_int("GUNICORN_MAX_REQUESTS", 10000)
+max_requests_jitter = _env_int("GUNICORN_MAX_REQUESTS_JITTER", 1000)
+
+accesslog = os.environ.get("GUNICORN_ACCESS_LOG", "-")
+loglevel = os.environ.get("GUNICORN_LOG_LEVEL", "info")
@@ -1,3 +1,11 @@
-from .celery import app as celery_app
+def __getattr__(name):
+    # Celery costs ~100 ms to import, so the app is only loaded by the processes
+    # that use it: the worker (``-A core.celery_app``) and importers of
+    # ``legal_gennie.tasks``.
+    if name == 'celery_app':
+        from .celery import app
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-__all__ = ('celery_app',)
\ No newline at end of file
+
+__all__ = ('celery_app',)
@@ -1,8 +1,35 @@
+import io
+
+from django import forms
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponse
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path
 from djangoql.admin import DjangoQLSearchMixin
 
+from .models.cases import Case, AnalysisBatch
 from .models.users import User, LawyerMetadata
+from .onboarding import import_users, issue_tokens, read_users_csv, write_tokens_csv
+
+
+class UserImportForm(forms.Form):
+    file = forms.FileField(
+        help_text="CSV with email, name and optionally password and is_lawyer columns. "
+                  "Passwords are hashed in this request; import large files with "
+                  "the import_users management command instead.",
+    )
+    issue_tokens = forms.BooleanField(required=False, help_text="Download a token per imported user")
+
+
+def tokens_response(users):
+    response = HttpResponse(content_type="text/csv")
+    response["Content-Disposition"] = 'attachment; filename="tokens.csv"'
+    write_tokens_csv(response, users, issue_tokens(users))
+    return response
+
 
 @admin.register(User)
 class UserAdmin(DjangoQLSearchMixin, BaseUserAdmin):
@@ -59,7 +86,52 @@ class UserAdmin(DjangoQLSearchMixin, BaseUserAdmin):
         )
     )
 
+    def get_urls(self):
+        urls = [
+            path("import/", self.admin_site.admin_view(self.import_view), name="legal_gennie_user_import"),
+        ]
+        return urls + super().get_urls()
+
+    def import_view(self, request):
+        if not self.has_add_permission(request):
+            raise PermissionDenied
+        form = UserImportForm(request.POST or None, request.FILES or None)
+        # Tokens sign in as the imported accounts; only superusers may download them.
+        if not request.user.is_superuser:
+            del form.fields["issue_tokens"]
+        if request.method == "POST" and form.is_valid():
+            try:
+                rows = read_users_csv(io.TextIOWrapper(form.cleaned_data["file"], encoding="utf-8-sig"))
+            except (UnicodeDecodeError, ValueError) as error:
+                form.add_error("file", str(error))
+            else:
+                users, skipped = import_users(rows)
+                self.message_user(request, f"Imported {len(users)} users, skipped {len(skipped)}")
+                if form.cleaned_data.get("issue_tokens"):
+                    return tokens_response(users)
+                return redirect("admin:legal_gennie_user_changelist")
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.model._meta,
+            "title": "Import users",
+            "form": form,
+        }
+        return TemplateResponse(request, "admin/legal_gennie/user/import_users.html", context)
+
+
 @admin.register(LawyerMetadata)
 class LawyerMetadataAdmin(DjangoQLSearchMixin, admin.ModelAdmin):
     pass
 
+
+@admin.register(Case)
+class CaseAdmin(DjangoQLSearchMixin, admin.ModelAdmin):
+    list_display = ('external_id', 'user', 'search_query', 'analyzed_at', 'created_at')
+    readonly_fields = ('external_id', 'created_at', 'updated_at')
+
+
+@admin.register(AnalysisBatch)
+class AnalysisBatchAdmin(DjangoQLSearchMixin, admin.ModelAdmin):
+    list_display = ('external_id', 'backend', 'remote_id', 'status', 'succeeded', 'failed', 'created_at')
+    readonly_fields = ('external_id', 'created_at', 'updated_at', 'completed_at')
+    filter_horizontal = ('cases',)
@@ -2,9 +2,10 @@ from core import settings
 from django.urls import path, include
 from rest_framework_nested import routers
 
-from legal_gennie.views.auth import APIRegistrationView, APILoginView
+from legal_gennie.views.auth import APIRegistrationView, APILoginView, APIRefreshView
 from legal_gennie.views.lawyers import VerifyLawyerViewSet, LawyersListViewSet, LawyerViewSet
-from legal_gennie.views.case import CaseView
+from legal_gennie.views.case import CaseView, CaseDetailView
+from legal_gennie.views.profiles import ProfileViewSet
 
 app_name = "legal_gennie"
 
@@ -16,14 +17,17 @@ if settings.DEBUG:
 auth_urls = [
     path("register", APIRegistrationView.as_view(), name="register"),
     path("login", APILoginView.as_view(), name="login"),
+    path("refresh", APIRefreshView.as_view(), name="refresh"),
 ]
 
 router.register(r"lawyers/verify", VerifyLawyerViewSet, basename="verify_lawyers")
 router.register(r"lawyers", LawyersListViewSet, basename="lawyers")
 router.register(r"lawyers", LawyerViewSet, basename="lawyer")
+router.register(r"profiles", ProfileViewSet, basename="profiles")
 
 urlpatterns = [
     path("auth/", include(auth_urls)),
     path("cases", CaseView.as_view(), name="predict_outcome"),
+    path("cases/<uuid:external_id>", CaseDetailView.as_view(), name="case_detail"),
     path("", include(router.urls)),
 ]
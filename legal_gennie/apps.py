@@ -1,6 +1,9 @@
-# from django.apps import AppConfig
-#
-#
-# class VendorConfig(AppConfig):
-#     default_auto_field = 'django.db.models.BigAutoField'
-#     name = 'vendor'
+from django.apps import AppConfig
+
+
+class LegalGennieConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'legal_gennie'
+
+    def ready(self):
+        from . import signals  # noqa
@@ -0,0 +1,108 @@
+"""
+Bulk petition re-analysis through the LLM Batch API.
+
+Stored cases are turned into one JSONL batch, submitted in a single call and
+collected by the ``poll_analysis_batch`` Celery task. Batch requests run
+against their own, larger quota at a discount, so overnight re-scoring does
+not compete with interactive ``/api/cases`` traffic.
+"""
+import logging
+from typing import Iterable, Optional
+
+from django.conf import settings
+from django.utils import timezone
+
+from legal_gennie.citations import authority_scores
+from legal_gennie.models import AnalysisBatch, Case
+from legal_gennie.models.enums import AnalysisBatchStatusEnum
+from legal_gennie.pipeline import fetch_details_concurrent
+from utils.helpers import build_analysis_messages, parse_analysis_response
+from utils.llm import BATCH_COMPLETED, BATCH_IN_PROGRESS, get_backend
+from utils.ranking import rerank_judgments
+
+logger = logging.getLogger(__name__)
+
+
+def submit_analysis_batch(cases: Iterable[Case], token: str = "", backend_name: Optional[str] = None) -> AnalysisBatch:
+    """
+    Builds analysis requests for ``cases`` and submits them as one batch.
+
+    Args:
+        cases (Iterable[Case]): Stored cases to (re-)analyze
+        token (str): Indian Kanoon token used to fetch judgment details; without it
+            the stored search results are analyzed as they are
+        backend_name (Optional[str]): LLM backend, defaults to ``LLM_BACKEND``
+
+    Returns:
+        AnalysisBatch: The batch record, SUBMITTED or FAILED
+    """
+    backend = get_backend(backend_name)
+    requests = []
+    included = []
+    for case in cases:
+        if not case.judgments:
+            continue
+        judgments = rerank_judgments(
+            case.petition, case.judgments, authority_scores(case.judgments), settings.RANKING_AUTHORITY_WEIGHT
+        )[:settings.CASE_DETAIL_FETCH_LIMIT]
+        if token:
+            judgments = fetch_details_concurrent(judgments, token)
+        requests.append(backend.batch_request(str(case.external_id), build_analysis_messages(case.petition, judgments)))
+        included.append(case)
+
+    batch = AnalysisBatch.objects.create(backend=backend.name)
+    batch.cases.set(included)
+    if not requests:
+        batch.status = AnalysisBatchStatusEnum.FAILED
+        batch.error = "No cases with judgments to analyze"
+        batch.save()
+        return batch
+
+    try:
+        batch.remote_id = backend.submit_batch(requests)
+        batch.status = AnalysisBatchStatusEnum.SUBMITTED
+    except Exception as e:
+        logger.error(f"Failed to submit analysis batch {batch.external_id}: {str(e)}")
+        batch.status = AnalysisBatchStatusEnum.FAILED
+        batch.error = str(e)
+    batch.save()
+    return batch
+
+
+def collect_analysis_batch(batch: AnalysisBatch) -> bool:
+    """
+    Writes the results of a finished batch back to its cases.
+
+    Returns:
+        bool: False while the batch is still running, True once it is settled
+    """
+    state, results = get_backend(batch.backend).get_batch(batch.remote_id)
+    if state == BATCH_IN_PROGRESS:
+        return False
+
+    batch.completed_at = timezone.now()
+    if state != BATCH_COMPLETED:
+        batch.status = AnalysisBatchStatusEnum.FAILED
+        batch.error = f"Batch ended in state '{state}'"
+        batch.save()
+        return True
+
+    updated = []
+    for case in batch.cases.all():
+        content = results.get(str(case.external_id))
+        analysis = parse_analysis_response(content) if content else None
+        if not analysis or "error" in analysis:
+            batch.failed += 1
+            continue
+        case.analysis = analysis
+        case.analyzed_at = batch.completed_at
+        # bulk_update skips auto_now
+        case.updated_at = batch.completed_at
+        updated.append(case)
+    Case.objects.bulk_update(updated, ["analysis", "analyzed_at", "updated_at"], batch_size=500)
+
+    batch.succeeded = len(updated)
+    batch.status = AnalysisBatchStatusEnum.COMPLETED
+    batch.save()
+    logger.info(f"Analysis batch {batch.external_id}: {batch.succeeded} succeeded, {batch.failed} failed")
+    return True
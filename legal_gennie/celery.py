@@ -1,6 +1,7 @@
 import os
 
 from celery import Celery
+from celery.signals import before_task_publish, task_postrun, task_prerun
 
 # Set the default Django settings module for the 'celery' program.
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
@@ -17,6 +18,32 @@ app.config_from_object("django.conf:settings", namespace="CELERY")
 app.autodiscover_tasks()
 
 
+# Tasks run with the request ID of whatever queued them, see utils.log.
+@before_task_publish.connect
+def propagate_request_id(headers=None, **kwargs):
+    from utils.log import get_request_id
+
+    request_id = get_request_id()
+    if request_id is not None:
+        headers.setdefault("request_id", request_id)
+
+
+@task_prerun.connect
+def bind_request_id(task=None, **kwargs):
+    from utils.log import set_request_id
+
+    task.request.request_id_token = set_request_id(task.request.get("request_id"))
+
+
+@task_postrun.connect
+def unbind_request_id(task=None, **kwargs):
+    from utils.log import reset_request_id
+
+    token = getattr(task.request, "request_id_token", None)
+    if token is not None:
+        reset_request_id(token)
+
+
 @app.task(bind=True, ignore_result=True)
 def debug_task(self):
     print(f'Request: {self.request!r}')
@@ -0,0 +1,254 @@
+"""
+Citation graph of the judgments the case pipeline has seen, and the
+authority scores the re-ranker blends in.
+
+Indian Kanoon documents link the judgments they cite as ``/doc/<tid>/``.
+The ``build_citation_graph`` task parses those links out of documents
+already in the cache (the results of stored cases, prefetched judgments and
+judgments found cited earlier) without any upstream request. It stores each
+judgment's citations as a ``Precedent`` row. It then recomputes every
+judgment's authority with PageRank over the whole graph, held in memory as
+compressed adjacency arrays.
+
+Each rebuild also publishes the authority table (the judgments with any
+authority, as sorted arrays) to the shared cache. Every process keeps a copy
+in memory for ``CITATION_AUTHORITY_REFRESH`` seconds, so ``authority_scores``
+gives the scores of a search's results to ``utils.ranking.rerank_judgments``
+without a database query or cache round trip per request.
+"""
+import logging
+import re
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, List, Set, Tuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+
+from legal_gennie.models import Case, Precedent
+from utils.helpers import fetch_judgment_details
+
+logger = logging.getLogger(__name__)
+
+CITATION_RE = re.compile(r"/doc/(\d+)/")
+
+AUTHORITY_CACHE_KEY = "precedent_authority"
+
+
+def extract_citations(tid: int, text: str) -> List[int]:
+    """
+    The ids of the judgments ``text`` links to, ascending, without ``tid`` itself.
+    """
+    return sorted({int(cited) for cited in CITATION_RE.findall(text or "")} - {tid})
+
+
+def _candidates() -> Set[int]:
+    """
+    Judgments whose documents haven't been parsed: stored cases' results
+    and judgments so far only known as cited.
+    """
+    tids = set(Precedent.objects.filter(parsed_at__isnull=True).values_list("tid", flat=True))
+    stored = Case.objects.filter(deleted=False).values_list("judgments", flat=True)
+    for judgments in stored.iterator(chunk_size=settings.CITATION_GRAPH_BATCH_SIZE):
+        tids.update(judgment["tid"] for judgment in judgments or [] if judgment.get("tid") is not None)
+    parsed = Precedent.objects.filter(parsed_at__isnull=False).values_list("tid", flat=True)
+    return tids.difference(parsed.iterator())
+
+
+def parse_cached_documents(tids: Iterable[int]) -> int:
+    """
+    Stores the citations of the judgments among ``tids`` whose documents are
+    cached, adding the cited judgments to the graph.
+
+    Returns:
+        int: The number of documents parsed
+    """
+    tids = sorted(tids)
+    batch_size = settings.CITATION_GRAPH_BATCH_SIZE
+    parsed = 0
+    for start in range(0, len(tids), batch_size):
+        keys = {fetch_judgment_details.cache_key(tid, ""): tid for tid in tids[start:start + batch_size]}
+        documents = caches["default"].get_many(list(keys))
+        now = timezone.now()
+        nodes = []
+        cited = set()
+        for key, details in documents.items():
+            if not isinstance(details, dict) or not details.get("doc"):
+                continue
+            tid = keys[key]
+            cites = extract_citations(tid, details["doc"])
+            nodes.append(Precedent(tid=tid, cites=cites, parsed_at=now))
+            cited.update(cites)
+        Precedent.objects.bulk_create(
+            nodes, update_conflicts=True, unique_fields=["tid"], update_fields=["cites", "parsed_at"],
+            batch_size=batch_size,
+        )
+        Precedent.objects.bulk_create(
+            [Precedent(tid=tid) for tid in sorted(cited)], ignore_conflicts=True, batch_size=batch_size,
+        )
+        parsed += len(nodes)
+    return parsed
+
+
+def adjacency(edges: Iterable[Tuple[int, List[int]]]) -> Tuple[List[int], array, array]:
+    """
+    Packs ``(tid, cited tids)`` pairs into compressed sparse rows: node ``i``
+    is ``tids[i]`` and cites the nodes ``targets[offsets[i]:offsets[i + 1]]``.
+    Citations of judgments outside the graph are dropped.
+    """
+    edges = sorted(edges)
+    tids = [tid for tid, _ in edges]
+    index = {tid: node for node, tid in enumerate(tids)}
+    offsets = array("q", [0])
+    targets = array("q")
+    for _, cites in edges:
+        targets.extend(sorted({index[cited] for cited in cites if cited in index}))
+        offsets.append(len(targets))
+    return tids, offsets, targets
+
+
+def pagerank(offsets: array, targets: array, damping: float = 0.85,
+             max_iterations: int = 100, tolerance: float = 1e-9) -> List[float]:
+    """
+    PageRank of the graph in compressed sparse rows (see ``adjacency``). The
+    rank of judgments citing nothing is spread over all of them.
+
+    Returns:
+        List[float]: Rank per node, summing to 1
+    """
+    n = len(offsets) - 1
+    if n <= 0:
+        return []
+    rank = [1.0 / n] * n
+    for _ in range(max_iterations):
+        incoming = [0.0] * n
+        dangling = 0.0
+        for node in range(n):
+            start, end = offsets[node], offsets[node + 1]
+            if start == end:
+                dangling += rank[node]
+                continue
+            share = rank[node] / (end - start)
+            for target in targets[start:end]:
+                incoming[target] += share
+        base = (1.0 - damping + damping * dangling) / n
+        updated = [base + damping * value for value in incoming]
+        change = sum(abs(new - old) for new, old in zip(updated, rank))
+        rank = updated
+        if change < tolerance:
+            break
+    return rank
+
+
+def compute_authority() -> Dict[str, int]:
+    """
+    Recomputes ``cited_by`` and ``authority`` of every judgment in the graph.
+    Authority is the PageRank scaled so uncited judgments get 0 and the
+    highest ranked 1.
+    """
+    tids, offsets, targets = adjacency(Precedent.objects.values_list("tid", "cites").iterator())
+    rank = pagerank(offsets, targets, settings.CITATION_GRAPH_DAMPING, settings.CITATION_GRAPH_MAX_ITERATIONS)
+    cited_by = [0] * len(tids)
+    for target in targets:
+        cited_by[target] += 1
+
+    low, high = min(rank, default=0.0), max(rank, default=0.0)
+    nodes = [
+        Precedent(tid=tid, cited_by=cited_by[node],
+                  authority=(rank[node] - low) / (high - low) if high > low else 0.0)
+        for node, tid in enumerate(tids)
+    ]
+    Precedent.objects.bulk_update(nodes, ["cited_by", "authority"], batch_size=settings.CITATION_GRAPH_BATCH_SIZE)
+    publish_authority(_authority_table((node.tid, node.authority) for node in nodes))
+    return {"judgments": len(tids), "citations": len(targets)}
+
+
+def build_citation_graph() -> Dict[str, int]:
+    """
+    Parses the cached documents not yet in the graph, then recomputes authority.
+
+    Returns:
+        Dict[str, int]: Documents ``parsed``, ``judgments`` and ``citations`` in the graph
+    """
+    stats = {"parsed": parse_cached_documents(_candidates()), **compute_authority()}
+    logger.info(f"Citation graph rebuilt: {stats}", extra=stats)
+    return stats
+
+
+def _authority_table(scores: Iterable[Tuple[int, float]]) -> Tuple[array, array]:
+    """
+    Packs ``(tid, authority)`` pairs with any authority into sorted
+    ``(tids, authorities)`` arrays.
+    """
+    pairs = sorted((tid, authority) for tid, authority in scores if authority > 0)
+    return array("q", [tid for tid, _ in pairs]), array("d", [authority for _, authority in pairs])
+
+
+def publish_authority(table: Tuple[array, array]) -> None:
+    """
+    Shares a freshly computed authority table with every process.
+    """
+    caches["default"].set(AUTHORITY_CACHE_KEY, table, settings.CITATION_AUTHORITY_TIMEOUT)
+    _local.update(table=table, loaded_at=time.monotonic())
+
+
+# This process's copy of the authority table.
+_local = {"table": None, "loaded_at": 0.0}
+_local_lock = threading.Lock()
+
+
+def _is_fresh() -> bool:
+    return (_local["table"] is not None
+            and time.monotonic() - _local["loaded_at"] < settings.CITATION_AUTHORITY_REFRESH)
+
+
+def _load_authority() -> Tuple[array, array]:
+    with _local_lock:
+        if not _is_fresh():
+            table = caches["default"].get(AUTHORITY_CACHE_KEY)
+            if table is None:
+                # Lost from the cache; the last rebuild's scores are still stored.
+                rows = Precedent.objects.filter(authority__gt=0).values_list("tid", "authority")
+                table = _authority_table(rows.iterator())
+                caches["default"].set(AUTHORITY_CACHE_KEY, table, settings.CITATION_AUTHORITY_TIMEOUT)
+            _local.update(table=table, loaded_at=time.monotonic())
+        return _local["table"]
+
+
+def _lookup(table: Tuple[array, array], judgments: Iterable[Any]) -> Dict[int, float]:
+    tids, authorities = table
+    scores = {}
+    for judgment in judgments:
+        tid = judgment.get("tid")
+        if tid is None:
+            continue
+        index = bisect_left(tids, tid)
+        if index < len(tids) and tids[index] == tid:
+            scores[tid] = authorities[index]
+    return scores
+
+
+def authority_scores(judgments: Iterable[Any]) -> Dict[int, float]:
+    """
+    The authority of those of ``judgments`` (search results) that have any.
+    Empty, without any lookup, when ``RANKING_AUTHORITY_WEIGHT`` turns
+    authority off.
+    """
+    if not settings.RANKING_AUTHORITY_WEIGHT:
+        return {}
+    table = _local["table"] if _is_fresh() else _load_authority()
+    return _lookup(table, judgments)
+
+
+async def aauthority_scores(judgments: Iterable[Any]) -> Dict[int, float]:
+    """
+    Async version of ``authority_scores``; only a stale table is reloaded off the loop.
+    """
+    if not settings.RANKING_AUTHORITY_WEIGHT:
+        return {}
+    table = _local["table"] if _is_fresh() else await sync_to_async(_load_authority, thread_sensitive=False)()
+    return _lookup(table, judgments)
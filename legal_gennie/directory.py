@@ -0,0 +1,240 @@
+"""
+Materialized lawyer directory.
+
+The lawyer list, per-type counts, fee histograms and a name prefix index are
+precomputed into a single snapshot that lives in the shared cache and in
+process memory. Snapshots are keyed by a directory version which the
+``LawyerMetadata``/``User`` signals bump on every change, so stale snapshots
+are simply never looked up again.
+"""
+import logging
+import threading
+import time
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from legal_gennie.models import LawyerMetadata
+from legal_gennie.models.enums import LawyerTypeEnum
+from legal_gennie.serializers.lawyers import LawyersListSerializer
+from utils.db_router import use_primary
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = "lawyer_directory:version"
+SNAPSHOT_KEY = "lawyer_directory:snapshot:{version}"
+FEE_FIELDS = ("consultation_fee", "call_fee")
+
+# Query params the snapshot knows how to answer. Anything else (e.g. DRF's
+# ``ordering``/``search``) falls back to the database.
+SUPPORTED_PARAMS = {"name", "lawyer_type", "order_by", "limit", "offset"}
+
+_local_lock = threading.Lock()
+# (version, snapshot) held as one tuple so readers never see a mismatched pair.
+_local = (None, None)
+
+
+class DirectorySnapshot:
+    """
+    Immutable, picklable view of the lawyer directory at one version.
+    """
+    __slots__ = ("version", "rows", "fees", "names", "type_counts", "fee_histograms", "prefix_index")
+
+    def __init__(self, version, rows, fee_buckets, prefix_length):
+        self.version = version
+        self.rows = rows
+        self.fees = [
+            {field: _to_decimal(row.get(field)) for field in FEE_FIELDS}
+            for row in rows
+        ]
+        self.names = [(row.get("name") or "").lower() for row in rows]
+
+        self.type_counts = {choice: 0 for choice in LawyerTypeEnum.values}
+        for row in rows:
+            self.type_counts[row["lawyer_type"]] = self.type_counts.get(row["lawyer_type"], 0) + 1
+
+        self.fee_histograms = {
+            field: _histogram([fees[field] for fees in self.fees], fee_buckets)
+            for field in FEE_FIELDS
+        }
+
+        self.prefix_index = {}
+        for idx, name in enumerate(self.names):
+            for token in set(name.split()):
+                for length in range(1, min(len(token), prefix_length) + 1):
+                    self.prefix_index.setdefault(token[:length], []).append(idx)
+
+    def facets(self) -> Dict[str, Any]:
+        labels = dict(LawyerTypeEnum.choices)
+        return {
+            "version": self.version,
+            "count": len(self.rows),
+            "lawyer_types": [
+                {"value": value, "label": labels.get(value, str(value)), "count": count}
+                for value, count in self.type_counts.items()
+            ],
+            "fee_histograms": self.fee_histograms,
+        }
+
+    def filter(self, name: Optional[str] = None, lawyer_type: Optional[str] = None,
+               order_by: Optional[str] = None) -> Optional[List[Dict[str, Any]]]:
+        """
+        Mirrors ``LawyerFilter`` over the snapshot rows.
+
+        Returns:
+            Optional[List[Dict]]: Matching rows, or None if ``order_by`` names a
+            field the snapshot cannot sort on.
+        """
+        indices = range(len(self.rows))
+        if name:
+            needle = name.lower()
+            indices = [i for i in indices if needle in self.names[i]]
+        if lawyer_type:
+            needle = lawyer_type.lower()
+            indices = [i for i in indices if needle in str(self.rows[i]["lawyer_type"])]
+
+        indices = list(indices)
+        if order_by:
+            # Apply sort keys right to left so the first one wins (stable sort).
+            for key in reversed([k.strip() for k in order_by.split(",") if k.strip()]):
+                field = key.lstrip("-")
+                if field not in FEE_FIELDS:
+                    return None
+                indices.sort(key=lambda i: _null_first(self.fees[i][field]), reverse=key.startswith("-"))
+
+        return [self.rows[i] for i in indices]
+
+    def search_prefix(self, prefix: str, prefix_length: int) -> List[Dict[str, Any]]:
+        """
+        Returns rows where any word of the lawyer's name starts with ``prefix``.
+        """
+        prefix = prefix.strip().lower()
+        if not prefix:
+            return []
+        candidates = self.prefix_index.get(prefix[:prefix_length], [])
+        if len(prefix) > prefix_length:
+            candidates = [
+                i for i in candidates
+                if any(token.startswith(prefix) for token in self.names[i].split())
+            ]
+        return [self.rows[i] for i in candidates]
+
+
+def _to_decimal(value) -> Optional[Decimal]:
+    if value is None or value == "":
+        return None
+    return Decimal(str(value))
+
+
+def _null_first(value):
+    return (value is not None, value or Decimal(0))
+
+
+def _histogram(values, edges) -> List[Dict[str, Any]]:
+    """
+    Buckets fee values into ``[edge_i, edge_i+1)`` ranges; the last bucket is open ended.
+    Missing fees are not counted.
+    """
+    buckets = []
+    for i, low in enumerate(edges):
+        high = edges[i + 1] if i + 1 < len(edges) else None
+        buckets.append({"min": low, "max": high, "count": 0})
+    for value in values:
+        if value is None:
+            continue
+        for bucket in reversed(buckets):
+            if value >= bucket["min"]:
+                bucket["count"] += 1
+                break
+    return buckets
+
+
+def get_version() -> int:
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # Seed with a timestamp rather than 1 so a cache flush can never
+        # resurrect a version some process still holds a snapshot for.
+        cache.add(VERSION_KEY, time.time_ns(), None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def bump_version() -> None:
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.add(VERSION_KEY, time.time_ns(), None)
+
+
+def invalidate() -> None:
+    """
+    Bumps the directory version once the current transaction commits, so a
+    concurrent rebuild can't snapshot uncommitted data under the new version.
+    """
+    transaction.on_commit(bump_version)
+
+
+def build_snapshot(version: int) -> DirectorySnapshot:
+    # Read from the primary: the version was just bumped by a write and a
+    # lagging replica would pin stale rows to it.
+    with use_primary():
+        queryset = LawyerMetadata.objects.filter(deleted=False).select_related("user").order_by("id")
+        rows = [dict(row) for row in LawyersListSerializer(queryset, many=True).data]
+    logger.info(f"Built lawyer directory snapshot v{version} with {len(rows)} lawyers")
+    return DirectorySnapshot(
+        version,
+        rows,
+        fee_buckets=list(settings.LAWYER_DIRECTORY_FEE_BUCKETS),
+        prefix_length=settings.LAWYER_DIRECTORY_PREFIX_LENGTH,
+    )
+
+
+def get_snapshot() -> DirectorySnapshot:
+    """
+    Returns the snapshot for the current version, checking process memory, then
+    the shared cache, and only rebuilding from the database on a miss in both.
+    """
+    global _local
+
+    version = get_version()
+    local_version, snapshot = _local
+    if snapshot is not None and local_version == version:
+        return snapshot
+
+    with _local_lock:
+        local_version, snapshot = _local
+        if snapshot is not None and local_version == version:
+            return snapshot
+
+        key = SNAPSHOT_KEY.format(version=version)
+        snapshot = cache.get(key)
+        if snapshot is None:
+            snapshot = build_snapshot(version)
+            cache.set(key, snapshot, settings.LAWYER_DIRECTORY_SNAPSHOT_TIMEOUT)
+
+        _local = (version, snapshot)
+        return snapshot
+
+
+def list_lawyers(query_params) -> Optional[List[Dict[str, Any]]]:
+    """
+    Answers a lawyer list request from the snapshot.
+
+    Returns:
+        Optional[List[Dict]]: Serialized rows, or None if the request uses
+        parameters the snapshot can't answer and must go to the database.
+    """
+    if not set(query_params.keys()) <= SUPPORTED_PARAMS:
+        return None
+    return get_snapshot().filter(
+        name=query_params.get("name"),
+        lawyer_type=query_params.get("lawyer_type"),
+        order_by=query_params.get("order_by"),
+    )
+
+
+def search_lawyers(prefix: str) -> List[Dict[str, Any]]:
+    return get_snapshot().search_prefix(prefix, settings.LAWYER_DIRECTORY_PREFIX_LENGTH)
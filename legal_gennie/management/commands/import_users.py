@@ -0,0 +1,44 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from legal_gennie.onboarding import import_users, issue_tokens, read_users_csv, write_tokens_csv
+
+
+class Command(BaseCommand):
+    help = "Creates users in bulk from a CSV with email,name[,password][,is_lawyer] columns."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV file to import")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.USER_IMPORT_BATCH_SIZE,
+            help="Users per bulk insert",
+        )
+        parser.add_argument(
+            "--hash-workers",
+            type=int,
+            default=os.cpu_count(),
+            help="Processes to hash passwords in, 0 to hash inline",
+        )
+        parser.add_argument("--tokens", help="Also issue tokens, written to this CSV as email,refresh,access")
+
+    def handle(self, *args, **options):
+        try:
+            with open(options["path"], newline="") as file:
+                rows = read_users_csv(file)
+        except (OSError, ValueError) as error:
+            raise CommandError(error)
+
+        users, skipped = import_users(rows, options["batch_size"], options["hash_workers"])
+        self.stdout.write(f"Imported {len(users)} users, skipped {len(skipped)}")
+        for email in skipped:
+            self.stdout.write(f"  skipped {email}")
+
+        if options["tokens"]:
+            tokens = issue_tokens(users, options["batch_size"])
+            with open(options["tokens"], "w", newline="") as file:
+                write_tokens_csv(file, users, tokens)
+            self.stdout.write(f"Wrote {len(tokens)} tokens to {options['tokens']}")
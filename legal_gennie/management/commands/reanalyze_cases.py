@@ -0,0 +1,52 @@
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils.dateparse import parse_datetime, parse_date
+
+from legal_gennie.batches import collect_analysis_batch, submit_analysis_batch
+from legal_gennie.models import Case
+from legal_gennie.tasks import poll_analysis_batch
+
+
+class Command(BaseCommand):
+    help = "Re-analyzes stored cases through the LLM Batch API, e.g. after a prompt change."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--since", help="Only cases created on or after this date/datetime")
+        parser.add_argument("--limit", type=int, help="Maximum number of cases to submit")
+        parser.add_argument("--backend", help="LLM backend, defaults to LLM_BACKEND")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.LLM_BATCH_MAX_REQUESTS,
+            help="Cases per submitted batch",
+        )
+        parser.add_argument(
+            "--wait",
+            action="store_true",
+            help="Collect results in this process instead of a Celery task",
+        )
+
+    def handle(self, *args, **options):
+        queryset = Case.objects.filter(deleted=False).order_by("id")
+        if options["since"]:
+            since = parse_datetime(options["since"]) or parse_date(options["since"])
+            queryset = queryset.filter(created_at__gte=since)
+        if options["limit"]:
+            queryset = queryset[:options["limit"]]
+
+        token = os.environ.get("INDIAN_KANOON_API_TOKEN", "")
+        cases = list(queryset)
+        for start in range(0, len(cases), options["batch_size"]):
+            batch = submit_analysis_batch(cases[start:start + options["batch_size"]], token, options["backend"])
+            self.stdout.write(f"Batch {batch.external_id} ({batch.get_status_display()}): {batch.remote_id}")
+            if not batch.remote_id:
+                continue
+            if options["wait"]:
+                while not collect_analysis_batch(batch):
+                    time.sleep(settings.LLM_BATCH_POLL_INTERVAL)
+                self.stdout.write(f"Batch {batch.external_id}: {batch.succeeded} succeeded, {batch.failed} failed")
+            else:
+                poll_analysis_batch.delay(batch.pk)
@@ -0,0 +1,49 @@
+# Generated by Django 5.0.4 on 2026-10-19 15:38
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('legal_gennie', '0007_alter_lawyermetadata_call_fee_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Case',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('external_id', models.UUIDField(db_index=True, default=uuid.uuid4, unique=True)),
+                ('petition', models.TextField()),
+                ('search_query', models.CharField(blank=True, max_length=255)),
+                ('judgments', models.JSONField(blank=True, default=list)),
+                ('analysis', models.JSONField(blank=True, null=True)),
+                ('analyzed_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('deleted', models.BooleanField(default=False)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='cases', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='AnalysisBatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('external_id', models.UUIDField(db_index=True, default=uuid.uuid4, unique=True)),
+                ('backend', models.CharField(max_length=50)),
+                ('remote_id', models.CharField(blank=True, max_length=255)),
+                ('status', models.IntegerField(choices=[(1, 'Pending'), (2, 'Submitted'), (3, 'Completed'), (4, 'Failed')], default=1)),
+                ('succeeded', models.PositiveIntegerField(default=0)),
+                ('failed', models.PositiveIntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('cases', models.ManyToManyField(related_name='analysis_batches', to='legal_gennie.case')),
+            ],
+        ),
+    ]
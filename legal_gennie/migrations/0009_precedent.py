@@ -0,0 +1,24 @@
+# Generated by Django 5.0.4 on 2026-10-19 17:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('legal_gennie', '0008_case_analysisbatch'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Precedent',
+            fields=[
+                ('tid', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('cites', models.JSONField(blank=True, default=list)),
+                ('cited_by', models.PositiveIntegerField(default=0)),
+                ('authority', models.FloatField(default=0.0)),
+                ('parsed_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
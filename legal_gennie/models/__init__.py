@@ -1 +1,3 @@
-from .users import *  # noqa
\ No newline at end of file
+from .users import *  # noqa
+from .cases import *  # noqa
+from .precedents import *  # noqa
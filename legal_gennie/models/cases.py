@@ -0,0 +1,39 @@
+from uuid import uuid4
+
+from django.db import models
+
+from .enums import AnalysisBatchStatusEnum
+from .users import User
+
+
+class Case(models.Model):
+    external_id = models.UUIDField(default=uuid4, unique=True, db_index=True)
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name="cases")
+    petition = models.TextField()
+    search_query = models.CharField(max_length=255, blank=True)
+    judgments = models.JSONField(default=list, blank=True)
+    analysis = models.JSONField(null=True, blank=True)
+    analyzed_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    deleted = models.BooleanField(default=False)
+
+    def __str__(self):
+        return str(self.external_id)
+
+
+class AnalysisBatch(models.Model):
+    external_id = models.UUIDField(default=uuid4, unique=True, db_index=True)
+    backend = models.CharField(max_length=50)
+    remote_id = models.CharField(max_length=255, blank=True)
+    status = models.IntegerField(choices=AnalysisBatchStatusEnum.choices, default=AnalysisBatchStatusEnum.PENDING)
+    cases = models.ManyToManyField(Case, related_name="analysis_batches")
+    succeeded = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.backend}:{self.remote_id or self.external_id}"
@@ -11,4 +11,10 @@ class LawyerTypeEnum(IntegerChoices):
     REAL_ESTATE = 7
     LABOUR = 8
     ENTERTAINMENT = 9
-    GENERAL = 10
\ No newline at end of file
+    GENERAL = 10
+
+class AnalysisBatchStatusEnum(IntegerChoices):
+    PENDING = 1
+    SUBMITTED = 2
+    COMPLETED = 3
+    FAILED = 4
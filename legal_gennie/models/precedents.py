@@ -0,0 +1,19 @@
+from django.db import models
+
+
+class Precedent(models.Model):
+    """
+    A judgment in the citation graph built by ``legal_gennie.citations``.
+    """
+    tid = models.BigIntegerField(primary_key=True)
+    # Indian Kanoon ids of the judgments it cites, from its cached document.
+    # Empty until that document is parsed (parsed_at).
+    cites = models.JSONField(default=list, blank=True)
+    cited_by = models.PositiveIntegerField(default=0)
+    # PageRank in the graph, scaled to 0 (uncited) .. 1 (the most authoritative).
+    authority = models.FloatField(default=0.0)
+    parsed_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return str(self.tid)
@@ -3,6 +3,8 @@ from uuid import uuid4
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 from django.db import models
 
+from utils import hashers
+
 from .enums import LawyerTypeEnum
 
 
@@ -17,6 +19,7 @@ class Usermanager(BaseUserManager):
         user = self.model(
             email=self.normalize_email(email),
             name=name,
+            **extra_fields,
         )
 
         user.set_password(password)
@@ -27,16 +30,14 @@ class Usermanager(BaseUserManager):
         """
         Creates and saves a superuser with the given email, name and password.
         """
-        user = self.create_user(
+        return self.create_user(
             email,
             password=password,
             name=name,
+            is_admin=True,
+            is_superuser=True,
+            is_staff=True,
         )
-        user.is_admin = True
-        user.is_superuser = True
-        user.is_staff = True
-        user.save(using=self._db)
-        return user
 
 
 class User(AbstractUser):
@@ -56,9 +57,34 @@ class User(AbstractUser):
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['name']
 
+    # Set on the request users utils.authentication builds from a token or a
+    # cached row. They only hold the auth fields, possibly stale, so a full
+    # save would write those back over the row.
+    _auth_fields_only = False
+
     def __str__(self):
         return self.email
 
+    def save(self, *args, **kwargs):
+        if self._auth_fields_only and kwargs.get("update_fields") is None:
+            raise ValueError("Request users can only be saved with update_fields")
+        super().save(*args, **kwargs)
+
+    # As in AbstractBaseUser, but hashing through utils.hashers, which can
+    # run it in a process pool.
+    def set_password(self, raw_password):
+        self.password = hashers.make_password(raw_password)
+        self._password = raw_password
+
+    def check_password(self, raw_password):
+        def setter(raw_password):
+            self.set_password(raw_password)
+            # Password hash upgrades shouldn't be considered password changes.
+            self._password = None
+            self.save(update_fields=["password"])
+
+        return hashers.check_password(raw_password, self.password, setter)
+
 
 class LawyerMetadata(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="lawyer_meta")
@@ -0,0 +1,128 @@
+"""
+Bulk user import, for onboarding a firm's associates in one go.
+
+Creating users one at a time costs an INSERT, a password hash and, to log
+them in, an outstanding token INSERT each. ``import_users`` takes the rows in
+batches instead: one query to skip existing emails, the batch's passwords
+hashed together (across processes when asked), and the users, their lawyer
+profiles and their tokens written with ``bulk_create``.
+
+``bulk_create`` sends no signals, so the lawyer directory is invalidated once
+at the end instead of per lawyer.
+"""
+import csv
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+from django.db.models.functions import Lower
+
+from legal_gennie import directory
+from legal_gennie.models import LawyerMetadata, User
+from utils import hashers
+from utils.authentication import AuthRefreshToken
+
+logger = logging.getLogger(__name__)
+
+CSV_COLUMNS = ("email", "name", "password", "is_lawyer")
+TRUE_VALUES = {"1", "true", "yes", "y"}
+
+
+def read_users_csv(lines: Iterable[str]) -> List[Dict[str, str]]:
+    """
+    Reads users from CSV lines with an ``email,name[,password][,is_lawyer]``
+    header. Rows without a password get an unusable one.
+    """
+    reader = csv.DictReader(lines)
+    missing = {"email", "name"} - set(reader.fieldnames or ())
+    if missing:
+        raise ValueError(f"CSV is missing the column(s): {', '.join(sorted(missing))}")
+    return [{column: (row.get(column) or "").strip() for column in CSV_COLUMNS} for row in reader]
+
+
+def write_tokens_csv(file, users: List[User], tokens: List[AuthRefreshToken]) -> None:
+    writer = csv.writer(file)
+    writer.writerow(("email", "refresh", "access"))
+    for user, token in zip(users, tokens):
+        writer.writerow((user.email, str(token), str(token.access_token)))
+
+
+def import_users(
+    rows: Iterable[Dict[str, str]],
+    batch_size: Optional[int] = None,
+    hash_workers: Optional[int] = None,
+) -> Tuple[List[User], List[str]]:
+    """
+    Creates users from rows with ``email``, ``name`` and optionally
+    ``password`` and ``is_lawyer``, ``batch_size`` at a time.
+
+    Args:
+        rows: The users to create
+        batch_size: Rows per batch, defaults to ``USER_IMPORT_BATCH_SIZE``
+        hash_workers: Processes to hash passwords in, see ``utils.hashers.make_passwords``
+
+    Returns:
+        Tuple[List[User], List[str]]: The created users, and the emails skipped
+        as invalid, repeated or already registered
+    """
+    batch_size = batch_size or settings.USER_IMPORT_BATCH_SIZE
+    created, skipped, seen, batch = [], [], set(), []
+    with hashers.password_pool(hash_workers) as pool:
+        for row in rows:
+            email = User.objects.normalize_email(row.get("email", ""))
+            try:
+                validate_email(email)
+            except ValidationError:
+                skipped.append(email)
+                continue
+            if email.lower() in seen:
+                skipped.append(email)
+                continue
+            seen.add(email.lower())
+            batch.append({**row, "email": email})
+            if len(batch) == batch_size:
+                _import_batch(batch, hash_workers, pool, created, skipped)
+                batch = []
+        if batch:
+            _import_batch(batch, hash_workers, pool, created, skipped)
+    logger.info(f"Imported {len(created)} users, skipped {len(skipped)}")
+    return created, skipped
+
+
+def _import_batch(rows, hash_workers, pool, created, skipped):
+    # Case-insensitive like the de-duplication in import_users, so a row
+    # can't add a case variant of an existing account.
+    existing = set(
+        User.objects.annotate(email_lower=Lower("email"))
+        .filter(email_lower__in=[row["email"].lower() for row in rows])
+        .values_list("email_lower", flat=True)
+    )
+    skipped.extend(row["email"] for row in rows if row["email"].lower() in existing)
+    rows = [row for row in rows if row["email"].lower() not in existing]
+    passwords = hashers.make_passwords([row.get("password") or None for row in rows], hash_workers, pool)
+    users = [
+        User(
+            email=row["email"],
+            name=row.get("name", ""),
+            password=password,
+            is_lawyer=str(row.get("is_lawyer", "")).lower() in TRUE_VALUES,
+        )
+        for row, password in zip(rows, passwords)
+    ]
+    with transaction.atomic():
+        User.objects.bulk_create(users)
+        lawyers = [LawyerMetadata(user=user) for user in users if user.is_lawyer]
+        if lawyers:
+            LawyerMetadata.objects.bulk_create(lawyers)
+            directory.invalidate()
+    created.extend(users)
+
+
+def issue_tokens(users: List[User], batch_size: Optional[int] = None) -> List[AuthRefreshToken]:
+    """
+    Issues a refresh token per user, e.g. for welcome emails after an import.
+    """
+    return AuthRefreshToken.for_users(users, batch_size or settings.USER_IMPORT_BATCH_SIZE)
@@ -0,0 +1,319 @@
+"""
+The case pipeline behind ``/api/cases``: search query generation, Indian
+Kanoon search, judgment detail fetching and petition analysis.
+
+The whole run is bounded by ``CASE_DEADLINE`` and each stage by its share of
+``CASE_STAGE_BUDGETS``. Stages that run out of time degrade (fewer detailed
+judgments, no analysis) instead of failing the request.
+
+Every stage has an async twin (``arun_case`` and friends) for the async
+views, sharing caches and coalescing keys with the sync path.
+"""
+import hashlib
+import logging
+from typing import Any, Dict, Tuple
+
+from django.conf import settings
+from rest_framework import status
+
+from legal_gennie.citations import aauthority_scores, authority_scores
+from utils.cache import asingle_flight, make_key, single_flight
+from utils.deadline import deadline, remaining
+from utils.fanout import FetchError, ItemResult, afan_out, fan_out
+from utils.ranking import rerank_judgments
+from utils.text import chunks
+from utils.helpers import (
+    generate_search_query_from_petition,
+    fetch_indian_kanoon_judgments,
+    fetch_judgment_details,
+    analyze_petition_with_openai,
+    afetch_indian_kanoon_judgments,
+    afetch_judgment_details,
+    aanalyze_petition_with_openai,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def petition_fingerprint(petition: str) -> str:
+    """
+    Identifies a petition independent of incidental whitespace, so resubmissions
+    of the same template map to the same fingerprint.
+    """
+    # Hashes " ".join(petition.split()) chunk by chunk; chunks end at
+    # whitespace, so the words come out the same.
+    digest = hashlib.sha256()
+    separator = b""
+    for chunk in chunks(petition):
+        words = chunk.split()
+        if words:
+            digest.update(separator + " ".join(words).encode())
+            separator = b" "
+    return digest.hexdigest()
+
+
+def _case_key(petition: str, token: str) -> str:
+    return make_key("case", petition_fingerprint(petition), bool(token))
+
+
+def _cacheable(result: Tuple[int, Dict[str, Any]]) -> bool:
+    # Degraded responses are served to the callers already waiting on this
+    # run but never cached, so the next request gets a full attempt.
+    return result[0] == status.HTTP_201_CREATED and not result[1].get("degraded")
+
+
+def run_case(petition: str, token: str) -> Tuple[int, Dict[str, Any]]:
+    """
+    Runs the case pipeline, coalescing concurrent identical requests: the first
+    caller for a petition does the work and duplicates arriving while it runs,
+    in this process or another, wait for and share its response.
+
+    Returns:
+        Tuple[int, Dict]: HTTP status code and response body
+    """
+    return single_flight(
+        _case_key(petition, token),
+        lambda: build_case_response(petition, token),
+        timeout=settings.CASE_COALESCE_TIMEOUT,
+        cache_if=_cacheable,
+    )
+
+
+async def arun_case(petition: str, token: str) -> Tuple[int, Dict[str, Any]]:
+    """
+    Async version of ``run_case``; sync and async callers coalesce with each other.
+    """
+    return await asingle_flight(
+        _case_key(petition, token),
+        lambda: abuild_case_response(petition, token),
+        timeout=settings.CASE_COALESCE_TIMEOUT,
+        cache_if=_cacheable,
+    )
+
+
+def build_case_response(petition: str, token: str) -> Tuple[int, Dict[str, Any]]:
+    with deadline(settings.CASE_DEADLINE):
+        return _build_case_response(petition, token)
+
+
+def _build_case_response(petition: str, token: str) -> Tuple[int, Dict[str, Any]]:
+    budgets = settings.CASE_STAGE_BUDGETS
+
+    with deadline(budgets['search']):
+        search_query = generate_search_query_from_petition(petition)
+        judgments = fetch_indian_kanoon_judgments(search_query, token) if token else []
+
+    response_data = _new_response(search_query)
+
+    # Only fetch judgments if token is available
+    if token:
+        # Check if there was an error
+        if isinstance(judgments, dict) and 'error' in judgments:
+            return _search_error(judgments, search_query)
+
+        # Only fetch details for the judgments the analysis will actually use
+        judgments = rerank_judgments(
+            petition, judgments, authority_scores(judgments), settings.RANKING_AUTHORITY_WEIGHT
+        )
+        with deadline(budgets['details']):
+            enhanced_judgments = fetch_details_concurrent(
+                judgments[:settings.CASE_DETAIL_FETCH_LIMIT], token, timeout=remaining()
+            )
+
+        with deadline(budgets['analysis']):
+            if _analysis_fits():
+                # Analyze petition with OpenAI using the enhanced judgments
+                analysis_result = analyze_petition_with_openai(petition, enhanced_judgments)
+            else:
+                analysis_result = None
+
+        _complete_response(response_data, judgments, enhanced_judgments, analysis_result)
+
+    return status.HTTP_201_CREATED, response_data
+
+
+async def abuild_case_response(petition: str, token: str) -> Tuple[int, Dict[str, Any]]:
+    """
+    Async version of ``build_case_response``; upstream calls don't hold a thread.
+    """
+    budgets = settings.CASE_STAGE_BUDGETS
+
+    with deadline(settings.CASE_DEADLINE):
+        with deadline(budgets['search']):
+            search_query = generate_search_query_from_petition(petition)
+            judgments = await afetch_indian_kanoon_judgments(search_query, token) if token else []
+
+        response_data = _new_response(search_query)
+
+        if token:
+            if isinstance(judgments, dict) and 'error' in judgments:
+                return _search_error(judgments, search_query)
+
+            judgments = rerank_judgments(
+                petition, judgments, await aauthority_scores(judgments), settings.RANKING_AUTHORITY_WEIGHT
+            )
+            with deadline(budgets['details']):
+                enhanced_judgments = await afetch_details_concurrent(
+                    judgments[:settings.CASE_DETAIL_FETCH_LIMIT], token, timeout=remaining()
+                )
+
+            with deadline(budgets['analysis']):
+                if _analysis_fits():
+                    analysis_result = await aanalyze_petition_with_openai(petition, enhanced_judgments)
+                else:
+                    analysis_result = None
+
+            _complete_response(response_data, judgments, enhanced_judgments, analysis_result)
+
+    return status.HTTP_201_CREATED, response_data
+
+
+def _new_response(search_query: str) -> Dict[str, Any]:
+    return {
+        "prediction": "[prediction_message]",
+        "search_query": search_query,
+        "judgments": []
+    }
+
+
+def _search_error(judgments: Dict[str, Any], search_query: str) -> Tuple[int, Dict[str, Any]]:
+    return status.HTTP_400_BAD_REQUEST, {
+        "error": judgments['error'],
+        "search_query": search_query
+    }
+
+
+def _analysis_fits() -> bool:
+    if remaining() < settings.CASE_MIN_ANALYSIS_TIME:
+        logger.warning(
+            f"Skipping analysis, only {remaining():.1f}s left of the request deadline",
+            extra={"remaining_s": round(remaining(), 2)},
+        )
+        return False
+    return True
+
+
+def _complete_response(response_data, judgments, enhanced_judgments, analysis_result) -> None:
+    """
+    Adds the judgments and analysis to ``response_data``, listing the stages
+    that fell short under ``degraded``.
+    """
+    degraded = []
+    if any(j.get('fetch_error', {}).get('kind') == FetchError.TIMEOUT for j in enhanced_judgments):
+        degraded.append("details")
+    response_data["judgments"] = judgments
+
+    if analysis_result is None:
+        degraded.append("analysis")
+    elif not isinstance(analysis_result, dict) or 'error' in analysis_result:
+        # Log the error but continue with the response
+        logger.error(f"OpenAI analysis failed: {analysis_result.get('error', 'Unknown error')}")
+        degraded.append("analysis")
+    else:
+        # Add the analysis results to the response
+        response_data["analysis"] = analysis_result
+
+    if degraded:
+        response_data["degraded"] = degraded
+
+
+def fetch_details_concurrent(judgments, token, max_workers=3, timeout=None):
+    """
+    Fetches detailed information for multiple judgments concurrently
+    with per-judgment error handling and rate limiting
+
+    Args:
+        judgments (List[Dict]): List of judgment objects with TIDs
+        token (str): Authorization token for the Indian Kanoon API
+        max_workers (int): Maximum number of concurrent workers
+        timeout (Optional[float]): Seconds to wait before returning whatever finished
+
+    Returns:
+        List[Dict]: Enhanced judgment objects with detailed information, in input order
+    """
+    judgments = [judgment for judgment in judgments if 'tid' in judgment]
+
+    # Setting a lower number of workers helps prevent API rate limiting
+    results = fan_out(
+        lambda judgment: fetch_judgment_details(judgment['tid'], token),
+        judgments,
+        max_workers=min(max_workers, 3),
+        submit_interval=settings.KANOON_SUBMIT_INTERVAL,
+        timeout=timeout,
+    )
+    return _merge_all(judgments, results)
+
+
+async def afetch_details_concurrent(judgments, token, max_workers=3, timeout=None):
+    """
+    Async version of ``fetch_details_concurrent``.
+    """
+    judgments = [judgment for judgment in judgments if 'tid' in judgment]
+
+    results = await afan_out(
+        lambda judgment: afetch_judgment_details(judgment['tid'], token),
+        judgments,
+        max_workers=min(max_workers, 3),
+        submit_interval=settings.KANOON_SUBMIT_INTERVAL,
+        timeout=timeout,
+    )
+    return _merge_all(judgments, results)
+
+
+def _merge_all(judgments, results):
+    enhanced_judgments = [merge_judgment_details(judgment, result) for judgment, result in zip(judgments, results)]
+
+    # Log summary of results
+    success_count = sum(1 for j in enhanced_judgments if j.get('detailed_citation', False))
+    logger.info(
+        f"Successfully fetched details for {success_count}/{len(enhanced_judgments)} judgments",
+        extra={"fetched": success_count, "judgments": len(enhanced_judgments)},
+    )
+
+    return enhanced_judgments
+
+
+def merge_judgment_details(judgment: Dict[str, Any], result: ItemResult) -> Dict[str, Any]:
+    """
+    Returns a copy of ``judgment`` enhanced with the fetched details, or marked
+    with a structured ``fetch_error`` when the fetch failed.
+    """
+    # Make a copy to avoid modifying the original, which may be a search
+    # result record (see utils.judgments) or a dict stored on a case
+    judgment = dict(judgment)
+    details = result.value
+    error = result.error
+
+    if error is None:
+        if not details:
+            error = FetchError(FetchError.EMPTY, "Empty response")
+        elif not isinstance(details, dict):
+            error = FetchError(FetchError.INVALID, f"Unexpected response format: {type(details).__name__}")
+        elif 'error' in details:
+            error = FetchError(FetchError.UPSTREAM, details['error'])
+        elif not details.get('doc'):
+            error = FetchError(FetchError.INVALID, "Missing document content")
+
+    if error is not None:
+        logger.warning(
+            f"Failed to fetch details for judgment {judgment.get('tid')}: {error.kind}: {error.message}",
+            extra={"tid": judgment.get("tid"), "error": error.kind},
+        )
+        judgment['detailed_citation'] = False
+        judgment['fetch_error'] = error.to_dict()
+        return judgment
+
+    # Update citation with more comprehensive information
+    judgment['citation'] = details['doc']
+    judgment['detailed_citation'] = True
+
+    # The analysis prompt builds its snippets from the full text
+    if details.get('full_text'):
+        judgment['full_text'] = details['full_text']
+        judgment['text_preview'] = details['full_text'][:200] + "..."
+
+    # Add any other metadata fields that were returned
+    for field in ['title', 'from', 'bench', 'author', 'date']:
+        if field in details:
+            judgment[field] = details[field]
+    return judgment
@@ -0,0 +1,132 @@
+"""
+Off-peak prefetching of the judgments popular cases need.
+
+``generate_search_query_from_petition`` maps most petitions onto a handful of
+queries, and every stored ``Case`` records the query it ran. During the
+off-peak hours the ``prefetch_popular_judgments`` task re-runs the most
+frequent recent queries and fetches the documents of their results, writing
+them to the same cache entries the case pipeline reads, with a timeout long
+enough to last through the next peak.
+
+Each run may make at most ``JUDGMENT_PREFETCH_MAX_REQUESTS`` upstream requests,
+spaced by ``KANOON_SUBMIT_INTERVAL``, within ``JUDGMENT_PREFETCH_RUN_TIME``
+seconds. Items are marked when refreshed, so the next run carries on where the
+previous one stopped instead of refetching the most popular queries.
+"""
+import logging
+from collections import Counter
+from datetime import timedelta
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Count
+from django.utils import timezone
+
+from legal_gennie.models import Case
+from utils import cache
+from utils.deadline import deadline, sleep_within_deadline
+from utils.helpers import fetch_indian_kanoon_judgments, fetch_judgment_details
+
+logger = logging.getLogger(__name__)
+
+
+def in_off_peak(now=None) -> bool:
+    """
+    Whether ``now`` (default: the current time) falls in the prefetch hours,
+    in ``TIME_ZONE``. The window may wrap around midnight.
+    """
+    hour = timezone.localtime(now).hour
+    start, end = settings.JUDGMENT_PREFETCH_START_HOUR, settings.JUDGMENT_PREFETCH_END_HOUR
+    if start <= end:
+        return start <= hour < end
+    return hour >= start or hour < end
+
+
+def popular_queries(limit: int, days: int) -> List[str]:
+    """
+    The ``limit`` search queries most cases ran in the last ``days`` days, most frequent first.
+    """
+    since = timezone.now() - timedelta(days=days)
+    return list(
+        Case.objects.filter(created_at__gte=since)
+        .exclude(search_query="")
+        .values("search_query")
+        .annotate(requests=Count("id"))
+        .order_by("-requests", "search_query")
+        .values_list("search_query", flat=True)[:limit]
+    )
+
+
+class _Run:
+    """
+    Request budget and counters of one prefetch run.
+    """
+    __slots__ = ("requests_left", "stats")
+
+    def __init__(self, max_requests: int):
+        self.requests_left = max_requests
+        self.stats = Counter()
+
+    def warm(self, fetch, *args) -> Optional[Any]:
+        """
+        Returns the value ``fetch(*args)`` is cached with, fetching it unless
+        a recent run already did. Returns None once the run is out of requests or time.
+        """
+        key = fetch.cache_key(*args)
+        marker = f"{key}:prefetched"
+        value = cache.get(key)
+        if value is not cache.MISS and caches["default"].get(marker):
+            self.stats["warm"] += 1
+            return value
+
+        if self.requests_left <= 0:
+            return None
+        # Space requests out, the first one included: runs follow each other.
+        if not sleep_within_deadline(settings.KANOON_SUBMIT_INTERVAL):
+            return None
+        self.requests_left -= 1
+        self.stats["requests"] += 1
+
+        value = fetch.uncached(*args)
+        if cache.is_not_error(value):
+            cache.set(key, value, settings.JUDGMENT_PREFETCH_TIMEOUT)
+            caches["default"].set(marker, True, settings.JUDGMENT_PREFETCH_REFRESH)
+        else:
+            self.stats["errors"] += 1
+        return value
+
+
+def prefetch_popular_judgments(token: str) -> Dict[str, int]:
+    """
+    Warms the search results and documents of the most popular queries, most
+    popular first, until the run's request or time budget is spent.
+
+    Args:
+        token (str): Authorization token for the Indian Kanoon API
+
+    Returns:
+        Dict[str, int]: Counts of upstream ``requests``, items already ``warm``,
+        failed fetches (``errors``) and fully warmed ``queries``
+    """
+    run = _Run(settings.JUDGMENT_PREFETCH_MAX_REQUESTS)
+    queries = popular_queries(settings.JUDGMENT_PREFETCH_QUERIES, settings.JUDGMENT_PREFETCH_DAYS)
+    with deadline(settings.JUDGMENT_PREFETCH_RUN_TIME):
+        for query in queries:
+            if not _prefetch_query(run, query, token):
+                break
+            run.stats["queries"] += 1
+    logger.info(f"Judgment prefetch over {len(queries)} popular queries: {dict(run.stats)}")
+    return dict(run.stats)
+
+
+def _prefetch_query(run: _Run, query: str, token: str) -> bool:
+    judgments = run.warm(fetch_indian_kanoon_judgments, query, token)
+    if judgments is None:
+        return False
+    if not cache.is_not_error(judgments):
+        return True
+    for judgment in judgments[:settings.JUDGMENT_PREFETCH_DOCS_PER_QUERY]:
+        if run.warm(fetch_judgment_details, judgment["tid"], token) is None:
+            return False
+    return True
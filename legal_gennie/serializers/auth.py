@@ -1,5 +1,9 @@
 from rest_framework import serializers
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+
 from legal_gennie.models import User
+from utils.authentication import AuthRefreshToken, remember_blacklisted
 
 
 class RegistrationSerializer(serializers.ModelSerializer):
@@ -21,6 +25,7 @@ class RegistrationSerializer(serializers.ModelSerializer):
         return attrs
 
     def create(self, validated_data):
+        validated_data.pop('password2')
         return User.objects.create_user(**validated_data)
 
 
@@ -29,4 +34,16 @@ class LoginSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = User
-        fields = ['email', 'password']
\ No newline at end of file
+        fields = ['email', 'password']
+
+
+class RefreshSerializer(TokenRefreshSerializer):
+    token_class = AuthRefreshToken
+
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        if "refresh" in data:
+            # Record the rotated token too, so its own refresh is a cache hit.
+            refresh = AuthRefreshToken(data["refresh"], verify=False)
+            remember_blacklisted(refresh[api_settings.JTI_CLAIM], False, refresh["exp"])
+        return data
@@ -1,10 +1,21 @@
+from django.conf import settings
 from rest_framework import serializers
 from typing import Dict, Any, List
 
+from legal_gennie.models import Case
+
 class CaseCreateSerializer(serializers.Serializer):
     petition = serializers.CharField()
     token = serializers.CharField(required=False, help_text="Indian Kanoon API token")
 
+    def validate_petition(self, value):
+        # Checked here rather than with max_length so the setting can change at runtime.
+        if len(value) > settings.PETITION_MAX_LENGTH:
+            raise serializers.ValidationError(
+                f"Ensure this field has no more than {settings.PETITION_MAX_LENGTH} characters."
+            )
+        return value
+
 class JudgmentSerializer(serializers.Serializer):
     tid = serializers.IntegerField()
     title = serializers.CharField()
@@ -15,6 +26,25 @@ class JudgmentSerializer(serializers.Serializer):
     headline = serializers.CharField(required=False)
 
 class CaseResponseSerializer(serializers.Serializer):
+    external_id = serializers.UUIDField(required=False)
     prediction = serializers.CharField()
     search_query = serializers.CharField()
     judgments = JudgmentSerializer(many=True, required=False)
+    # Stages ("details", "analysis") cut short by the request deadline
+    degraded = serializers.ListField(child=serializers.CharField(), required=False)
+
+
+class CaseSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Case
+        fields = (
+            'external_id',
+            'petition',
+            'search_query',
+            'judgments',
+            'analysis',
+            'analyzed_at',
+            'created_at',
+            'updated_at',
+        )
+        read_only_fields = fields
@@ -0,0 +1,34 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from legal_gennie import directory
+from legal_gennie.models import LawyerMetadata, User
+from utils.authentication import forget_user, remember_blacklisted
+
+
+@receiver(post_save, sender=LawyerMetadata)
+@receiver(post_delete, sender=LawyerMetadata)
+def invalidate_lawyer_directory(sender, instance, **kwargs):
+    directory.invalidate()
+
+
+@receiver(post_save, sender=User)
+def invalidate_lawyer_directory_on_user_change(sender, instance, **kwargs):
+    # Directory rows carry the lawyer's name, which lives on the user.
+    if instance.is_lawyer:
+        directory.invalidate()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_authenticated_user(sender, instance, **kwargs):
+    forget_user(instance.pk)
+
+
+# Only post_save: a delete receiver would stop pruning from bulk deleting the
+# blacklist rows of expired tokens.
+@receiver(post_save, sender=BlacklistedToken)
+def remember_blacklisted_token(sender, instance, created, **kwargs):
+    if created:
+        remember_blacklisted(instance.token.jti, True, instance.token.expires_at.timestamp())
@@ -0,0 +1,55 @@
+import os
+
+from celery import shared_task
+from django.conf import settings
+from django.utils import timezone
+
+from legal_gennie import citations, prefetch
+from legal_gennie.batches import collect_analysis_batch
+# Celery isn't loaded at startup (see legal_gennie/__init__.py); importing the
+# app here makes sure callers queue these tasks with the configured broker.
+from legal_gennie.celery import app  # noqa: F401
+from legal_gennie.models import AnalysisBatch
+from utils import authentication
+
+
+@shared_task(bind=True, max_retries=None, ignore_result=True)
+def poll_analysis_batch(self, batch_id):
+    """
+    Polls an analysis batch until it settles, then writes its results back.
+    """
+    batch = AnalysisBatch.objects.get(pk=batch_id)
+    if not collect_analysis_batch(batch):
+        raise self.retry(countdown=settings.LLM_BATCH_POLL_INTERVAL)
+
+
+@shared_task(ignore_result=True)
+def prune_expired_tokens():
+    """
+    Deletes expired JWTs from the outstanding and blacklisted token tables.
+    Scheduled by ``CELERY_BEAT_SCHEDULE``.
+    """
+    authentication.prune_expired_tokens(settings.JWT_PRUNE_BATCH_SIZE)
+
+
+@shared_task(ignore_result=True)
+def prefetch_popular_judgments():
+    """
+    Warms the cache with the judgments of popular queries during off-peak
+    hours. Scheduled by ``CELERY_BEAT_SCHEDULE``.
+    """
+    token = os.environ.get("INDIAN_KANOON_API_TOKEN", "")
+    if token and prefetch.in_off_peak():
+        prefetch.prefetch_popular_judgments(token)
+
+
+@shared_task(ignore_result=True, soft_time_limit=settings.CITATION_GRAPH_TIME_LIMIT,
+             time_limit=settings.CITATION_GRAPH_TIME_LIMIT + 60)
+def build_citation_graph():
+    """
+    Adds the citations of newly cached judgments to the graph and recomputes
+    authority, once a night at ``CITATION_GRAPH_HOUR``. Scheduled by
+    ``CELERY_BEAT_SCHEDULE``.
+    """
+    if timezone.localtime().hour == settings.CITATION_GRAPH_HOUR:
+        citations.build_citation_graph()
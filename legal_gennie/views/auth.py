@@ -2,14 +2,16 @@ from drf_spectacular.utils import extend_schema
 from rest_framework import permissions, status
 from rest_framework.response import Response
 from rest_framework.generics import CreateAPIView
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.views import TokenRefreshView
 from django.contrib.auth import authenticate
 
-from legal_gennie.serializers import UserSerializer, RegistrationSerializer, LoginSerializer
+from utils.authentication import AuthRefreshToken
+
+from legal_gennie.serializers import UserSerializer, RegistrationSerializer, LoginSerializer, RefreshSerializer
 
 
 def get_tokens_for_user(user):
-    refresh = RefreshToken.for_user(user)
+    refresh = AuthRefreshToken.for_user(user)
 
     return {
         'refresh': str(refresh),
@@ -57,3 +59,10 @@ class APILoginView(CreateAPIView):
             return Response(
                 {"error": "Invalid credentials"}, status=status.HTTP_401_UNAUTHORIZED
             )
+
+
+class APIRefreshView(TokenRefreshView):
+    """
+    Exchanges a refresh token for a new access token and a rotated refresh token.
+    """
+    serializer_class = RefreshSerializer
@@ -1,36 +1,67 @@
+import hashlib
+import logging
+
+from adrf.viewsets import ViewSet
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+from drf_spectacular.utils import extend_schema
 from rest_framework import permissions
-from rest_framework.mixins import CreateModelMixin, ListModelMixin, RetrieveModelMixin, DestroyModelMixin
+from rest_framework.mixins import ListModelMixin, RetrieveModelMixin, DestroyModelMixin
 from rest_framework.viewsets import GenericViewSet
 from rest_framework import status
+from rest_framework.decorators import action
 from rest_framework.response import Response
 from django_filters.rest_framework import FilterSet, OrderingFilter, CharFilter
 
 from utils.mixins import PartialUpdateModelMixin
 from utils.permissions import IsSelf
-from utils.helpers import verify_lawyer_dl
+from utils.cache import cache_response
+from utils.helpers import averify_lawyer_dl
 
+from legal_gennie import directory
 from legal_gennie.models import LawyerMetadata, User
 from legal_gennie.serializers.lawyers import VerifyLawyerSerializer, LawyerSerializer, LawyersListSerializer
 
+logger = logging.getLogger(__name__)
+
+
+def _directory_etag(request, *args, **kwargs):
+    # Any change to a lawyer bumps the directory version, so together with the
+    # URL it identifies a directory response. Retrieve varies on the user.
+    raw = f"{directory.get_version()}:{request.user.pk}:{request.get_full_path()}"
+    return hashlib.sha256(raw.encode()).hexdigest()[:32]
+
+
+# Revalidation is answered with a 304 before the directory or database is read.
+directory_condition = method_decorator(condition(etag_func=_directory_etag))
+
 
-class VerifyLawyerViewSet(GenericViewSet, CreateModelMixin):
+class VerifyLawyerViewSet(ViewSet):
+    """
+    Async viewset: the bar council lookup is awaited instead of holding a worker.
+    """
     serializer_class = VerifyLawyerSerializer
     permission_classes = [permissions.IsAuthenticated]
 
-    def create(self, request, *args, **kwargs):
+    @extend_schema(request=VerifyLawyerSerializer, responses={200: None})
+    async def create(self, request, *args, **kwargs):
+        # request.user only carries the fields authentication needs, possibly
+        # from token claims; load the current row since this view saves it.
+        await request.user.arefresh_from_db()
         if request.user.is_verified:
             return Response(
                 {"error": "User is already verified"},
                 status=status.HTTP_400_BAD_REQUEST,
             )
-        serializer = self.get_serializer(data=request.data)
+        serializer = self.serializer_class(data=request.data, context={"request": request, "view": self})
         serializer.is_valid(raise_exception=True)
         registration_number = serializer.validated_data["registration_number"]
-        print(registration_number)
-        verified = verify_lawyer_dl(registration_number)
-        print(verified)
+        verified = await averify_lawyer_dl(registration_number)
         if not verified:
-            print("Invalid registration number")
+            logger.info(
+                f"Bar council found no lawyer for user {request.user.pk}",
+                extra={"user_id": request.user.pk, "registration_number": registration_number},
+            )
             return Response(
                 {"error": "Invalid registration number"},
                 status=status.HTTP_400_BAD_REQUEST,
@@ -38,9 +69,9 @@ class VerifyLawyerViewSet(GenericViewSet, CreateModelMixin):
         user = request.user
         user.is_verified = True
         user.is_lawyer = True
-        user.save()
-        metadata = LawyerMetadata.objects.create(user=user, registration_number=registration_number)
-        metadata.save()
+        await user.asave(update_fields=["is_verified", "is_lawyer", "updated_at"])
+        await LawyerMetadata.objects.acreate(user=user, registration_number=registration_number)
+        logger.info(f"Verified lawyer {user.pk}", extra={"user_id": user.pk, "registration_number": registration_number})
         return Response(
             {"message": "Lawyer verified successfully"},
             status=status.HTTP_200_OK,
@@ -66,6 +97,26 @@ class LawyersListViewSet(GenericViewSet, ListModelMixin):
     permission_classes = [permissions.IsAuthenticated]
     filterset_class = LawyerFilter
 
+    @directory_condition
+    def list(self, request, *args, **kwargs):
+        rows = directory.list_lawyers(request.query_params)
+        if rows is None:
+            return super().list(request, *args, **kwargs)
+        page = self.paginate_queryset(rows)
+        return self.get_paginated_response(page)
+
+    @action(detail=False, methods=["get"], filterset_class=None)
+    @directory_condition
+    def facets(self, request, *args, **kwargs):
+        return Response(directory.get_snapshot().facets(), status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=["get"], filterset_class=None)
+    @directory_condition
+    def search(self, request, *args, **kwargs):
+        rows = directory.search_lawyers(request.query_params.get("q", ""))
+        page = self.paginate_queryset(rows)
+        return self.get_paginated_response(page)
+
 
 class LawyerViewSet(GenericViewSet, RetrieveModelMixin, DestroyModelMixin, PartialUpdateModelMixin):
     queryset = User.objects.filter(deleted=False, is_lawyer=True)
@@ -74,3 +125,14 @@ class LawyerViewSet(GenericViewSet, RetrieveModelMixin, DestroyModelMixin, Parti
     lookup_field = "external_id"
     lookup_url_kwarg = "external_id"
 
+    # Any change to a lawyer bumps the directory version, which retires the cached response.
+    @directory_condition
+    @cache_response(
+        "lawyer_retrieve",
+        timeout=5 * 60,
+        key_func=lambda view, request, *args, **kwargs: directory.get_version(),
+        vary_on_user=True,
+    )
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
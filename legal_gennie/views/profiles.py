@@ -0,0 +1,34 @@
+from django.http import FileResponse
+from drf_spectacular.utils import extend_schema
+from rest_framework import permissions, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from rest_framework.viewsets import ViewSet
+
+from utils import profiling
+
+
+@extend_schema(exclude=True)
+class ProfileViewSet(ViewSet):
+    """
+    Admin-only access to the request profiles stored by ``utils.profiling``.
+    """
+    permission_classes = [permissions.IsAdminUser]
+    lookup_field = "profile_id"
+    lookup_value_regex = "[0-9a-f-]{36}"
+
+    def list(self, request):
+        return Response(profiling.list_profiles())
+
+    def retrieve(self, request, profile_id=None):
+        summary = profiling.get_profile(profile_id)
+        if summary is None:
+            return Response({"detail": "Profile not found"}, status=status.HTTP_404_NOT_FOUND)
+        return Response(summary)
+
+    @action(detail=True, methods=["get"])
+    def download(self, request, profile_id=None):
+        path = profiling.cpu_profile_path(profile_id)
+        if path is None:
+            return Response({"detail": "Profile not found"}, status=status.HTTP_404_NOT_FOUND)
+        return FileResponse(path.open("rb"), as_attachment=True, filename=path.name)
@@ -0,0 +1,18 @@
+"""
+Test database for the ``TestCase`` modules that need one. The suite runs
+under plain pytest, so such modules create it themselves:
+
+    from .db import setUpModule, tearDownModule  # noqa: F401
+"""
+from django.test.utils import setup_databases, teardown_databases
+
+_databases = None
+
+
+def setUpModule():
+    global _databases
+    _databases = setup_databases(verbosity=0, interactive=False)
+
+
+def tearDownModule():
+    teardown_databases(_databases, verbosity=0)
@@ -0,0 +1,122 @@
+import time
+import uuid
+from unittest import mock
+
+from django.core.cache import caches
+from django.test import SimpleTestCase, override_settings
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, TokenError
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import AccessToken
+
+from legal_gennie.models import User
+from utils.authentication import AuthRefreshToken, CachedJWTAuthentication, forget_user, remember_blacklisted
+
+LOCMEM_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "test-shared"},
+    "local": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "test-l1"},
+}
+
+EXTERNAL_ID = uuid.UUID("12345678-1234-5678-1234-567812345678")
+
+
+def make_token(**claims):
+    token = AccessToken()
+    token["user_id"] = 7
+    for name, value in claims.items():
+        token[name] = value
+    return token
+
+
+def user_row(**overrides):
+    row = {"id": 7, "external_id": EXTERNAL_ID, "is_active": True, "is_staff": False,
+           "is_superuser": False, "is_admin": False, "is_lawyer": True, "is_verified": False}
+    row.update(overrides)
+    return row
+
+
+class TestCachedJWTAuthentication(SimpleTestCase):
+
+    def setUp(self):
+        caches["local"].clear()
+        patcher = mock.patch.object(User.objects, "filter")
+        self.filter = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.filter.return_value.values.return_value.first.return_value = user_row()
+
+    def test_cached_user_has_auth_fields_only(self):
+        user = CachedJWTAuthentication().get_user(make_token())
+        self.assertEqual((user.pk, user.external_id, user.is_lawyer), (7, EXTERNAL_ID, True))
+        self.assertTrue(user.is_authenticated)
+        self.assertIn("email", user.get_deferred_fields())
+        self.assertEqual(user, User(id=7))
+
+    def test_cached_user_only_saves_named_fields(self):
+        user = CachedJWTAuthentication().get_user(make_token())
+        with mock.patch("django.db.models.Model.save") as save:
+            with self.assertRaises(ValueError):
+                user.save()
+            save.assert_not_called()
+            user.save(update_fields=["is_verified"])
+            save.assert_called_once_with(update_fields=["is_verified"])
+        self.assertFalse(User()._auth_fields_only)
+
+    def test_lookup_is_cached_until_forgotten(self):
+        auth = CachedJWTAuthentication()
+        auth.get_user(make_token())
+        auth.get_user(make_token())
+        self.assertEqual(self.filter.call_count, 1)
+        forget_user(7)
+        auth.get_user(make_token())
+        self.assertEqual(self.filter.call_count, 2)
+
+    def test_missing_and_inactive_users_are_rejected(self):
+        self.filter.return_value.values.return_value.first.return_value = None
+        with self.assertRaises(AuthenticationFailed):
+            CachedJWTAuthentication().get_user(make_token())
+        self.filter.return_value.values.return_value.first.return_value = user_row(is_active=False)
+        with self.assertRaises(AuthenticationFailed):
+            CachedJWTAuthentication().get_user(make_token())
+
+    @override_settings(JWT_STATELESS_AUTH=True)
+    def test_stateless_mode_trusts_claims(self):
+        token = make_token(external_id=str(EXTERNAL_ID), is_lawyer=False, is_verified=True)
+        user = CachedJWTAuthentication().get_user(token)
+        self.filter.assert_not_called()
+        self.assertEqual((user.pk, user.external_id, user.is_lawyer, user.is_verified), (7, EXTERNAL_ID, False, True))
+
+    @override_settings(JWT_STATELESS_AUTH=True)
+    def test_stateless_mode_looks_up_tokens_without_claims(self):
+        CachedJWTAuthentication().get_user(make_token())
+        self.filter.assert_called_once()
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class TestAuthRefreshToken(SimpleTestCase):
+
+    def setUp(self):
+        for patcher in (mock.patch.object(OutstandingToken.objects, "create"),
+                        mock.patch.object(BlacklistedToken.objects, "filter")):
+            self.addCleanup(patcher.stop)
+            self.filter = patcher.start()
+        self.filter.return_value.exists.return_value = False
+        self.token = AuthRefreshToken.for_user(User(id=7, external_id=EXTERNAL_ID, is_lawyer=True, is_verified=True))
+
+    def test_access_token_carries_claims(self):
+        access = self.token.access_token
+        self.assertEqual(access["user_id"], 7)
+        self.assertEqual(access["external_id"], str(EXTERNAL_ID))
+        self.assertTrue(access["is_lawyer"] and access["is_verified"])
+
+    def test_issued_tokens_are_checked_from_the_cache(self):
+        AuthRefreshToken(str(self.token))
+        self.filter.assert_not_called()
+        remember_blacklisted(self.token["jti"], True, time.time() + 60)
+        with self.assertRaises(TokenError):
+            AuthRefreshToken(str(self.token))
+        self.filter.assert_not_called()
+
+    def test_unknown_tokens_are_checked_once(self):
+        token = AuthRefreshToken()
+        AuthRefreshToken(str(token))
+        AuthRefreshToken(str(token))
+        self.filter.assert_called_once()
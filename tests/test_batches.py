@@ -0,0 +1,184 @@
+import json
+import tempfile
+from datetime import datetime
+from io import StringIO
+from unittest import mock
+
+from celery.exceptions import Retry
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+
+from legal_gennie import batches, tasks
+from legal_gennie.management.commands import reanalyze_cases
+from legal_gennie.models import AnalysisBatch, Case
+from legal_gennie.models.enums import AnalysisBatchStatusEnum
+from utils import llm
+
+JUDGMENTS = [{"tid": 1, "title": "Acme vs Beta", "headline": "breach of contract"}]
+
+
+def make_case(judgments=JUDGMENTS):
+    return Case(petition="The respondent committed breach of contract.", judgments=judgments)
+
+
+class BatchTestCase(SimpleTestCase):
+    """
+    Runs against the local backend with the ORM writes mocked out; ``self.saved``
+    records what each ``AnalysisBatch.save`` stored.
+    """
+
+    def setUp(self):
+        batch_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(batch_dir.cleanup)
+        settings = override_settings(LLM_BACKEND="local", LLM_LOCAL_LATENCY=0.0, LLM_LOCAL_BATCH_DIR=batch_dir.name,
+                                     RANKING_AUTHORITY_WEIGHT=0)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.cases = mock.MagicMock()
+        self.saved = []
+        self.bulk_update = mock.MagicMock()
+        patchers = (
+            mock.patch.dict(llm._instances, clear=True),
+            mock.patch.object(AnalysisBatch.objects, "create", side_effect=lambda **fields: AnalysisBatch(pk=1, **fields)),
+            mock.patch.object(AnalysisBatch, "cases", self.cases),
+            mock.patch.object(AnalysisBatch, "save", autospec=True,
+                              side_effect=lambda batch: self.saved.append((batch.status, batch.error))),
+            mock.patch.object(Case.objects, "bulk_update", self.bulk_update),
+        )
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+
+class TestSubmitAnalysisBatch(BatchTestCase):
+
+    def test_cases_with_judgments_are_submitted_as_one_batch(self):
+        cases = [make_case(), make_case(judgments=[]), make_case()]
+        batch = batches.submit_analysis_batch(cases)
+
+        self.assertEqual(batch.status, AnalysisBatchStatusEnum.SUBMITTED)
+        self.assertEqual(batch.backend, "local")
+        self.cases.set.assert_called_once_with([cases[0], cases[2]])
+        lines = (llm.get_backend().batch_dir / f"{batch.remote_id}.input.jsonl").read_text().splitlines()
+        self.assertEqual([json.loads(line)["custom_id"] for line in lines],
+                         [str(cases[0].external_id), str(cases[2].external_id)])
+
+    def test_batch_without_judgments_fails(self):
+        with mock.patch.object(llm.LocalBackend, "submit_batch") as submit:
+            batch = batches.submit_analysis_batch([make_case(judgments=[])])
+        submit.assert_not_called()
+        self.assertEqual(self.saved, [(AnalysisBatchStatusEnum.FAILED, "No cases with judgments to analyze")])
+        self.assertEqual(batch.remote_id, "")
+
+    def test_backend_failure_fails_the_batch(self):
+        with mock.patch.object(llm.LocalBackend, "submit_batch", side_effect=RuntimeError("quota exceeded")):
+            batch = batches.submit_analysis_batch([make_case()])
+        self.assertEqual(self.saved, [(AnalysisBatchStatusEnum.FAILED, "quota exceeded")])
+        self.assertEqual(batch.remote_id, "")
+
+
+class TestCollectAnalysisBatch(BatchTestCase):
+
+    def test_results_are_written_back_by_custom_id(self):
+        cases = [make_case(), make_case()]
+        batch = batches.submit_analysis_batch(cases[:1])
+        # The second case is in the batch but has no result.
+        self.cases.all.return_value = cases
+
+        self.assertTrue(batches.collect_analysis_batch(batch))
+        self.assertEqual((batch.status, batch.succeeded, batch.failed), (AnalysisBatchStatusEnum.COMPLETED, 1, 1))
+        self.assertIn("winning_percentage", cases[0].analysis)
+        self.assertEqual(cases[0].analyzed_at, batch.completed_at)
+        self.assertIsNone(cases[1].analysis)
+        self.bulk_update.assert_called_once_with([cases[0]], ["analysis", "analyzed_at", "updated_at"], batch_size=500)
+
+    def test_invalid_results_count_as_failed(self):
+        case = make_case()
+        batch = AnalysisBatch(pk=1, backend="local", remote_id="b1")
+        self.cases.all.return_value = [case]
+        with mock.patch.object(llm.LocalBackend, "get_batch",
+                               return_value=(llm.BATCH_COMPLETED, {str(case.external_id): "not json"})):
+            batches.collect_analysis_batch(batch)
+        self.assertEqual((batch.succeeded, batch.failed), (0, 1))
+
+    def test_running_batch_is_left_alone(self):
+        batch = AnalysisBatch(pk=1, backend="local", remote_id="b1")
+        with mock.patch.object(llm.LocalBackend, "get_batch", return_value=(llm.BATCH_IN_PROGRESS, {})):
+            self.assertFalse(batches.collect_analysis_batch(batch))
+        self.assertEqual(self.saved, [])
+
+    def test_failed_batch_is_marked_failed(self):
+        batch = AnalysisBatch(pk=1, backend="local", remote_id="b1")
+        with mock.patch.object(llm.LocalBackend, "get_batch", return_value=(llm.BATCH_FAILED, {})):
+            self.assertTrue(batches.collect_analysis_batch(batch))
+        self.assertEqual(self.saved, [(AnalysisBatchStatusEnum.FAILED, "Batch ended in state 'failed'")])
+        self.assertIsNotNone(batch.completed_at)
+
+
+@override_settings(LLM_BATCH_POLL_INTERVAL=60)
+class TestPollAnalysisBatch(SimpleTestCase):
+
+    def setUp(self):
+        patcher = mock.patch.object(AnalysisBatch.objects, "get", return_value=AnalysisBatch(pk=1))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_running_batch_is_polled_again(self):
+        with mock.patch.object(tasks, "collect_analysis_batch", return_value=False), \
+                mock.patch.object(tasks.poll_analysis_batch, "retry", side_effect=Retry) as retry:
+            with self.assertRaises(Retry):
+                tasks.poll_analysis_batch(1)
+        retry.assert_called_once_with(countdown=60)
+
+    def test_settled_batch_stops_polling(self):
+        with mock.patch.object(tasks, "collect_analysis_batch", return_value=True), \
+                mock.patch.object(tasks.poll_analysis_batch, "retry") as retry:
+            tasks.poll_analysis_batch(1)
+        retry.assert_not_called()
+
+
+class TestReanalyzeCasesCommand(SimpleTestCase):
+
+    def setUp(self):
+        self.cases = [make_case() for _ in range(3)]
+        self.queryset = mock.MagicMock()
+        self.queryset.order_by.return_value = self.queryset
+        self.queryset.filter.return_value = self.queryset
+        self.queryset.__getitem__.return_value = self.cases
+        self.queryset.__iter__.side_effect = lambda: iter(self.cases)
+        self.submitted = []
+
+        def submit(cases, token, backend):
+            self.submitted.append((cases, backend))
+            remote_id = f"b{len(self.submitted)}" if len(self.submitted) == 1 else ""
+            return AnalysisBatch(pk=len(self.submitted), backend=backend or "local", remote_id=remote_id)
+
+        patchers = (
+            mock.patch.object(Case.objects, "filter", return_value=self.queryset),
+            mock.patch.object(reanalyze_cases, "submit_analysis_batch", side_effect=submit),
+            mock.patch.object(reanalyze_cases.poll_analysis_batch, "delay"),
+            mock.patch.object(reanalyze_cases.time, "sleep"),
+        )
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_cases_are_submitted_in_batches_and_polled_by_celery(self):
+        call_command("reanalyze_cases", "--since", "2024-01-01", "--limit", "3", "--batch-size", "2",
+                     "--backend", "local", stdout=StringIO())
+        Case.objects.filter.assert_called_once_with(deleted=False)
+        self.queryset.filter.assert_called_once_with(created_at__gte=datetime(2024, 1, 1))
+        self.queryset.__getitem__.assert_called_once_with(slice(None, 3))
+        self.assertEqual(self.submitted, [(self.cases[:2], "local"), (self.cases[2:], "local")])
+        # Only batches that reached the backend are polled.
+        reanalyze_cases.poll_analysis_batch.delay.assert_called_once_with(1)
+
+    def test_wait_collects_in_process(self):
+        with mock.patch.object(reanalyze_cases, "collect_analysis_batch", side_effect=[False, True]) as collect:
+            call_command("reanalyze_cases", "--wait", stdout=StringIO())
+        self.queryset.filter.assert_not_called()
+        self.assertEqual(self.submitted, [(self.cases, None)])
+        self.assertEqual(collect.call_count, 2)
+        reanalyze_cases.time.sleep.assert_called_once()
+        reanalyze_cases.poll_analysis_batch.delay.assert_not_called()
@@ -0,0 +1,160 @@
+import asyncio
+import threading
+import time
+import unittest
+
+from django.core.cache import caches
+from django.test import SimpleTestCase, override_settings
+
+from utils import cache
+from utils.deadline import deadline
+
+LOCMEM_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "test-shared"},
+    "local": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "test-l1"},
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class TestCacheAside(SimpleTestCase):
+
+    def setUp(self):
+        caches["default"].clear()
+        caches["local"].clear()
+
+    def test_results_are_cached_per_key(self):
+        calls = []
+
+        @cache.cache_aside("test_square", timeout=60)
+        def square(x):
+            calls.append(x)
+            return x * x
+
+        self.assertEqual(square(3), 9)
+        self.assertEqual(square(3), 9)
+        self.assertEqual(square(4), 16)
+        self.assertEqual(calls, [3, 4])
+
+    def test_l1_is_filled_from_shared_cache(self):
+        key = cache.make_key("test", 1)
+        caches["default"].set(key, "shared")
+        self.assertEqual(cache.get(key), "shared")
+        self.assertEqual(caches["local"].get(key), "shared")
+
+    def test_errors_are_not_cached(self):
+        calls = []
+
+        @cache.cache_aside("test_fetch", timeout=60, cache_if=cache.is_not_error)
+        def fetch():
+            calls.append(1)
+            return {"error": "upstream down"}
+
+        fetch()
+        fetch()
+        self.assertEqual(len(calls), 2)
+
+    def test_concurrent_misses_compute_once(self):
+        calls = []
+
+        @cache.cache_aside("test_slow", timeout=60)
+        def slow():
+            calls.append(1)
+            time.sleep(0.2)
+            return "done"
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(slow())) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, ["done"] * 8)
+        self.assertEqual(len(calls), 1)
+
+    def test_waits_for_lock_held_by_another_process(self):
+        key = cache.make_key("test_remote", 1)
+        caches["default"].add(f"{key}:lock", 1)
+
+        def publish():
+            time.sleep(0.1)
+            caches["default"].set(key, "from-other-worker")
+
+        threading.Thread(target=publish).start()
+        value = cache.single_flight(key, lambda: "computed-here", timeout=60)
+        self.assertEqual(value, "from-other-worker")
+
+    def test_wait_for_held_lock_stops_at_the_deadline(self):
+        key = cache.make_key("test_hung", 1)
+        caches["default"].add(f"{key}:lock", 1)
+
+        async def acompute():
+            return "computed-here"
+
+        for run in (lambda: cache.single_flight(key, lambda: "computed-here", timeout=60),
+                    lambda: asyncio.run(cache.asingle_flight(key, acompute, timeout=60))):
+            started = time.monotonic()
+            with deadline(0.2):
+                value = run()
+            self.assertEqual(value, "computed-here")
+            self.assertLess(time.monotonic() - started, 1)
+            caches["default"].delete(key)
+            caches["local"].delete(key)
+
+    def test_coalesce_shares_uncached_results(self):
+        calls = []
+        started = threading.Event()
+
+        def compute():
+            calls.append(1)
+            started.set()
+            time.sleep(0.2)
+            return {"error": "shared, never cached"}
+
+        results = []
+        leader = threading.Thread(target=lambda: results.append(cache.coalesce("k", compute)))
+        leader.start()
+        started.wait()
+        followers = [threading.Thread(target=lambda: results.append(cache.coalesce("k", compute))) for _ in range(4)]
+        for thread in followers:
+            thread.start()
+        for thread in [leader, *followers]:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(results), 5)
+        # Nothing is remembered once the flight lands.
+        cache.coalesce("k", compute)
+        self.assertEqual(len(calls), 2)
+
+
+    def test_async_concurrent_misses_compute_once(self):
+        calls = []
+
+        @cache.cache_aside("test_async_slow", timeout=60)
+        async def slow(x):
+            calls.append(x)
+            await asyncio.sleep(0.1)
+            return x * 2
+
+        async def run():
+            return await asyncio.gather(*(slow(21) for _ in range(8)))
+
+        self.assertEqual(asyncio.run(run()), [42] * 8)
+        self.assertEqual(calls, [21])
+
+    def test_sync_and_async_share_entries(self):
+        @cache.cache_aside("test_shared", timeout=60)
+        def sync_value(x):
+            return "sync"
+
+        @cache.cache_aside("test_shared", timeout=60)
+        async def async_value(x):
+            return "async"
+
+        self.assertEqual(sync_value(1), "sync")
+        self.assertEqual(asyncio.run(async_value(1)), "sync")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+import asyncio
+from unittest import mock
+
+from django.core.cache import caches
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from legal_gennie import citations, pipeline
+from legal_gennie.citations import adjacency, extract_citations, pagerank
+from legal_gennie.models import Case, Precedent
+from utils.helpers import fetch_judgment_details
+from utils.ranking import rerank_judgments
+
+from .db import setUpModule, tearDownModule  # noqa: F401
+from .test_cache import LOCMEM_CACHES
+
+# 1 cites 2 and 3, 2 cites 3 and 4 cites 1 and 3. 3 isn't cached.
+DOCUMENTS = {
+    1: '<a href="/doc/2/">B</a> and <a href="/doc/3/">C</a>',
+    2: 'relied on <a href="/doc/3/">C</a>',
+    4: 'see /doc/3/ and /doc/1/',
+}
+
+
+class TestCitations(SimpleTestCase):
+
+    def test_extracts_linked_judgments(self):
+        text = 'relied on <a href="/doc/123/">X</a>, <a href="/doc/45/">Y</a> and again /doc/123/, see /doc/7/'
+        self.assertEqual(extract_citations(7, text), [45, 123])
+        self.assertEqual(extract_citations(7, ""), [])
+
+    def test_adjacency_drops_judgments_outside_the_graph(self):
+        tids, offsets, targets = adjacency([(30, [10]), (10, [20, 99]), (20, [])])
+        self.assertEqual(tids, [10, 20, 30])
+        self.assertEqual(list(offsets), [0, 1, 1, 2])
+        self.assertEqual(list(targets), [1, 0])
+
+    def test_most_cited_judgment_ranks_highest(self):
+        # 1, 2 and 3 cite 0; 3 also cites 1.
+        _, offsets, targets = adjacency([(0, []), (1, [0]), (2, [0]), (3, [0, 1])])
+        rank = pagerank(offsets, targets)
+        self.assertAlmostEqual(sum(rank), 1.0)
+        self.assertEqual(max(range(4), key=rank.__getitem__), 0)
+        self.assertGreater(rank[1], rank[2])
+        self.assertAlmostEqual(rank[2], rank[3])
+
+    def test_empty_graph(self):
+        self.assertEqual(pagerank(*adjacency([])[1:]), [])
+
+
+@override_settings(CACHES=LOCMEM_CACHES, RANKING_AUTHORITY_WEIGHT=0.5)
+class TestCitationGraph(TestCase):
+
+    def setUp(self):
+        caches["default"].clear()
+        caches["local"].clear()
+        patcher = mock.patch.dict(citations._local, {"table": None, "loaded_at": 0.0})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        for tid, doc in DOCUMENTS.items():
+            caches["default"].set(fetch_judgment_details.cache_key(tid, ""), {"tid": tid, "doc": doc})
+        Case.objects.create(petition="p", judgments=[{"tid": 1}, {"tid": 2}])
+        Precedent.objects.create(tid=4)
+
+    def test_cached_documents_are_parsed_into_the_graph(self):
+        self.assertEqual(citations.build_citation_graph(), {"parsed": 3, "judgments": 4, "citations": 5})
+        rows = {row.tid: row for row in Precedent.objects.all()}
+        self.assertEqual({tid: row.cites for tid, row in rows.items()}, {1: [2, 3], 2: [3], 3: [], 4: [1, 3]})
+        self.assertEqual({tid: row.cited_by for tid, row in rows.items()}, {1: 1, 2: 1, 3: 3, 4: 0})
+        self.assertIsNone(rows[3].parsed_at)
+        self.assertEqual((rows[3].authority, rows[4].authority), (1.0, 0.0))
+        self.assertGreater(rows[2].authority, rows[1].authority)
+        # Nothing new is cached, so the next run parses nothing.
+        self.assertEqual(citations.build_citation_graph()["parsed"], 0)
+
+    def test_scores_are_served_from_memory(self):
+        citations.build_citation_graph()
+        judgments = [{"tid": 3}, {"tid": 1}, {"tid": 4}, {"title": "no tid"}]
+        with self.assertNumQueries(0):
+            scores = citations.authority_scores(judgments)
+        self.assertEqual(set(scores), {1, 3})
+        self.assertEqual(scores[3], 1.0)
+        self.assertEqual(asyncio.run(citations.aauthority_scores(judgments)), scores)
+
+        # Another process, or this one after CITATION_AUTHORITY_REFRESH, reads the cache...
+        citations._local.update(table=None)
+        with self.assertNumQueries(0):
+            self.assertEqual(citations.authority_scores(judgments), scores)
+        # ...and the stored scores once the cache has lost them.
+        citations._local.update(table=None)
+        caches["default"].delete(citations.AUTHORITY_CACHE_KEY)
+        with self.assertNumQueries(1):
+            self.assertEqual(citations.authority_scores(judgments), scores)
+
+    @override_settings(RANKING_AUTHORITY_WEIGHT=0)
+    def test_no_lookup_without_weight(self):
+        citations.build_citation_graph()
+        with self.assertNumQueries(0), mock.patch.object(citations, "_load_authority") as load:
+            self.assertEqual(citations.authority_scores([{"tid": 3}]), {})
+        load.assert_not_called()
+
+    def test_case_pipeline_reranks_with_authority(self):
+        citations.build_citation_graph()
+        results = [{"tid": tid, "title": f"Judgment {tid}", "headline": "contract"} for tid in (4, 1, 3)]
+        with mock.patch.object(pipeline, "fetch_indian_kanoon_judgments", return_value=results), \
+                mock.patch.object(pipeline, "fetch_judgment_details", side_effect=lambda tid, token: {"doc": ""}), \
+                mock.patch.object(pipeline, "analyze_petition_with_openai", return_value={"winning_percentage": 50}), \
+                mock.patch.object(pipeline, "rerank_judgments", wraps=rerank_judgments) as rerank:
+            status_code, response = pipeline.build_case_response("breach of contract", "token")
+
+        self.assertEqual(status_code, 201)
+        (_, _, authority, weight), _ = rerank.call_args
+        self.assertEqual((set(authority), weight), ({1, 3}, 0.5))
+        self.assertEqual([judgment["tid"] for judgment in response["judgments"]], [3, 1, 4])
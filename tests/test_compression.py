@@ -0,0 +1,91 @@
+import asyncio
+import gzip
+from unittest import mock
+
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from utils import compression
+from utils.middleware import CompressionMiddleware
+
+BODY = b'{"judgments": [' + b'{"title": "A vs B", "headline": "tenancy eviction"},' * 200 + b'{}]}'
+
+
+def decompress(encoding, data):
+    if encoding == "br":
+        return compression.brotli.decompress(data)
+    if encoding == "zstd":
+        return compression.zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    return gzip.decompress(data)
+
+
+class TestNegotiate(SimpleTestCase):
+
+    def test_server_preference_breaks_ties(self):
+        expected = "br" if "br" in compression.COMPRESSORS else "gzip"
+        self.assertEqual(compression.negotiate("gzip, deflate, br, zstd"), expected)
+
+    def test_client_qvalues_win(self):
+        self.assertEqual(compression.negotiate("br;q=0.5, gzip;q=0.9"), "gzip")
+        self.assertEqual(compression.negotiate("*;q=0.2, gzip;q=0"), compression.negotiate("*"))
+        self.assertNotEqual(compression.negotiate("*;q=0.2, gzip;q=0"), "gzip")
+
+    def test_nothing_acceptable(self):
+        self.assertIsNone(compression.negotiate(""))
+        self.assertIsNone(compression.negotiate("identity, deflate"))
+        self.assertIsNone(compression.negotiate("gzip;q=0, *;q=0"))
+
+    def test_unavailable_encodings_are_skipped(self):
+        with mock.patch.dict(compression.COMPRESSORS, {"gzip": compression.GzipCompressor}, clear=True):
+            self.assertEqual(compression.negotiate("br, zstd, gzip;q=0.1"), "gzip")
+
+
+@override_settings(COMPRESSION_MIN_SIZE=200)
+class TestCompressionMiddleware(SimpleTestCase):
+
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def run_middleware(self, response, accept="gzip"):
+        request = self.factory.get("/api/cases", HTTP_ACCEPT_ENCODING=accept)
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def test_each_encoding_round_trips(self):
+        for encoding in compression.COMPRESSORS:
+            response = HttpResponse(BODY, content_type="application/json")
+            response["ETag"] = '"abc"'
+            response = self.run_middleware(response, accept=encoding)
+            self.assertEqual(response["Content-Encoding"], encoding)
+            self.assertEqual(decompress(encoding, response.content), BODY)
+            self.assertEqual(response["Content-Length"], str(len(response.content)))
+            self.assertEqual(response["Vary"], "Accept-Encoding")
+            self.assertEqual(response["ETag"], 'W/"abc"')
+
+    def test_skips_small_excluded_and_encoded_responses(self):
+        small = self.run_middleware(HttpResponse(b"{}", content_type="application/json"))
+        html = self.run_middleware(HttpResponse(BODY, content_type="text/html"))
+        encoded = HttpResponse(BODY, content_type="application/json")
+        encoded["Content-Encoding"] = "identity"
+        encoded = self.run_middleware(encoded)
+        for response in (small, html):
+            self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertEqual(encoded.content, BODY)
+
+    def test_streaming_chunks_are_flushed(self):
+        chunks = [BODY[:500], BODY[500:]]
+        response = self.run_middleware(StreamingHttpResponse(iter(chunks), content_type="text/event-stream"))
+        parts = list(response.streaming_content)
+        self.assertGreater(len(parts), 2)
+        self.assertFalse(response.has_header("Content-Length"))
+        self.assertEqual(gzip.decompress(b"".join(parts)), BODY)
+
+    def test_async_streaming(self):
+        async def chunks():
+            yield BODY[:500]
+            yield BODY[500:]
+
+        async def consume(response):
+            return b"".join([part async for part in response.streaming_content])
+
+        response = self.run_middleware(StreamingHttpResponse(chunks(), content_type="application/json"))
+        self.assertEqual(gzip.decompress(asyncio.run(consume(response))), BODY)
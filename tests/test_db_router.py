@@ -0,0 +1,53 @@
+import unittest
+
+from django.test import RequestFactory, override_settings
+
+from legal_gennie.models import LawyerMetadata, User
+from utils.db_router import PrimaryReplicaRouter, use_primary
+from utils.middleware import PrimaryPinningMiddleware
+
+
+class TestPrimaryReplicaRouter(unittest.TestCase):
+
+    def setUp(self):
+        self.router = PrimaryReplicaRouter()
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_reads_use_primary_without_replicas(self):
+        self.assertEqual(self.router.db_for_read(LawyerMetadata), "default")
+
+    @override_settings(DATABASE_REPLICAS=["replica_1", "replica_2"])
+    def test_reads_go_to_replicas_and_writes_to_primary(self):
+        reads = {self.router.db_for_read(LawyerMetadata) for _ in range(50)}
+        self.assertEqual(reads, {"replica_1", "replica_2"})
+        self.assertEqual(self.router.db_for_write(LawyerMetadata), "default")
+
+    @override_settings(DATABASE_REPLICAS=["replica_1"])
+    def test_use_primary_pins_reads(self):
+        with use_primary():
+            self.assertEqual(self.router.db_for_read(User), "default")
+        self.assertEqual(self.router.db_for_read(User), "replica_1")
+
+    @override_settings(DATABASE_REPLICAS=["replica_1"])
+    def test_related_reads_follow_instance(self):
+        user = User(email="a@example.com")
+        user._state.db = "default"
+        self.assertEqual(self.router.db_for_read(LawyerMetadata, instance=user), "default")
+
+    def test_migrations_only_on_primary(self):
+        self.assertTrue(self.router.allow_migrate("default", "legal_gennie"))
+        self.assertFalse(self.router.allow_migrate("replica_1", "legal_gennie"))
+
+    @override_settings(DATABASE_REPLICAS=["replica_1"])
+    def test_middleware_pins_unsafe_requests(self):
+        seen = []
+        middleware = PrimaryPinningMiddleware(lambda request: seen.append(self.router.db_for_read(User)))
+        factory = RequestFactory()
+
+        middleware(factory.get("/api/lawyers"))
+        middleware(factory.post("/api/cases"))
+        self.assertEqual(seen, ["replica_1", "default"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,39 @@
+import time
+import unittest
+
+from utils.deadline import deadline, remaining, sleep_within_deadline, timeout_for
+from utils.fanout import fan_out
+
+
+class TestDeadline(unittest.TestCase):
+
+    def test_outside_a_deadline_defaults_apply(self):
+        self.assertIsNone(remaining())
+        self.assertEqual(timeout_for(10), 10)
+
+    def test_nested_deadline_is_capped_by_the_enclosing_one(self):
+        with deadline(1):
+            with deadline(60):
+                self.assertLessEqual(remaining(), 1)
+            with deadline(0.5):
+                self.assertLessEqual(remaining(), 0.5)
+        self.assertIsNone(remaining())
+
+    def test_timeout_for_is_capped_but_never_zero(self):
+        with deadline(2):
+            self.assertLessEqual(timeout_for(10), 2)
+            self.assertEqual(timeout_for(1), 1)
+        with deadline(0):
+            self.assertEqual(timeout_for(10, minimum=0.1), 0.1)
+
+    def test_sleep_refuses_to_overrun_the_deadline(self):
+        with deadline(0.2):
+            start = time.monotonic()
+            self.assertFalse(sleep_within_deadline(1))
+            self.assertLess(time.monotonic() - start, 0.1)
+            self.assertTrue(sleep_within_deadline(0.01))
+
+    def test_fan_out_workers_see_the_callers_deadline(self):
+        with deadline(5):
+            results = fan_out(lambda _: remaining(), [1, 2, 3])
+        self.assertTrue(all(r.ok and 0 < r.value <= 5 for r in results))
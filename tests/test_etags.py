@@ -0,0 +1,75 @@
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from legal_gennie.models import Case, LawyerMetadata, User
+
+from .db import setUpModule, tearDownModule  # noqa: F401
+from .test_cache import LOCMEM_CACHES
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ConditionalGetTestCase(TestCase):
+
+    def setUp(self):
+        caches["default"].clear()
+        caches["local"].clear()
+        self.user = User.objects.create_user("ana@firm.com", "Ana", is_lawyer=True, is_verified=True)
+        LawyerMetadata.objects.create(user=self.user, consultation_fee=100, call_fee=50)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def assertRevalidates(self, url):
+        """
+        Fetches ``url`` and checks that its ETag gets a 304. Returns the ETag.
+        """
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        return etag
+
+    def assertChangedFrom(self, url, etag):
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+
+class TestLawyerETags(ConditionalGetTestCase):
+
+    def update_profile(self):
+        # The directory version is bumped once the update commits.
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(f"/api/lawyers/{self.user.external_id}", {"call_fee": "75.00"},
+                                         format="json")
+        self.assertEqual(response.status_code, 200)
+
+    def test_profile_update_changes_the_lawyer_etag(self):
+        url = f"/api/lawyers/{self.user.external_id}"
+        etag = self.assertRevalidates(url)
+        self.update_profile()
+        self.assertChangedFrom(url, etag)
+        self.assertEqual(self.client.get(url).json()["call_fee"], "75.00")
+
+    def test_profile_update_changes_the_directory_etag(self):
+        etag = self.assertRevalidates("/api/lawyers")
+        self.update_profile()
+        self.assertChangedFrom("/api/lawyers", etag)
+
+    def test_etag_varies_on_the_query(self):
+        self.assertNotEqual(self.assertRevalidates("/api/lawyers"), self.assertRevalidates("/api/lawyers?limit=1"))
+
+
+class TestCaseETags(ConditionalGetTestCase):
+
+    def test_reanalysis_changes_the_case_etag(self):
+        case = Case.objects.create(user=self.user, petition="A petition", judgments=[])
+        url = f"/api/cases/{case.external_id}"
+        etag = self.assertRevalidates(url)
+        case.analysis = {"winning_percentage": 60}
+        case.save()
+        self.assertChangedFrom(url, etag)
+
+    def test_other_users_cases_are_not_found(self):
+        case = Case.objects.create(user=User.objects.create_user("ben@firm.com", "Ben"), petition="p")
+        self.assertEqual(self.client.get(f"/api/cases/{case.external_id}").status_code, 404)
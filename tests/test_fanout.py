@@ -0,0 +1,78 @@
+import asyncio
+import threading
+import time
+import unittest
+
+from utils.fanout import FetchError, afan_out, fan_out
+
+
+class TestFanOut(unittest.TestCase):
+
+    def test_results_keep_input_order_including_duplicates(self):
+        def slow_double(x):
+            time.sleep(0.01 * (5 - x))
+            return x * 2
+
+        results = fan_out(slow_double, [3, 1, 3, 4, 1], max_workers=5)
+        self.assertEqual([r.value for r in results], [6, 2, 6, 8, 2])
+        self.assertTrue(all(r.ok for r in results))
+
+    def test_exceptions_become_structured_errors(self):
+        def maybe_fail(x):
+            if x == 2:
+                raise ValueError("bad item")
+            return x
+
+        results = fan_out(maybe_fail, [1, 2, 3])
+        self.assertEqual([r.ok for r in results], [True, False, True])
+        self.assertEqual(results[1].error.kind, FetchError.EXCEPTION)
+        self.assertEqual(results[1].error.message, "bad item")
+
+    def test_timeout_returns_partial_results(self):
+        release = threading.Event()
+
+        def work(x):
+            if x == "slow":
+                release.wait(2)
+            return x
+
+        started = time.monotonic()
+        results = fan_out(work, ["fast", "slow", "fast"], max_workers=3, timeout=0.2)
+        release.set()
+
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertEqual(results[0].value, "fast")
+        self.assertEqual(results[2].value, "fast")
+        self.assertEqual(results[1].error.kind, FetchError.TIMEOUT)
+
+    def test_empty_input(self):
+        self.assertEqual(fan_out(lambda x: x, []), [])
+
+
+class TestAsyncFanOut(unittest.TestCase):
+
+    def test_results_keep_input_order_and_capture_errors(self):
+        async def work(x):
+            await asyncio.sleep(0.01 * (5 - x))
+            if x == 2:
+                raise ValueError("bad item")
+            return x * 2
+
+        results = asyncio.run(afan_out(work, [3, 2, 4, 1]))
+        self.assertEqual([r.value for r in results], [6, None, 8, 2])
+        self.assertEqual(results[1].error.kind, FetchError.EXCEPTION)
+
+    def test_timeout_cancels_stragglers(self):
+        async def work(x):
+            await asyncio.sleep(2 if x == "slow" else 0)
+            return x
+
+        started = time.monotonic()
+        results = asyncio.run(afan_out(work, ["fast", "slow"], timeout=0.2))
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertEqual(results[0].value, "fast")
+        self.assertEqual(results[1].error.kind, FetchError.TIMEOUT)
+
+
+if __name__ == "__main__":
+    unittest.main()
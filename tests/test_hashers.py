@@ -0,0 +1,45 @@
+from unittest import mock
+
+from django.contrib.auth.hashers import identify_hasher, is_password_usable
+from django.contrib.auth.hashers import make_password as django_make_password
+from django.test import SimpleTestCase, override_settings
+
+from utils import hashers
+
+TUNED = ["utils.hashers.TunedArgon2PasswordHasher", "utils.hashers.TunedScryptPasswordHasher"]
+
+
+@override_settings(PASSWORD_HASHERS=TUNED, PASSWORD_ARGON2_MEMORY_COST=1024, PASSWORD_HASHING_WORKERS=0)
+class TestHashers(SimpleTestCase):
+
+    def test_tuned_parameters(self):
+        encoded = hashers.make_password("secret")
+        self.assertIn("m=1024,t=2,p=1", encoded)
+        self.assertTrue(hashers.check_password("secret", encoded))
+        self.assertFalse(hashers.check_password("wrong", encoded))
+
+    def test_outdated_hash_is_upgraded_on_login(self):
+        encoded = django_make_password("secret", hasher="scrypt")
+        setter = mock.Mock()
+        self.assertTrue(hashers.check_password("secret", encoded, setter))
+        setter.assert_called_once_with("secret")
+        self.assertFalse(hashers.check_password("wrong", encoded, setter))
+        setter.assert_called_once()
+
+    def test_unusable_passwords(self):
+        self.assertFalse(hashers.check_password("secret", hashers.make_password(None)))
+        self.assertFalse(hashers.check_password(None, hashers.make_password("secret")))
+
+    def test_broken_pool_falls_back_to_inline(self):
+        pool = mock.Mock()
+        pool.submit.side_effect = hashers.BrokenProcessPool
+        with override_settings(PASSWORD_HASHING_WORKERS=1), mock.patch.object(hashers, "_pool", pool):
+            encoded = hashers.make_password("secret")
+            self.assertIsNone(hashers._pool)
+        self.assertEqual(identify_hasher(encoded).algorithm, "argon2")
+
+    def test_make_passwords_keeps_order(self):
+        encoded = hashers.make_passwords(["first", None, "second"])
+        self.assertTrue(hashers.check_password("first", encoded[0]))
+        self.assertFalse(is_password_usable(encoded[1]))
+        self.assertTrue(hashers.check_password("second", encoded[2]))
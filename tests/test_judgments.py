@@ -0,0 +1,55 @@
+import json
+import pickle
+
+from django.test import SimpleTestCase
+
+from utils.judgments import Judgment
+from utils.renderers import ORJSONRenderer
+
+DOC = {
+    "tid": 42, "title": "A vs B", "doctype": 1000, "publishdate": "2020-01-01",
+    "docsource": "Supreme Court of India", "citation": "", "headline": "breach of contract",
+}
+
+
+def from_json(doc):
+    # Decoded separately, like two search responses, so no strings are shared.
+    return Judgment.from_search(json.loads(json.dumps(doc)))
+
+
+class TestJudgment(SimpleTestCase):
+
+    def test_reads_like_the_search_result_dict(self):
+        judgment = Judgment.from_search(DOC)
+        self.assertEqual(judgment.to_dict(), DOC)
+        self.assertEqual(list(judgment.to_dict()), list(DOC))
+        self.assertEqual(dict(judgment), DOC)
+        self.assertEqual(judgment, DOC)
+        self.assertEqual((judgment["tid"], judgment.get("headline", ""), judgment.get("full_text")),
+                         (42, "breach of contract", None))
+        self.assertIn("tid", judgment)
+        with self.assertRaises(KeyError):
+            judgment["full_text"]
+
+    def test_missing_fields_default_like_the_dicts_did(self):
+        self.assertEqual(Judgment.from_search({"tid": 1}).to_dict(), {
+            "tid": 1, "title": "", "doctype": None, "publishdate": "", "docsource": "", "citation": "", "headline": "",
+        })
+
+    def test_shared_strings_are_interned(self):
+        first, second = from_json(DOC), from_json(DOC)
+        self.assertIs(first.docsource, second.docsource)
+        self.assertIs(first.publishdate, second.publishdate)
+        self.assertIs(first.title, second.title)
+        self.assertIsNot(first.headline, second.headline)
+
+    def test_pickles_compactly_and_interns_on_load(self):
+        judgments = [from_json(DOC), from_json({**DOC, "tid": 43})]
+        loaded = pickle.loads(pickle.dumps(judgments))
+        self.assertEqual(loaded, judgments)
+        self.assertIs(loaded[0].docsource, judgments[0].docsource)
+        self.assertLess(len(pickle.dumps(judgments)), len(pickle.dumps([judgment.to_dict() for judgment in judgments])))
+
+    def test_renders_as_the_dict(self):
+        self.assertEqual(json.loads(ORJSONRenderer().render({"judgments": [Judgment.from_search(DOC)]})),
+                         {"judgments": [DOC]})
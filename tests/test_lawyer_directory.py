@@ -0,0 +1,63 @@
+import unittest
+from legal_gennie.directory import DirectorySnapshot
+
+
+def make_row(id, name, lawyer_type, fee):
+    return {
+        "id": id,
+        "name": name,
+        "lawyer_type": lawyer_type,
+        "consultation_fee": fee,
+        "call_fee": fee,
+    }
+
+
+class TestDirectorySnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.snapshot = DirectorySnapshot(
+            1,
+            [
+                make_row(1, "Ravi Kumar", 1, "300.00"),
+                make_row(2, "Rita Shah", 2, "1200.00"),
+                make_row(3, "Mohan Das", 10, None),
+                make_row(4, "Kumari Devi", 1, "500.00"),
+            ],
+            fee_buckets=[0, 500, 1000],
+            prefix_length=2,
+        )
+
+    def test_type_counts(self):
+        facets = self.snapshot.facets()
+        counts = {item["value"]: item["count"] for item in facets["lawyer_types"]}
+        self.assertEqual(counts[1], 2)
+        self.assertEqual(counts[2], 1)
+        self.assertEqual(counts[3], 0)
+        self.assertEqual(facets["count"], 4)
+
+    def test_fee_histogram_skips_missing_fees(self):
+        histogram = self.snapshot.facets()["fee_histograms"]["consultation_fee"]
+        self.assertEqual([bucket["count"] for bucket in histogram], [1, 1, 1])
+        self.assertIsNone(histogram[-1]["max"])
+
+    def test_filter_matches_lawyer_filter(self):
+        self.assertEqual([r["id"] for r in self.snapshot.filter(name="KUM")], [1, 4])
+        # lawyer_type is an icontains filter, so "1" also matches 10
+        self.assertEqual([r["id"] for r in self.snapshot.filter(lawyer_type="1")], [1, 3, 4])
+
+    def test_ordering(self):
+        rows = self.snapshot.filter(order_by="-consultation_fee")
+        self.assertEqual([r["id"] for r in rows], [2, 4, 1, 3])
+        rows = self.snapshot.filter(order_by="consultation_fee")
+        self.assertEqual([r["id"] for r in rows], [3, 1, 4, 2])
+        self.assertIsNone(self.snapshot.filter(order_by="name"))
+
+    def test_prefix_search(self):
+        self.assertEqual([r["id"] for r in self.snapshot.search_prefix("ku", 2)], [1, 4])
+        self.assertEqual([r["id"] for r in self.snapshot.search_prefix("Kuma", 2)], [1, 4])
+        self.assertEqual([r["id"] for r in self.snapshot.search_prefix("kumari", 2)], [4])
+        self.assertEqual(self.snapshot.search_prefix("", 2), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
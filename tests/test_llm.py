@@ -0,0 +1,146 @@
+import asyncio
+import json
+import threading
+from types import SimpleNamespace
+from unittest import mock
+
+import httpx
+from django.test import SimpleTestCase, override_settings
+
+from utils import llm
+from utils.deadline import deadline
+
+MESSAGES = [{"role": "user", "content": "Analyze this petition"}]
+
+
+def completion(content="{}"):
+    return {
+        "id": "chatcmpl-1", "object": "chat.completion", "created": 0, "model": "gpt-4o-mini",
+        "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+        "usage": {"prompt_tokens": 10, "completion_tokens": 2, "total_tokens": 12},
+    }
+
+
+@override_settings(LLM_BACKEND="local", LLM_LOCAL_LATENCY=0.0, LLM_MAX_CONCURRENCY=2, LLM_MAX_RETRIES=1)
+class TestGetBackend(SimpleTestCase):
+
+    def setUp(self):
+        patcher = mock.patch.dict(llm._instances, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_backend_is_chosen_by_setting_and_shared(self):
+        backend = llm.get_backend()
+        self.assertIsInstance(backend, llm.LocalBackend)
+        self.assertEqual(backend.max_concurrency, 2)
+        self.assertIs(llm.get_backend("local"), backend)
+
+    def test_own_api_keys_get_their_own_instance(self):
+        self.assertIsNot(llm.get_backend(api_key="sk-caller"), llm.get_backend())
+
+    def test_unknown_backend_is_rejected(self):
+        with self.assertRaises(ValueError):
+            llm.get_backend("nonexistent")
+
+    @override_settings(LLM_TIMEOUT=7.0)
+    def test_openai_client_takes_timeout_and_retries_from_settings(self):
+        backend = llm.get_backend("openai", api_key="sk-test")
+        self.assertIsInstance(backend, llm.OpenAIBackend)
+        self.assertEqual((backend.client.timeout, backend.client.max_retries), (7.0, 1))
+
+
+class TestLocalBackend(SimpleTestCase):
+
+    def test_identical_prompts_give_identical_analyses(self):
+        backend = llm.LocalBackend("local", timeout=5, max_concurrency=1)
+        first = backend.complete(MESSAGES)
+        self.assertEqual(first, backend.complete(MESSAGES))
+        self.assertEqual(first, asyncio.run(backend.acomplete(MESSAGES)))
+        self.assertNotEqual(first, backend.complete(MESSAGES + MESSAGES))
+        self.assertIn("winning_percentage", json.loads(first))
+
+    def test_latency_past_the_deadline_times_out(self):
+        backend = llm.LocalBackend("local", timeout=5, max_concurrency=1, latency=1.0)
+        with deadline(0.05):
+            with self.assertRaises(TimeoutError):
+                backend.complete(MESSAGES)
+        with deadline(0.05):
+            with self.assertRaises(TimeoutError):
+                asyncio.run(backend.acomplete(MESSAGES))
+
+    def test_concurrency_limit(self):
+        backend = llm.LocalBackend("local", timeout=5, max_concurrency=1, latency=0.3)
+        holder = threading.Thread(target=backend.complete, args=(MESSAGES,))
+        holder.start()
+        try:
+            while backend._slots._value:
+                pass
+            with deadline(0.05), self.assertRaises(llm.BackendBusy):
+                backend.complete(MESSAGES)
+        finally:
+            holder.join()
+
+    def test_async_concurrency_limit(self):
+        backend = llm.LocalBackend("local", timeout=5, max_concurrency=1, latency=0.3)
+
+        async def run():
+            holder = asyncio.create_task(backend.acomplete(MESSAGES))
+            await asyncio.sleep(0)
+            with deadline(0.05), self.assertRaises(llm.BackendBusy):
+                await backend.acomplete(MESSAGES)
+            return await holder
+
+        self.assertEqual(asyncio.run(run()), backend.complete(MESSAGES))
+
+
+class TestOpenAIBackend(SimpleTestCase):
+
+    def backend(self, handler, max_retries=2):
+        class Client(httpx.Client):
+            def __init__(self, **kwargs):
+                super().__init__(transport=httpx.MockTransport(handler), **kwargs)
+
+        with mock.patch("httpx.Client", Client):
+            return llm.OpenAIBackend("gpt-4o-mini", timeout=5, max_concurrency=1, api_key="sk-test",
+                                     max_retries=max_retries)
+
+    def test_server_errors_are_retried(self):
+        responses = iter([
+            httpx.Response(500, headers={"retry-after-ms": "1"}, json={"error": {"message": "overloaded"}}),
+            httpx.Response(200, json=completion('{"winning_percentage": 60}')),
+        ])
+        requests = []
+
+        def handler(request):
+            requests.append(json.loads(request.content))
+            return next(responses)
+
+        self.assertEqual(self.backend(handler).complete(MESSAGES), '{"winning_percentage": 60}')
+        self.assertEqual(len(requests), 2)
+        self.assertEqual(requests[0]["response_format"], {"type": "json_object"})
+
+    def test_calls_are_capped_by_the_deadline(self):
+        timeouts = []
+
+        def handler(request):
+            timeouts.append(request.extensions["timeout"]["read"])
+            return httpx.Response(200, json=completion())
+
+        backend = self.backend(handler)
+        backend.complete(MESSAGES)
+        with deadline(0.5):
+            backend.complete(MESSAGES)
+        self.assertEqual(timeouts[0], 5)
+        self.assertLessEqual(timeouts[1], 0.5)
+
+
+class TestPromptCacheStats(SimpleTestCase):
+
+    def test_cached_tokens_are_read_from_models_and_dicts(self):
+        stats = llm.PromptCacheStats()
+        stats.record(SimpleNamespace(prompt_tokens=100, prompt_tokens_details=SimpleNamespace(cached_tokens=60)))
+        stats.record(SimpleNamespace(prompt_tokens=100, prompt_tokens_details={"cached_tokens": 20}))
+        stats.record(SimpleNamespace(prompt_tokens=100, prompt_tokens_details=None))
+        stats.record(None)
+        self.assertEqual((stats.prompt_tokens, stats.cached_tokens), (300, 80))
+        self.assertAlmostEqual(stats.hit_ratio, 80 / 300)
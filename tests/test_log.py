@@ -0,0 +1,93 @@
+import json
+import logging
+from unittest import mock
+
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase
+
+from legal_gennie import celery
+from utils import log
+from utils.fanout import fan_out
+from utils.middleware import RequestIDMiddleware, RequestLogMiddleware
+
+
+def record(message="hello", **extra):
+    record = logging.LogRecord("test", logging.INFO, __file__, 1, message, (), None)
+    record.__dict__.update(extra)
+    log.RequestIDFilter().filter(record)
+    return record
+
+
+class TestStructuredLogging(SimpleTestCase):
+
+    def test_json_lines_carry_request_id_and_extra_fields(self):
+        with log.bind_request_id("req-1"):
+            entry = json.loads(log.JSONFormatter().format(record(tid=42, latency_ms=1.5)))
+        self.assertEqual(entry["message"], "hello")
+        self.assertEqual((entry["request_id"], entry["tid"], entry["latency_ms"]), ("req-1", 42, 1.5))
+        self.assertNotIn("args", entry)
+
+    def test_request_ids_propagate_into_fan_out_threads(self):
+        with log.bind_request_id("req-2"):
+            results = fan_out(lambda _: log.get_request_id(), [1, 2])
+        self.assertEqual([result.value for result in results], ["req-2", "req-2"])
+        self.assertIsNone(log.get_request_id())
+
+    def test_external_calls_log_latency_and_fields(self):
+        with self.assertLogs("utils.external", "INFO") as logs:
+            with log.external_call("kanoon.doc", tid=7) as call:
+                call["bytes"] = 128
+        fields = logs.records[0].__dict__
+        self.assertEqual((fields["call"], fields["tid"], fields["bytes"]), ("kanoon.doc", 7, 128))
+        self.assertGreaterEqual(fields["latency_ms"], 0)
+
+    def test_failed_external_calls_log_the_error(self):
+        with self.assertLogs("utils.external", "INFO") as logs, self.assertRaises(TimeoutError):
+            with log.external_call("kanoon.search"):
+                raise TimeoutError
+        self.assertEqual(logs.records[0].error, "TimeoutError")
+
+
+class TestRequestIDMiddleware(SimpleTestCase):
+
+    def setUp(self):
+        self.seen = []
+        self.middleware = RequestIDMiddleware(lambda request: self.seen.append(log.get_request_id()) or HttpResponse())
+
+    def test_sane_incoming_ids_are_kept(self):
+        response = self.middleware(RequestFactory().get("/", headers={"X-Request-ID": "abc-123"}))
+        self.assertEqual(response["X-Request-ID"], "abc-123")
+        self.assertEqual(self.seen, ["abc-123"])
+        self.assertIsNone(log.get_request_id())
+
+    def test_other_ids_are_replaced(self):
+        response = self.middleware(RequestFactory().get("/", headers={"X-Request-ID": "a b\nc"}))
+        self.assertRegex(response["X-Request-ID"], r"^[0-9a-f]{32}$")
+        self.assertEqual(self.seen, [response["X-Request-ID"]])
+
+
+class TestRequestLogMiddleware(SimpleTestCase):
+
+    def test_requests_are_logged_with_sizes_and_memory(self):
+        middleware = RequestLogMiddleware(lambda request: HttpResponse(b"x" * 10, status=201))
+        with self.assertLogs("utils.requests", "INFO") as logs:
+            middleware(RequestFactory().post("/api/cases", b"{}", content_type="application/json"))
+        fields = logs.records[0].__dict__
+        self.assertEqual(logs.records[0].getMessage().split(" in ")[0], "POST /api/cases 201")
+        self.assertEqual((fields["request_bytes"], fields["response_bytes"]), (2, 10))
+        self.assertGreater(fields["rss_mb"], 0)
+        self.assertIn("rss_delta_mb", fields)
+
+
+class TestCeleryPropagation(SimpleTestCase):
+
+    def test_tasks_run_with_the_publishers_request_id(self):
+        headers = {}
+        with log.bind_request_id("req-3"):
+            celery.propagate_request_id(headers=headers)
+        task = mock.Mock()
+        task.request.get.side_effect = headers.get
+        celery.bind_request_id(task=task)
+        self.assertEqual(log.get_request_id(), "req-3")
+        celery.unbind_request_id(task=task)
+        self.assertIsNone(log.get_request_id())
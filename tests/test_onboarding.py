@@ -0,0 +1,113 @@
+from unittest import mock
+
+from django.contrib import admin
+from django.core.files.uploadedfile import SimpleUploadedFile
+
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+
+from legal_gennie import onboarding
+from legal_gennie.models import LawyerMetadata, User
+from utils.authentication import AuthRefreshToken
+
+from .test_authentication import LOCMEM_CACHES
+
+CSV = """email,name,password,is_lawyer
+ana@Firm.COM,Ana,secret,yes
+ana@firm.com,Ana again,,
+not-an-email,Nobody,,
+ben@firm.com,Ben,,
+cy@firm.com,Cy,,1
+"""
+
+
+@override_settings(PASSWORD_HASHING_WORKERS=0, USER_IMPORT_BATCH_SIZE=2)
+class TestImportUsers(SimpleTestCase):
+
+    def setUp(self):
+        patchers = {
+            "existing": mock.patch.object(User.objects, "annotate"),
+            "bulk_create": mock.patch.object(User.objects, "bulk_create"),
+            "lawyers": mock.patch.object(LawyerMetadata.objects, "bulk_create"),
+            "hash": mock.patch.object(onboarding.hashers, "make_passwords", side_effect=lambda passwords, workers, pool: [
+                "hashed" if password else "!" for password in passwords
+            ]),
+            "invalidate": mock.patch.object(onboarding.directory, "invalidate"),
+            "atomic": mock.patch.object(onboarding.transaction, "atomic"),
+        }
+        self.mocks = {}
+        for name, patcher in patchers.items():
+            self.mocks[name] = patcher.start()
+            self.addCleanup(patcher.stop)
+        self.existing = self.mocks["existing"].return_value.filter
+        self.existing.return_value.values_list.return_value = ["ben@firm.com"]
+
+    def test_rows_are_validated_deduplicated_and_batched(self):
+        users, skipped = onboarding.import_users(onboarding.read_users_csv(CSV.splitlines()))
+        self.assertEqual([user.email for user in users], ["ana@firm.com", "cy@firm.com"])
+        self.assertEqual(skipped, ["ana@firm.com", "not-an-email", "ben@firm.com"])
+        # One existence query and one insert per batch of two.
+        self.assertEqual(self.existing.call_count, 2)
+        self.existing.assert_any_call(email_lower__in=["ana@firm.com", "ben@firm.com"])
+        self.assertEqual(self.mocks["bulk_create"].call_count, 2)
+        self.assertEqual([user.password for user in users], ["hashed", "!"])
+        self.assertTrue(all(user.is_lawyer for user in users))
+
+    def test_batches_share_one_hashing_pool(self):
+        with mock.patch.object(onboarding.hashers, "ProcessPoolExecutor") as executor:
+            onboarding.import_users(onboarding.read_users_csv(CSV.splitlines()), hash_workers=2)
+        executor.assert_called_once()
+        pool = executor.return_value.__enter__.return_value
+        self.assertEqual([call.args[2] for call in self.mocks["hash"].call_args_list], [pool, pool])
+        executor.return_value.__exit__.assert_called_once()
+
+    def test_lawyers_get_profiles_and_invalidate_the_directory(self):
+        onboarding.import_users([{"email": "ana@firm.com", "name": "Ana", "is_lawyer": "yes"},
+                                 {"email": "dee@firm.com", "name": "Dee"}])
+        (profiles,), _ = self.mocks["lawyers"].call_args
+        self.assertEqual([profile.user.email for profile in profiles], ["ana@firm.com"])
+        self.mocks["invalidate"].assert_called_once()
+
+    def test_missing_columns_are_rejected(self):
+        with self.assertRaises(ValueError):
+            onboarding.read_users_csv(["email,password", "ana@firm.com,secret"])
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class TestIssueTokens(SimpleTestCase):
+
+    def test_tokens_are_created_in_bulk_and_cached(self):
+        users = [User(id=pk, email=f"{pk}@firm.com", is_lawyer=False, is_verified=True) for pk in (1, 2, 3)]
+        with mock.patch.object(OutstandingToken.objects, "bulk_create") as bulk_create:
+            tokens = onboarding.issue_tokens(users, batch_size=2)
+        (outstanding,), kwargs = bulk_create.call_args
+        self.assertEqual(kwargs, {"batch_size": 2})
+        self.assertEqual([token.user for token in outstanding], users)
+        self.assertEqual([token["user_id"] for token in tokens], [1, 2, 3])
+        self.assertTrue(tokens[0].access_token["is_verified"])
+        with mock.patch("utils.authentication.BlacklistedToken.objects.filter") as filter:
+            AuthRefreshToken(str(tokens[2]))
+        filter.assert_not_called()
+
+
+class TestUserImportAdmin(SimpleTestCase):
+
+    def import_as(self, is_superuser):
+        request = RequestFactory().post("/admin/legal_gennie/user/import/", {
+            "file": SimpleUploadedFile("users.csv", CSV.encode()), "issue_tokens": "on",
+        })
+        request.user = mock.Mock(is_superuser=is_superuser)
+        model_admin = admin.site._registry[User]
+        with mock.patch.object(model_admin, "has_add_permission", return_value=True), \
+                mock.patch.object(model_admin, "message_user"), \
+                mock.patch("legal_gennie.admin.import_users", return_value=([User(id=1, email="ana@firm.com")], [])), \
+                mock.patch("legal_gennie.admin.tokens_response") as tokens_response:
+            model_admin.import_view(request)
+        return tokens_response
+
+    def test_only_superusers_download_tokens_for_imported_users(self):
+        self.import_as(is_superuser=False).assert_not_called()
+        self.import_as(is_superuser=True).assert_called_once_with([User(id=1, email="ana@firm.com")])
+
+    def test_there_is_no_action_issuing_tokens_for_existing_users(self):
+        self.assertNotIn("download_tokens", admin.site._registry[User].actions)
@@ -0,0 +1,93 @@
+import asyncio
+import threading
+import time
+from unittest import mock
+
+from django.core.cache import caches
+from django.test import SimpleTestCase, override_settings
+
+from legal_gennie import pipeline
+from utils import llm
+
+from .test_cache import LOCMEM_CACHES
+
+PETITION = "The respondent committed breach of contract by failing to deliver the goods; we seek damages."
+RESULTS = [{"tid": tid, "title": f"Judgment {tid}", "headline": "breach of contract"} for tid in (1, 2, 3)]
+
+
+@override_settings(
+    CACHES=LOCMEM_CACHES, LLM_BACKEND="local", LLM_LOCAL_LATENCY=0.0, KANOON_SUBMIT_INTERVAL=0,
+    RANKING_AUTHORITY_WEIGHT=0, CASE_DEADLINE=1.0, CASE_MIN_ANALYSIS_TIME=0.8,
+    CASE_STAGE_BUDGETS={"search": 0.2, "details": 0.3, "analysis": 1.0},
+)
+class TestCaseDeadline(SimpleTestCase):
+    """
+    The pipeline with stubbed Indian Kanoon calls and the local LLM backend.
+    Judgment 2's document hangs until the test ends.
+    """
+
+    def setUp(self):
+        caches["default"].clear()
+        caches["local"].clear()
+        hung = threading.Event()
+        self.addCleanup(hung.set)
+
+        def details(tid, token):
+            if tid == 2:
+                hung.wait(5)
+            return {"tid": tid, "doc": f"document {tid}"}
+
+        async def adetails(tid, token):
+            if tid == 2:
+                await asyncio.sleep(5)
+            return {"tid": tid, "doc": f"document {tid}"}
+
+        self.search = mock.MagicMock(return_value=RESULTS)
+        patchers = (
+            mock.patch.dict(llm._instances, clear=True),
+            mock.patch.object(pipeline, "fetch_indian_kanoon_judgments", self.search),
+            mock.patch.object(pipeline, "afetch_indian_kanoon_judgments", mock.AsyncMock(return_value=RESULTS)),
+            mock.patch.object(pipeline, "fetch_judgment_details", side_effect=details),
+            mock.patch.object(pipeline, "afetch_judgment_details", side_effect=adetails),
+        )
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def assertDegraded(self, run, degraded):
+        started = time.monotonic()
+        status_code, response = run()
+        elapsed = time.monotonic() - started
+
+        self.assertEqual(status_code, 201)
+        self.assertEqual(response["degraded"], degraded)
+        self.assertLess(elapsed, 1.5)
+        self.assertEqual({judgment["tid"] for judgment in response["judgments"]}, {1, 2, 3})
+        return response
+
+    def test_hung_detail_fetch_times_out_and_analysis_is_skipped(self):
+        with mock.patch.object(pipeline, "analyze_petition_with_openai") as analyze:
+            response = self.assertDegraded(lambda: pipeline.build_case_response(PETITION, "token"),
+                                           ["details", "analysis"])
+        # The details budget leaves less than CASE_MIN_ANALYSIS_TIME.
+        analyze.assert_not_called()
+        self.assertNotIn("analysis", response)
+
+    def test_async_hung_detail_fetch_times_out_and_analysis_is_skipped(self):
+        with mock.patch.object(pipeline, "aanalyze_petition_with_openai") as analyze:
+            self.assertDegraded(lambda: asyncio.run(pipeline.abuild_case_response(PETITION, "token")),
+                                ["details", "analysis"])
+        analyze.assert_not_called()
+
+    @override_settings(LLM_LOCAL_LATENCY=5.0, CASE_STAGE_BUDGETS={"search": 0.2, "details": 0.2, "analysis": 0.3},
+                       CASE_MIN_ANALYSIS_TIME=0.1)
+    def test_slow_analysis_times_out_within_its_budget(self):
+        with mock.patch.object(pipeline, "fetch_judgment_details", side_effect=lambda tid, token: {"doc": ""}):
+            response = self.assertDegraded(lambda: pipeline.build_case_response(PETITION, "token"), ["analysis"])
+        self.assertNotIn("analysis", response)
+
+    def test_degraded_responses_are_not_cached(self):
+        with mock.patch.object(pipeline, "analyze_petition_with_openai"):
+            pipeline.run_case(PETITION, "token")
+            pipeline.run_case(PETITION, "token")
+        self.assertEqual(self.search.call_count, 2)
@@ -0,0 +1,68 @@
+from datetime import datetime, timezone
+from unittest import mock
+
+from django.core.cache import caches
+from django.test import SimpleTestCase, override_settings
+
+from legal_gennie import prefetch
+from utils.helpers import fetch_indian_kanoon_judgments, fetch_judgment_details
+
+from .test_cache import LOCMEM_CACHES
+
+
+def at(hour):
+    return datetime(2024, 1, 1, hour, tzinfo=timezone.utc)
+
+
+class TestOffPeak(SimpleTestCase):
+
+    @override_settings(JUDGMENT_PREFETCH_START_HOUR=1, JUDGMENT_PREFETCH_END_HOUR=6)
+    def test_window(self):
+        self.assertEqual([hour for hour in range(24) if prefetch.in_off_peak(at(hour))], [1, 2, 3, 4, 5])
+
+    @override_settings(JUDGMENT_PREFETCH_START_HOUR=22, JUDGMENT_PREFETCH_END_HOUR=2)
+    def test_window_wrapping_midnight(self):
+        self.assertEqual([hour for hour in range(24) if prefetch.in_off_peak(at(hour))], [0, 1, 22, 23])
+
+
+@override_settings(CACHES=LOCMEM_CACHES, KANOON_SUBMIT_INTERVAL=0, JUDGMENT_PREFETCH_DOCS_PER_QUERY=2)
+class TestPrefetch(SimpleTestCase):
+
+    def setUp(self):
+        caches["default"].clear()
+        caches["local"].clear()
+        patchers = (
+            mock.patch.object(prefetch, "popular_queries", return_value=["contract breach damages", "writ"]),
+            mock.patch.object(fetch_indian_kanoon_judgments, "uncached",
+                              side_effect=lambda query, token: [{"tid": 1}, {"tid": 2}, {"tid": 3}]),
+            mock.patch.object(fetch_judgment_details, "uncached", side_effect=lambda tid, token: {"doc": f"doc {tid}"}),
+        )
+        mocks = []
+        for patcher in patchers:
+            mocks.append(patcher.start())
+            self.addCleanup(patcher.stop)
+        _, self.search, self.details = mocks
+
+    def test_warms_the_pipeline_cache(self):
+        stats = prefetch.prefetch_popular_judgments("token")
+        # The queries share their results, so the second one is already warm.
+        self.assertEqual(stats, {"requests": 4, "warm": 2, "queries": 2})
+        self.assertEqual(self.details.call_count, 2)
+        with mock.patch("requests.post") as post:
+            self.assertEqual(fetch_judgment_details(2, "other token"), {"doc": "doc 2"})
+        post.assert_not_called()
+
+    @override_settings(JUDGMENT_PREFETCH_MAX_REQUESTS=2)
+    def test_runs_resume_within_their_budget(self):
+        self.assertEqual(prefetch.prefetch_popular_judgments("token"), {"requests": 2})
+        self.assertEqual(
+            prefetch.prefetch_popular_judgments("token"),
+            {"requests": 2, "warm": 4, "queries": 2},
+        )
+        self.assertEqual(self.search.call_count, 2)
+
+    def test_errors_are_not_cached(self):
+        self.details.side_effect = lambda tid, token: {"error": "rate limited"}
+        stats = prefetch.prefetch_popular_judgments("token")
+        self.assertEqual(stats["errors"], 4)
+        self.assertEqual(prefetch.prefetch_popular_judgments("token")["errors"], 4)
@@ -0,0 +1,66 @@
+import tempfile
+from unittest import mock
+
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from utils import profiling
+from utils.fanout import fan_out
+
+
+@override_settings(PROFILING_PATHS=["/api/cases"], PROFILING_SECRET="secret",
+                   PROFILING_SAMPLE_RATE=0.0, PROFILING_MAX_PER_MINUTE=2)
+class TestProfiling(SimpleTestCase):
+
+    def setUp(self):
+        profiling._starts.clear()
+        self.factory = RequestFactory()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        patcher = override_settings(PROFILING_DIR=directory.name)
+        patcher.enable()
+        self.addCleanup(patcher.disable)
+
+    def request(self, path="/api/cases", **headers):
+        return self.factory.post(path, headers=headers)
+
+    def test_requested_or_sampled_within_the_limit(self):
+        self.assertFalse(profiling.should_profile(self.request()))
+        self.assertFalse(profiling.should_profile(self.request(X_Profile="guess")))
+        self.assertFalse(profiling.should_profile(self.request("/api/lawyers", X_Profile="secret")))
+        self.assertTrue(profiling.should_profile(self.request(X_Profile="secret")))
+        with override_settings(PROFILING_SAMPLE_RATE=1.0):
+            self.assertTrue(profiling.should_profile(self.request()))
+            self.assertFalse(profiling.should_profile(self.request()))
+
+    @override_settings(PROFILING_SECRET="")
+    def test_header_is_ignored_without_a_secret(self):
+        self.assertFalse(profiling.should_profile(self.request(X_Profile="")))
+
+    def test_spans_are_recorded_from_fan_out_threads(self):
+        profile = profiling.begin(self.request(X_Profile="secret"))
+
+        def call(tid):
+            with profiling.span("kanoon.doc", tid=tid):
+                return tid
+
+        fan_out(call, [1, 2, 3], max_workers=3)
+        response = HttpResponse()
+        profiling.end(profile, response)
+        self.assertIsNone(profiling.current_profile())
+        self.assertEqual(response[profiling.PROFILE_ID_HEADER], profile.id)
+        self.assertEqual(sorted(span["tid"] for span in profile.spans), [1, 2, 3])
+
+    @override_settings(PROFILING_KEEP=1)
+    def test_profiles_are_stored_and_pruned(self):
+        ids = []
+        with mock.patch.object(profiling, "pyinstrument", None):
+            for _ in range(2):
+                profile = profiling.begin(self.request(X_Profile="secret"))
+                profiling.end(profile, HttpResponse(status=201))
+                profiling.save(profile)
+                ids.append(profile.id)
+        self.assertEqual([summary["id"] for summary in profiling.list_profiles()], ids[1:])
+        self.assertEqual(profiling.get_profile(ids[1])["status_code"], 201)
+        self.assertEqual(profiling.cpu_profile_path(ids[1]).suffix, ".prof")
+        self.assertIsNone(profiling.cpu_profile_path(ids[0]))
@@ -0,0 +1,55 @@
+import unittest
+from unittest import mock
+
+from utils.prompts import ANALYSIS_INSTRUCTIONS, AnalysisPrompt, count_tokens
+
+
+def make_judgments(n, text_length=5000):
+    return [{"title": f"Judgment {i}", "full_text": f"{i} " * (text_length // 2)} for i in range(n)]
+
+
+class TestAnalysisPrompt(unittest.TestCase):
+
+    def setUp(self):
+        self.prompt = AnalysisPrompt()
+
+    def test_static_instructions_form_the_prefix(self):
+        first = self.prompt.build("Petition one", make_judgments(2), token_budget=8000)
+        second = self.prompt.build("A different petition", make_judgments(3), token_budget=8000)
+        self.assertEqual(first[0], {"role": "system", "content": ANALYSIS_INSTRUCTIONS})
+        self.assertEqual(first[0], second[0])
+        self.assertTrue(first[1]["content"].endswith("Petition one"))
+
+    def test_fits_budget_by_shrinking_snippets_then_dropping_judgments(self):
+        budget = self.prompt.instruction_tokens + 700
+        messages = self.prompt.build("Short petition", make_judgments(5), token_budget=budget)
+        content = messages[1]["content"]
+        self.assertLessEqual(count_tokens(content), budget - self.prompt.instruction_tokens)
+        self.assertIn("Judgment 0", content)
+        self.assertIn("Short petition", content)
+
+    def test_truncates_petition_middle_last(self):
+        petition = "START " + "facts " * 5000 + "PRAYER"
+        budget = self.prompt.instruction_tokens + 500
+        content = self.prompt.build(petition, make_judgments(2), token_budget=budget)[1]["content"]
+        self.assertLessEqual(count_tokens(content), budget - self.prompt.instruction_tokens)
+        self.assertIn("START", content)
+        self.assertIn("PRAYER", content)
+        self.assertIn("[...]", content)
+
+    def test_very_long_petitions_are_clipped_first(self):
+        petition = "START " + "facts " * 200000 + "PRAYER"
+        budget = self.prompt.instruction_tokens + 500
+        with mock.patch("utils.prompts.count_tokens", wraps=count_tokens) as counter:
+            content = self.prompt.build(petition, make_judgments(2), token_budget=budget)[1]["content"]
+        self.assertIn("START", content)
+        self.assertIn("PRAYER", content)
+        self.assertTrue(all(len(call.args[0]) < 10000 for call in counter.call_args_list))
+
+    def test_trimming_is_deterministic(self):
+        args = ("petition " * 3000, make_judgments(5))
+        self.assertEqual(self.prompt.build(*args, token_budget=2000), self.prompt.build(*args, token_budget=2000))
+
+
+if __name__ == "__main__":
+    unittest.main()
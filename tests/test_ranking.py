@@ -0,0 +1,42 @@
+import unittest
+
+from utils.ranking import bm25_scores, rerank_judgments, tokenize
+
+
+class TestRanking(unittest.TestCase):
+
+    def test_tokenize_strips_markup_and_stopwords(self):
+        self.assertEqual(tokenize("The <b>breach</b> of CONTRACT"), ["breach", "contract"])
+
+    def test_relevant_headline_ranks_first(self):
+        petition = "The respondent committed breach of contract by failing to deliver equipment; we seek damages."
+        judgments = [
+            {"tid": 1, "title": "State vs Ram", "headline": "murder trial acquittal appeal"},
+            {"tid": 2, "title": "Acme Ltd vs Beta Ltd", "headline": "<b>breach</b> of <b>contract</b> for supply of equipment, damages awarded"},
+            {"tid": 3, "title": "X vs Y", "headline": "contract interpretation"},
+        ]
+        ranked = rerank_judgments(petition, judgments)
+        self.assertEqual([j["tid"] for j in ranked], [2, 3, 1])
+
+    def test_ties_keep_search_order(self):
+        judgments = [{"tid": i, "title": "unrelated", "headline": ""} for i in range(4)]
+        self.assertEqual([j["tid"] for j in rerank_judgments("contract", judgments)], [0, 1, 2, 3])
+
+    def test_authority_lifts_cited_precedents(self):
+        judgments = [
+            {"tid": 1, "title": "Acme vs Beta", "headline": "breach of contract damages"},
+            {"tid": 2, "title": "Gamma vs Delta", "headline": "breach of contract"},
+            {"tid": 3, "title": "State vs Ram", "headline": "murder trial"},
+        ]
+        petition = "breach of contract damages"
+        self.assertEqual([j["tid"] for j in rerank_judgments(petition, judgments, {2: 1.0}, 0.0)], [1, 2, 3])
+        self.assertEqual([j["tid"] for j in rerank_judgments(petition, judgments, {2: 1.0}, 0.5)], [2, 1, 3])
+        self.assertEqual([j["tid"] for j in rerank_judgments(petition, judgments, {}, 0.5)], [1, 2, 3])
+
+    def test_empty_inputs(self):
+        self.assertEqual(bm25_scores("anything", []), [])
+        self.assertEqual(rerank_judgments("anything", []), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import io
+import json
+import uuid
+from decimal import Decimal
+from unittest import mock
+
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+
+from utils import parsers, renderers
+from utils.parsers import ORJSONParser, RequestTooLarge
+from utils.renderers import ORJSONRenderer
+
+
+class TestORJSONRenderer(SimpleTestCase):
+
+    data = {
+        "external_id": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+        "consultation_fee": Decimal("1500.50"),
+        "label": gettext_lazy("Lawyer"),
+        "judgments": [{"tid": 1, "title": "A v B\u2028line", "text": "धारा 302"}],
+        "counts": {1: "one"},
+    }
+
+    def test_matches_drf_json_renderer(self):
+        expected = json.loads(JSONRenderer().render(self.data))
+        rendered = ORJSONRenderer().render(self.data)
+        self.assertEqual(json.loads(rendered), expected)
+        self.assertIn(b"\\u2028", rendered)
+        self.assertIn("धारा".encode(), rendered)
+
+    def test_none_renders_empty(self):
+        self.assertEqual(ORJSONRenderer().render(None), b"")
+
+    def test_indent_and_missing_orjson_fall_back(self):
+        indented = ORJSONRenderer().render(self.data, "application/json; indent=4")
+        self.assertIn(b"\n    ", indented)
+        with mock.patch.object(renderers, "orjson", None):
+            self.assertEqual(ORJSONRenderer().render(self.data), JSONRenderer().render(self.data))
+
+
+class TestORJSONParser(SimpleTestCase):
+
+    def test_parses_utf8(self):
+        body = json.dumps({"petition": "धारा 302", "token": None}).encode()
+        self.assertEqual(ORJSONParser().parse(io.BytesIO(body)), {"petition": "धारा 302", "token": None})
+
+    def test_invalid_json_is_a_parse_error(self):
+        for body in (b"{", b'{"x": NaN}'):
+            with self.assertRaises(ParseError):
+                ORJSONParser().parse(io.BytesIO(body))
+
+    def test_missing_orjson_falls_back(self):
+        with mock.patch.object(parsers, "orjson", None):
+            self.assertEqual(ORJSONParser().parse(io.BytesIO(b'{"a": 1}')), {"a": 1})
+
+    @override_settings(DATA_UPLOAD_MAX_MEMORY_SIZE=16)
+    def test_bodies_over_the_limit_are_refused(self):
+        self.assertEqual(ORJSONParser().parse(io.BytesIO(b'{"a": "1234567"}')), {"a": "1234567"})
+        with self.assertRaises(RequestTooLarge):
+            ORJSONParser().parse(io.BytesIO(b'{"a": "12345678"}'))
+        # Announced sizes are refused before anything is read.
+        request = RequestFactory().post("/", b"{}", content_type="application/json", CONTENT_LENGTH="17")
+        with self.assertRaises(RequestTooLarge):
+            ORJSONParser().parse(mock.Mock(side_effect=AssertionError), parser_context={"request": request})
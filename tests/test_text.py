@@ -0,0 +1,60 @@
+import hashlib
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from legal_gennie.pipeline import petition_fingerprint
+from legal_gennie.serializers import CaseCreateSerializer
+from utils import text
+from utils.helpers import generate_search_query_from_petition
+
+PETITIONS = [
+    "The petitioner seeks partition of ancestral land in Delhi; the High Court erred in its order.",
+    "Appeal against dismissal from service.  The respondent refused to reinstate the petitioner\n"
+    "despite the tribunal's direction, and we seek   reinstatement with back wages.",
+    "Writ petition:\tthe tender was cancelled without notice and the award should be set\n aside.",
+]
+
+
+class TestChunks(SimpleTestCase):
+
+    def test_chunks_rejoin_and_end_at_whitespace(self):
+        for petition in PETITIONS:
+            pieces = list(text.chunks(petition, 20))
+            self.assertEqual("".join(pieces), petition)
+            self.assertTrue(all(len(piece) <= 20 for piece in pieces))
+            self.assertTrue(all(piece[-1].isspace() for piece in pieces[:-1]))
+
+    def test_words_longer_than_a_chunk_are_cut(self):
+        self.assertEqual(list(text.chunks("abcdefgh ij", 3)), ["abc", "def", "gh ", "ij"])
+
+    def test_clip_keeps_both_ends(self):
+        self.assertEqual(text.clip("short", 10), "short")
+        self.assertEqual(text.clip("0123456789", 4, "|"), "01|89")
+
+
+class TestChunkedPetitionProcessing(SimpleTestCase):
+
+    def test_query_does_not_depend_on_chunking(self):
+        for petition in PETITIONS:
+            expected = generate_search_query_from_petition(petition)
+            with mock.patch.object(text, "CHUNK_SIZE", 16):
+                self.assertEqual(generate_search_query_from_petition(petition), expected)
+
+    def test_phrases_are_found_across_chunks(self):
+        with mock.patch.object(text, "CHUNK_SIZE", 16):
+            query = generate_search_query_from_petition("A long running property   \n   dispute over a house in Mumbai.")
+        self.assertEqual(query, "property dispute mumbai partition")
+
+    def test_fingerprint_normalizes_whitespace_across_chunks(self):
+        petition = PETITIONS[1] * 3
+        expected = hashlib.sha256(" ".join(petition.split()).encode()).hexdigest()
+        with mock.patch.object(text, "CHUNK_SIZE", 16):
+            self.assertEqual(petition_fingerprint(petition), expected)
+
+    @override_settings(PETITION_MAX_LENGTH=40)
+    def test_petitions_over_the_limit_are_rejected(self):
+        self.assertTrue(CaseCreateSerializer(data={"petition": PETITIONS[0][:40]}).is_valid())
+        serializer = CaseCreateSerializer(data={"petition": PETITIONS[0]})
+        self.assertFalse(serializer.is_valid())
+        self.assertIn("petition", serializer.errors)
@@ -0,0 +1,192 @@
+"""
+JWT authentication without a user query on every request.
+
+simplejwt's ``JWTAuthentication`` loads the user row for each authenticated
+request. ``CachedJWTAuthentication`` builds ``request.user`` from just the
+fields permission checks need, taken from either
+
+- the access token, when ``JWT_STATELESS_AUTH`` is on and the token carries
+  the claims ``AuthRefreshToken`` adds. Changes to the user then reach its
+  requests once a new token is issued; or
+- a per-process cache holding the fields for ``JWT_USER_CACHE_TIMEOUT``
+  seconds, filled from the database on a miss and cleared for a user when it
+  is saved in this process.
+
+The result is a regular ``User`` with every other field deferred: reading
+e.g. ``request.user.email`` still works (at the cost of a query), and saving
+it writes only the loaded fields.
+
+Refresh tokens are rotated and blacklisted after use. ``AuthRefreshToken``
+answers blacklist checks from the shared cache, where every token it issues
+and every blacklisting is recorded, so refreshing doesn't read the blacklist
+tables; ``prune_expired_tokens`` keeps those tables from growing without bound.
+"""
+import time
+from typing import Any, Dict, List
+from uuid import UUID
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.utils import datetime_from_epoch, get_md5_hash_password
+
+from .db_router import PRIMARY_DB
+
+# Claims AuthRefreshToken adds to tokens, trusted in stateless mode.
+TOKEN_CLAIMS = ("external_id", "is_lawyer", "is_verified")
+# Fields cached and loaded for authenticated users; the rest are deferred.
+AUTH_FIELDS = ("id", "external_id", "is_active", "is_staff", "is_superuser", "is_admin", "is_lawyer", "is_verified")
+
+
+def _cache_key(user_id) -> str:
+    return f"jwt_user:{user_id}"
+
+
+def forget_user(user_id) -> None:
+    """
+    Drops the cached auth fields of a user from this process.
+    """
+    caches["local"].delete(_cache_key(user_id))
+
+
+def remember_blacklisted(jti: str, blacklisted: bool, expires_at: float) -> None:
+    """
+    Records in the shared cache whether a token is blacklisted, until it expires.
+    """
+    timeout = int(expires_at - time.time())
+    if timeout > 0:
+        cache.set(f"jwt_blacklisted:{jti}", blacklisted, timeout)
+
+
+def prune_expired_tokens(batch_size: int) -> int:
+    """
+    Deletes expired outstanding tokens, and with them their blacklist entries,
+    ``batch_size`` at a time. Returns the number of tokens deleted.
+    """
+    now = timezone.now()
+    deleted, last_id = 0, 0
+    while True:
+        # Walk the primary key rather than filtering the whole table per batch:
+        # expires_at has no index, but expired tokens are the oldest ones.
+        ids = list(
+            OutstandingToken.objects.filter(id__gt=last_id, expires_at__lte=now)
+            .order_by("id")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if ids:
+            OutstandingToken.objects.filter(id__in=ids).delete()
+            deleted += len(ids)
+            last_id = ids[-1]
+        if len(ids) < batch_size:
+            return deleted
+
+
+class AuthRefreshToken(RefreshToken):
+    """
+    Refresh token whose access tokens carry ``TOKEN_CLAIMS``, with blacklist
+    checks served from the shared cache.
+    """
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        cls._add_claims(token, user)
+        remember_blacklisted(token[api_settings.JTI_CLAIM], False, token["exp"])
+        return token
+
+    @classmethod
+    def for_users(cls, users, batch_size: int = 1000) -> List["AuthRefreshToken"]:
+        """
+        Issues a token per user, as ``for_user`` does, with the outstanding
+        tokens inserted ``batch_size`` rows at a time and recorded in the cache
+        in one call.
+        """
+        tokens, outstanding = [], []
+        for user in users:
+            # Token.for_user, without the outstanding token BlacklistMixin saves per call.
+            user_id = getattr(user, api_settings.USER_ID_FIELD)
+            token = cls()
+            token[api_settings.USER_ID_CLAIM] = user_id if isinstance(user_id, int) else str(user_id)
+            if api_settings.CHECK_REVOKE_TOKEN:
+                token[api_settings.REVOKE_TOKEN_CLAIM] = get_md5_hash_password(user.password)
+            cls._add_claims(token, user)
+            tokens.append(token)
+            outstanding.append(OutstandingToken(
+                user=user,
+                jti=token[api_settings.JTI_CLAIM],
+                token=str(token),
+                created_at=token.current_time,
+                expires_at=datetime_from_epoch(token["exp"]),
+            ))
+        OutstandingToken.objects.bulk_create(outstanding, batch_size=batch_size)
+        if tokens:
+            cache.set_many(
+                {f"jwt_blacklisted:{token[api_settings.JTI_CLAIM]}": False for token in tokens},
+                int(tokens[0].lifetime.total_seconds()),
+            )
+        return tokens
+
+    @staticmethod
+    def _add_claims(token, user):
+        token["external_id"] = str(user.external_id)
+        token["is_lawyer"] = user.is_lawyer
+        token["is_verified"] = user.is_verified
+
+    def check_blacklist(self):
+        # Blacklisting is recorded by a post_save signal, so the cache is
+        # authoritative; the table is only read for tokens it has lost.
+        jti = self.payload[api_settings.JTI_CLAIM]
+        blacklisted = cache.get(f"jwt_blacklisted:{jti}")
+        if blacklisted is None:
+            blacklisted = BlacklistedToken.objects.filter(token__jti=jti).exists()
+            remember_blacklisted(jti, blacklisted, self.payload["exp"])
+        if blacklisted:
+            raise TokenError(_("Token is blacklisted"))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+
+    def get_user(self, validated_token):
+        # Revocation compares the token with the current password hash, so it needs the row.
+        if api_settings.CHECK_REVOKE_TOKEN:
+            return super().get_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        if settings.JWT_STATELESS_AUTH and all(claim in validated_token for claim in TOKEN_CLAIMS):
+            fields = {"id": user_id, "is_active": True, **{claim: validated_token[claim] for claim in TOKEN_CLAIMS}}
+            fields["external_id"] = UUID(fields["external_id"])
+        else:
+            fields = self._cached_fields(user_id)
+
+        if not fields["is_active"]:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        # from_db takes the values in field order. The instance is bound to the
+        # primary, so deferred loads and saves see the latest row.
+        names = [f.attname for f in self.user_model._meta.concrete_fields if f.attname in fields]
+        user = self.user_model.from_db(PRIMARY_DB, names, [fields[name] for name in names])
+        user._auth_fields_only = True
+        return user
+
+    def _cached_fields(self, user_id) -> Dict[str, Any]:
+        key = _cache_key(user_id)
+        fields = caches["local"].get(key)
+        if fields is None:
+            fields = (
+                self.user_model.objects.filter(**{api_settings.USER_ID_FIELD: user_id})
+                .values(*AUTH_FIELDS)
+                .first()
+            )
+            if fields is None:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found")
+            caches["local"].set(key, fields, settings.JWT_USER_CACHE_TIMEOUT)
+        return fields
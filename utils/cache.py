@@ -0,0 +1,350 @@
+"""
+Two tier cache-aside helpers.
+
+Reads check the in-process ``local`` cache first, then the shared ``default``
+(Redis) cache. Misses are computed single-flight: one thread per process
+(see ``coalesce``) and one process per cluster (via an atomic ``cache.add``
+lock) does the work, everybody else waits for and shares its result.
+
+Coroutine functions get the same treatment on the event loop: ``acoalesce``
+shares an asyncio future between tasks and ``asingle_flight`` waits for
+other processes without blocking the loop.
+"""
+import asyncio
+import functools
+import hashlib
+import json
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+
+from utils.deadline import remaining
+
+logger = logging.getLogger(__name__)
+
+MISS = object()
+
+
+_inflight = {}
+_inflight_guard = threading.Lock()
+
+
+def coalesce(key: str, compute: Callable[[], Any]) -> Any:
+    """
+    Runs ``compute`` once for all threads of this process asking for ``key`` at
+    the same time; followers block on the leader's future and share its result
+    (or exception). Nothing is kept once the call finishes.
+    """
+    with _inflight_guard:
+        future = _inflight.get(key)
+        leader = future is None
+        if leader:
+            future = Future()
+            _inflight[key] = future
+
+    if not leader:
+        return future.result()
+
+    try:
+        result = compute()
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    else:
+        future.set_result(result)
+        return result
+    finally:
+        with _inflight_guard:
+            _inflight.pop(key, None)
+
+
+_ainflight = {}
+
+
+async def acoalesce(key: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+    """
+    Async counterpart of ``coalesce``: tasks on the same event loop asking for
+    ``key`` at the same time share one ``compute()`` coroutine.
+    """
+    slot = (asyncio.get_running_loop(), key)
+    future = _ainflight.get(slot)
+    if future is not None:
+        # Shielded so a cancelled follower doesn't cancel the leader's result.
+        return await asyncio.shield(future)
+
+    future = slot[0].create_future()
+    _ainflight[slot] = future
+    try:
+        result = await compute()
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except BaseException as e:
+        future.set_exception(e)
+        future.exception()  # Mark retrieved; followers (if any) still get it.
+        raise
+    else:
+        future.set_result(result)
+        return result
+    finally:
+        _ainflight.pop(slot, None)
+
+
+def make_key(prefix: str, *parts: Any) -> str:
+    """
+    Builds a fixed length cache key from arbitrary (JSON serializable) parts.
+    """
+    raw = json.dumps(parts, sort_keys=True, default=str)
+    return f"{prefix}:{hashlib.sha256(raw.encode()).hexdigest()}"
+
+
+def get(key: str) -> Any:
+    """
+    Returns the cached value for ``key`` or ``MISS``, promoting shared hits to L1.
+    """
+    local = caches["local"]
+    value = local.get(key, MISS)
+    if value is not MISS:
+        return value
+    value = caches["default"].get(key, MISS)
+    if value is not MISS:
+        local.set(key, value, settings.CACHE_L1_TIMEOUT)
+    return value
+
+
+def set(key: str, value: Any, timeout: int) -> None:
+    caches["default"].set(key, value, timeout)
+    caches["local"].set(key, value, min(timeout, settings.CACHE_L1_TIMEOUT))
+
+
+def delete(key: str) -> None:
+    caches["default"].delete(key)
+    caches["local"].delete(key)
+
+
+def single_flight(key: str, compute: Callable[[], Any], timeout: int,
+                  cache_if: Optional[Callable[[Any], bool]] = None) -> Any:
+    """
+    Returns the cached value for ``key``, computing it with ``compute`` at most
+    once across concurrent callers when it is missing.
+
+    Args:
+        key (str): Cache key for the value
+        compute (Callable): Produces the value on a miss
+        timeout (int): Seconds to keep the value in the shared cache
+        cache_if (Optional[Callable]): Predicate deciding whether a computed value
+            may be cached, e.g. to skip error results
+
+    Returns:
+        Any: The cached or freshly computed value
+    """
+    value = get(key)
+    if value is not MISS:
+        return value
+    return coalesce(key, lambda: _fill(key, compute, timeout, cache_if))
+
+
+def _fill(key, compute, timeout, cache_if):
+    # The previous leader in this process may have filled it just before we got in.
+    value = get(key)
+    if value is not MISS:
+        return value
+
+    shared = caches["default"]
+    lock_key = f"{key}:lock"
+    lock_timeout = settings.CACHE_LOCK_TIMEOUT
+    if not shared.add(lock_key, 1, lock_timeout):
+        value = _wait_for(key, lock_key, lock_timeout)
+        if value is not MISS:
+            return value
+        logger.warning(f"Gave up waiting for {key}, computing it locally")
+        return _compute_and_store(key, compute, timeout, cache_if)
+
+    try:
+        return _compute_and_store(key, compute, timeout, cache_if)
+    finally:
+        shared.delete(lock_key)
+
+
+def _wait_until(lock_timeout: int) -> float:
+    # A dead or hung lock holder shouldn't hold the caller past its request deadline.
+    return time.monotonic() + min(lock_timeout, remaining(lock_timeout))
+
+
+def _poll_interval(until: float) -> float:
+    return max(min(settings.CACHE_LOCK_POLL_INTERVAL, until - time.monotonic()), 0.0)
+
+
+def _wait_for(key: str, lock_key: str, lock_timeout: int) -> Any:
+    """
+    Polls the shared cache until the lock holder publishes ``key``. Returns
+    ``MISS`` if the holder released the lock without caching, or once
+    ``lock_timeout`` or the current deadline (``utils.deadline``) runs out.
+    """
+    shared = caches["default"]
+    until = _wait_until(lock_timeout)
+    while time.monotonic() < until:
+        time.sleep(_poll_interval(until))
+        value = shared.get(key, MISS)
+        if value is not MISS:
+            caches["local"].set(key, value, settings.CACHE_L1_TIMEOUT)
+            return value
+        if shared.get(lock_key) is None:
+            break
+    return MISS
+
+
+def _compute_and_store(key, compute, timeout, cache_if):
+    value = compute()
+    if cache_if is None or cache_if(value):
+        set(key, value, timeout)
+    return value
+
+
+# Cache backends are blocking; run them off the event loop. Both tiers are
+# thread-safe, so there's no need to pin them to one thread.
+def _off_loop(func):
+    return sync_to_async(func, thread_sensitive=False)
+
+
+async def asingle_flight(key: str, compute: Callable[[], Awaitable[Any]], timeout: int,
+                         cache_if: Optional[Callable[[Any], bool]] = None) -> Any:
+    """
+    Async counterpart of ``single_flight`` for coroutine ``compute`` functions.
+    Shares keys, values and locks with the sync version.
+    """
+    value = await _off_loop(get)(key)
+    if value is not MISS:
+        return value
+    return await acoalesce(key, lambda: _afill(key, compute, timeout, cache_if))
+
+
+async def _afill(key, compute, timeout, cache_if):
+    value = await _off_loop(get)(key)
+    if value is not MISS:
+        return value
+
+    shared = caches["default"]
+    lock_key = f"{key}:lock"
+    lock_timeout = settings.CACHE_LOCK_TIMEOUT
+    if not await _off_loop(shared.add)(lock_key, 1, lock_timeout):
+        value = await _await_for(key, lock_key, lock_timeout)
+        if value is not MISS:
+            return value
+        logger.warning(f"Gave up waiting for {key}, computing it locally")
+        return await _acompute_and_store(key, compute, timeout, cache_if)
+
+    try:
+        return await _acompute_and_store(key, compute, timeout, cache_if)
+    finally:
+        await _off_loop(shared.delete)(lock_key)
+
+
+async def _await_for(key: str, lock_key: str, lock_timeout: int) -> Any:
+    shared = caches["default"]
+    until = _wait_until(lock_timeout)
+    while time.monotonic() < until:
+        await asyncio.sleep(_poll_interval(until))
+        value = await _off_loop(shared.get)(key, MISS)
+        if value is not MISS:
+            await _off_loop(caches["local"].set)(key, value, settings.CACHE_L1_TIMEOUT)
+            return value
+        if await _off_loop(shared.get)(lock_key) is None:
+            break
+    return MISS
+
+
+async def _acompute_and_store(key, compute, timeout, cache_if):
+    value = await compute()
+    if cache_if is None or cache_if(value):
+        await _off_loop(set)(key, value, timeout)
+    return value
+
+
+def is_not_error(value: Any) -> bool:
+    """
+    ``cache_if`` predicate for helpers that report failures as ``{"error": ...}``.
+    """
+    return not (isinstance(value, dict) and "error" in value)
+
+
+def cache_aside(prefix: str, timeout: int, key_func: Optional[Callable[..., Any]] = None,
+                cache_if: Optional[Callable[[Any], bool]] = None):
+    """
+    Decorator caching a function's return value with single-flight misses.
+
+    Args:
+        prefix (str): Key namespace, normally the function name
+        timeout (int): Seconds to keep results in the shared cache
+        key_func (Optional[Callable]): Maps the call arguments to the parts of the
+            key; defaults to all positional and keyword arguments
+        cache_if (Optional[Callable]): Predicate deciding whether a result may be cached
+
+    Coroutine functions are cached with ``asingle_flight``; a sync and an async
+    implementation decorated with the same prefix share cache entries.
+    The undecorated function stays reachable as ``wrapper.uncached``, and
+    ``wrapper.cache_key(*args, **kwargs)`` gives the key a call is cached under.
+    """
+    def decorator(func):
+        def cache_key(*args, **kwargs):
+            parts = key_func(*args, **kwargs) if key_func else (args, kwargs)
+            return make_key(prefix, parts)
+
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                key = cache_key(*args, **kwargs)
+                return await asingle_flight(key, lambda: func(*args, **kwargs), timeout, cache_if)
+        else:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                key = cache_key(*args, **kwargs)
+                return single_flight(key, lambda: func(*args, **kwargs), timeout, cache_if)
+
+        wrapper.uncached = func
+        wrapper.cache_key = cache_key
+        return wrapper
+
+    return decorator
+
+
+def cache_response(prefix: str, timeout: int, key_func: Optional[Callable[..., Any]] = None,
+                   vary_on_user: bool = False):
+    """
+    Decorator caching the data of successful (200) DRF view responses.
+
+    Args:
+        prefix (str): Key namespace, normally the view name
+        timeout (int): Seconds to keep responses in the shared cache
+        key_func (Optional[Callable]): Extra key parts from ``(view, request, *args, **kwargs)``,
+            e.g. a version that changes whenever the underlying data does
+        vary_on_user (bool): Cache separately per authenticated user
+    """
+    from rest_framework.response import Response
+
+    def decorator(view_method):
+        @functools.wraps(view_method)
+        def wrapper(view, request, *args, **kwargs):
+            parts = [request.path, sorted(request.query_params.lists())]
+            if vary_on_user:
+                parts.append(getattr(request.user, "pk", None))
+            if key_func:
+                parts.append(key_func(view, request, *args, **kwargs))
+            key = make_key(prefix, parts)
+
+            def compute():
+                response = view_method(view, request, *args, **kwargs)
+                return response.status_code, response.data
+
+            status_code, data = single_flight(key, compute, timeout, cache_if=lambda r: r[0] == 200)
+            return Response(data, status=status_code)
+
+        return wrapper
+
+    return decorator
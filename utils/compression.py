@@ -0,0 +1,110 @@
+"""
+Content-Encoding negotiation and compressors for ``CompressionMiddleware``.
+
+gzip is always available; brotli (``br``) and zstd are used when the
+``brotli`` and ``zstandard`` packages are installed. Every compressor can
+work incrementally, flushing after each chunk, so streaming responses are
+compressed on the fly instead of being buffered.
+"""
+import zlib
+from typing import Dict, Optional
+
+from django.conf import settings
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+class GzipCompressor:
+    def __init__(self, level: int):
+        # wbits=31 writes the gzip container rather than raw zlib.
+        self._stream = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes, flush: bool = True) -> bytes:
+        out = self._stream.compress(data)
+        return out + self._stream.flush(zlib.Z_SYNC_FLUSH) if flush else out
+
+    def finish(self) -> bytes:
+        return self._stream.flush()
+
+
+class BrotliCompressor:
+    def __init__(self, level: int):
+        self._stream = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes, flush: bool = True) -> bytes:
+        out = self._stream.process(data)
+        return out + self._stream.flush() if flush else out
+
+    def finish(self) -> bytes:
+        return self._stream.finish()
+
+
+class ZstdCompressor:
+    def __init__(self, level: int):
+        self._stream = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes, flush: bool = True) -> bytes:
+        out = self._stream.compress(data)
+        return out + self._stream.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK) if flush else out
+
+    def finish(self) -> bytes:
+        return self._stream.flush()
+
+
+COMPRESSORS = {"gzip": GzipCompressor}
+if brotli is not None:
+    COMPRESSORS["br"] = BrotliCompressor
+if zstandard is not None:
+    COMPRESSORS["zstd"] = ZstdCompressor
+
+
+def parse_accept_encoding(header: str) -> Dict[str, float]:
+    """
+    Parses an ``Accept-Encoding`` header into ``{coding: qvalue}``.
+    """
+    accepted = {}
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding] = q
+    return accepted
+
+
+def negotiate(header: str) -> Optional[str]:
+    """
+    Picks the encoding for a response: the client's highest ``q`` among the
+    available ``COMPRESSION_ENCODINGS``, ties going to the server's order.
+    Returns None when nothing acceptable is available.
+    """
+    accepted = parse_accept_encoding(header)
+    wildcard = accepted.get("*", 0.0)
+    best, best_q = None, 0.0
+    for encoding in settings.COMPRESSION_ENCODINGS:
+        if encoding not in COMPRESSORS:
+            continue
+        q = accepted.get(encoding, wildcard)
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compressor(encoding: str):
+    return COMPRESSORS[encoding](settings.COMPRESSION_LEVELS[encoding])
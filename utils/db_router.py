@@ -0,0 +1,54 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+PRIMARY_DB = "default"
+
+_pinned_to_primary = ContextVar("pinned_to_primary", default=False)
+
+
+@contextmanager
+def use_primary():
+    """
+    Routes every read inside the block to the primary, e.g. for read-after-write
+    paths that can't tolerate replica lag.
+    """
+    token = _pinned_to_primary.set(True)
+    try:
+        yield
+    finally:
+        _pinned_to_primary.reset(token)
+
+
+class PrimaryReplicaRouter:
+    """
+    Sends writes and migrations to the primary and spreads reads over the
+    aliases listed in ``DATABASE_REPLICAS``. With no replicas configured every
+    query goes to the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        if _pinned_to_primary.get():
+            return PRIMARY_DB
+
+        # Keep related lookups on the database the instance was loaded from.
+        instance = hints.get("instance")
+        if instance is not None and instance._state.db:
+            return instance._state.db
+
+        replicas = settings.DATABASE_REPLICAS
+        if not replicas:
+            return PRIMARY_DB
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY_DB
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas mirror the primary, so objects from any alias may be related.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == PRIMARY_DB
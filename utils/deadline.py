@@ -0,0 +1,96 @@
+"""
+Request deadlines propagated through context variables.
+
+The case pipeline opens a ``deadline`` scope for the whole request and a
+nested one per stage; anything below (HTTP calls, retries, LLM calls) asks
+``timeout_for`` how long it may take instead of using fixed timeouts, so a
+hung upstream can never hold a worker past the request's deadline.
+``utils.fanout`` copies the context into its worker threads; asyncio tasks
+inherit it on their own.
+"""
+import asyncio
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+
+class Deadline:
+    __slots__ = ("expires_at",)
+
+    def __init__(self, seconds: float):
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+
+_current = ContextVar("deadline", default=None)
+
+
+def current_deadline() -> Optional[Deadline]:
+    return _current.get()
+
+
+@contextmanager
+def deadline(seconds: float):
+    """
+    Runs the block under a deadline ``seconds`` from now, capped by any
+    enclosing deadline.
+    """
+    parent = _current.get()
+    if parent is not None:
+        seconds = min(seconds, parent.remaining())
+    token = _current.set(Deadline(seconds))
+    try:
+        yield _current.get()
+    finally:
+        _current.reset(token)
+
+
+def remaining(default: Optional[float] = None) -> Optional[float]:
+    """
+    Seconds left on the current deadline, or ``default`` outside any deadline.
+    """
+    current = _current.get()
+    return current.remaining() if current is not None else default
+
+
+def timeout_for(default: float, minimum: float = 0.1) -> float:
+    """
+    Timeout for one upstream call: ``default``, capped by the current deadline.
+    Never returns less than ``minimum`` so libraries don't treat it as "no timeout".
+    """
+    current = _current.get()
+    if current is None:
+        return default
+    return max(min(default, current.remaining()), minimum)
+
+
+def sleep_within_deadline(seconds: float) -> bool:
+    """
+    Sleeps for ``seconds`` unless that would overrun the current deadline.
+
+    Returns:
+        bool: False (without sleeping) if the deadline leaves no room to sleep and retry
+    """
+    left = remaining()
+    if left is not None and left <= seconds:
+        return False
+    time.sleep(seconds)
+    return True
+
+
+async def asleep_within_deadline(seconds: float) -> bool:
+    """
+    Async counterpart of ``sleep_within_deadline``.
+    """
+    left = remaining()
+    if left is not None and left <= seconds:
+        return False
+    await asyncio.sleep(seconds)
+    return True
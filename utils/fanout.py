@@ -0,0 +1,136 @@
+"""
+Ordered fan-out/fan-in over a thread pool.
+
+Results land in slots preallocated by input position, so assembly is O(n)
+and duplicate inputs keep their own slots. Failures are captured per item as
+``FetchError`` objects instead of aborting the whole stage, and an optional
+timeout returns whatever finished in time. ``afan_out`` does the same for
+coroutine functions on the running event loop.
+"""
+import asyncio
+import concurrent.futures
+import contextvars
+import time
+from typing import Any, Awaitable, Callable, List, Optional, Sequence
+
+
+class FetchError:
+    """
+    Structured per-item failure.
+
+    ``kind`` is one of: ``exception`` (the call raised), ``timeout`` (it did not
+    finish before the deadline), ``upstream`` (the remote side reported an
+    error), ``empty`` (nothing came back) or ``invalid`` (unusable response).
+    """
+    __slots__ = ("kind", "message")
+
+    EXCEPTION = "exception"
+    TIMEOUT = "timeout"
+    UPSTREAM = "upstream"
+    EMPTY = "empty"
+    INVALID = "invalid"
+
+    def __init__(self, kind: str, message: str = ""):
+        self.kind = kind
+        self.message = message
+
+    def to_dict(self):
+        return {"kind": self.kind, "message": self.message}
+
+    def __repr__(self):
+        return f"FetchError({self.kind!r}, {self.message!r})"
+
+
+class ItemResult:
+    __slots__ = ("value", "error")
+
+    def __init__(self, value: Any = None, error: Optional[FetchError] = None):
+        self.value = value
+        self.error = error
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def fan_out(func: Callable[[Any], Any], items: Sequence[Any], max_workers: int = 4,
+            submit_interval: float = 0.0, timeout: Optional[float] = None) -> List[ItemResult]:
+    """
+    Calls ``func`` on every item concurrently and returns results in input order.
+
+    Args:
+        func (Callable): Called once per item
+        items (Sequence): Inputs; duplicates are called and returned separately
+        max_workers (int): Maximum concurrent calls
+        submit_interval (float): Pause between submissions, to spread load on
+            rate limited upstreams
+        timeout (Optional[float]): Seconds to wait overall; items not done by
+            then get a ``timeout`` error and are abandoned
+
+    Returns:
+        List[ItemResult]: One result per item, in the order of ``items``
+    """
+    results = [None] * len(items)
+    deadline = time.monotonic() + timeout if timeout is not None else None
+
+    def remaining():
+        return None if deadline is None else max(deadline - time.monotonic(), 0)
+
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(items) or 1)))
+    futures = {}
+    try:
+        for idx, item in enumerate(items):
+            if idx and submit_interval:
+                pause = submit_interval if deadline is None else min(submit_interval, remaining())
+                time.sleep(pause)
+            if deadline is not None and remaining() <= 0:
+                break
+            # Run each call in a copy of the caller's context (deadline, request id, ...)
+            futures[executor.submit(contextvars.copy_context().run, func, item)] = idx
+
+        done, _ = concurrent.futures.wait(futures, timeout=remaining())
+        for future in done:
+            try:
+                results[futures[future]] = ItemResult(value=future.result())
+            except Exception as e:
+                results[futures[future]] = ItemResult(error=FetchError(FetchError.EXCEPTION, str(e)))
+    finally:
+        # Don't block on stragglers; they finish (or are cancelled) in the background.
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    for idx, result in enumerate(results):
+        if result is None:
+            results[idx] = ItemResult(error=FetchError(FetchError.TIMEOUT, f"Not finished within {timeout}s"))
+    return results
+
+
+async def afan_out(func: Callable[[Any], Awaitable[Any]], items: Sequence[Any], max_workers: int = 4,
+                   submit_interval: float = 0.0, timeout: Optional[float] = None) -> List[ItemResult]:
+    """
+    Async counterpart of ``fan_out``: awaits ``func`` on every item as tasks on
+    the running loop, with the same ordering, pacing and timeout semantics.
+    Items still running at the timeout are cancelled.
+    """
+    results = [None] * len(items)
+    slots = asyncio.Semaphore(max(1, max_workers))
+
+    async def run(idx, item):
+        # Stagger start times the way fan_out spaces out submissions.
+        if idx and submit_interval:
+            await asyncio.sleep(idx * submit_interval)
+        async with slots:
+            try:
+                results[idx] = ItemResult(value=await func(item))
+            except Exception as e:
+                results[idx] = ItemResult(error=FetchError(FetchError.EXCEPTION, str(e)))
+
+    tasks = [asyncio.ensure_future(run(idx, item)) for idx, item in enumerate(items)]
+    if tasks:
+        _, pending = await asyncio.wait(tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+
+    for idx, result in enumerate(results):
+        if result is None:
+            results[idx] = ItemResult(error=FetchError(FetchError.TIMEOUT, f"Not finished within {timeout}s"))
+    return results
@@ -0,0 +1,143 @@
+"""
+Password hashing tuned for login and sign-up bursts.
+
+``PASSWORD_HASHER`` picks the hasher for new passwords; the hasher classes
+here take their cost parameters from settings so they can be tuned per
+deployment. Existing hashes made with other parameters or algorithms keep
+verifying and are re-hashed on the user's next login.
+
+``make_password`` and ``check_password`` mirror Django's. With
+``PASSWORD_HASHING_WORKERS`` set, they hash in a pool of that many processes
+shared by every thread of the web worker. A burst of logins then uses at most
+that many cores, with the extra requests queueing for a slot, and the I/O-bound
+case endpoints keep the rest of the CPU.
+"""
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import Iterator, Optional
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.contrib.auth import hashers
+
+logger = logging.getLogger(__name__)
+
+
+class TunedArgon2PasswordHasher(hashers.Argon2PasswordHasher):
+
+    def __init__(self):
+        self.time_cost = settings.PASSWORD_ARGON2_TIME_COST
+        self.memory_cost = settings.PASSWORD_ARGON2_MEMORY_COST
+        self.parallelism = settings.PASSWORD_ARGON2_PARALLELISM
+
+
+class TunedScryptPasswordHasher(hashers.ScryptPasswordHasher):
+
+    def __init__(self):
+        self.work_factor = settings.PASSWORD_SCRYPT_WORK_FACTOR
+        self.block_size = settings.PASSWORD_SCRYPT_BLOCK_SIZE
+        self.parallelism = settings.PASSWORD_SCRYPT_PARALLELISM
+        # scrypt needs 128 * N * r bytes; OpenSSL refuses more than 32 MiB by default.
+        self.maxmem = 2 * 128 * self.work_factor * self.block_size
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _executor():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Spawned rather than forked: the web worker has threads and open
+            # connections. Children only import settings and the hashers.
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.PASSWORD_HASHING_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def _run(func, *args):
+    if not settings.PASSWORD_HASHING_WORKERS:
+        return func(*args)
+    pool = _executor()
+    try:
+        return pool.submit(func, *args).result()
+    except BrokenProcessPool:
+        global _pool
+        logger.exception("Password hashing pool broke, hashing inline and restarting it")
+        with _pool_lock:
+            if _pool is pool:
+                _pool = None
+        return func(*args)
+
+
+def make_password(password):
+    # Unusable passwords (None) take no hashing.
+    if password is None:
+        return hashers.make_password(password)
+    return _run(hashers.make_password, password)
+
+
+@contextmanager
+def password_pool(workers: Optional[int] = None) -> Iterator[Optional[Executor]]:
+    """
+    A pool of ``workers`` processes for several ``make_passwords`` calls, so a
+    batched import starts its processes once instead of per batch. Yields
+    None when ``make_passwords`` would hash inline or in the shared pool anyway.
+    """
+    if not workers or workers == settings.PASSWORD_HASHING_WORKERS:
+        yield None
+        return
+    # Workers start on the first hash, so imports without passwords spawn none.
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        yield pool
+
+
+def make_passwords(passwords, workers=None, pool=None):
+    """
+    Hashes many passwords at once, e.g. for a bulk import.
+
+    Args:
+        passwords (List[Optional[str]]): Raw passwords; None gives an unusable password
+        workers (Optional[int]): Processes to hash in, defaults to the shared
+            ``PASSWORD_HASHING_WORKERS`` pool; 0 hashes inline
+        pool (Optional[Executor]): A ``password_pool(workers)`` to hash in
+            instead of starting one for this call
+
+    Returns:
+        List[str]: The encoded passwords, in order
+    """
+    encoded = [hashers.make_password(None) if password is None else None for password in passwords]
+    pending = [index for index, password in enumerate(passwords) if password is not None]
+    raw = [passwords[index] for index in pending]
+    if workers is None:
+        workers = settings.PASSWORD_HASHING_WORKERS
+    if not workers or len(raw) < 2:
+        hashed = [hashers.make_password(password) for password in raw]
+    else:
+        # Chunks amortize the inter-process round trips over several hashes.
+        chunksize = max(1, len(raw) // (workers * 4))
+        if pool is not None:
+            hashed = list(pool.map(hashers.make_password, raw, chunksize=chunksize))
+        elif workers == settings.PASSWORD_HASHING_WORKERS:
+            hashed = list(_executor().map(hashers.make_password, raw, chunksize=chunksize))
+        else:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+                hashed = list(pool.map(hashers.make_password, raw, chunksize=chunksize))
+    for index, value in zip(pending, hashed):
+        encoded[index] = value
+    return encoded
+
+
+def check_password(password, encoded, setter=None):
+    if password is None or not hashers.is_password_usable(encoded):
+        return False
+    is_correct, must_update = _run(hashers.verify_password, password, encoded)
+    if setter and is_correct and must_update:
+        setter(password)
+    return is_correct
@@ -1,14 +1,34 @@
-import requests
-from bs4 import BeautifulSoup
+# requests and bs4 are imported where they're used: together they add ~100 ms
+# to startup, which Celery workers and management commands rarely need.
 import re
 import json
-import time
 import logging
 from typing import List, Dict, Any, Optional, Union
-import openai
 from django.conf import settings
 
+from utils.cache import cache_aside, is_not_error
+from utils.deadline import asleep_within_deadline, sleep_within_deadline, timeout_for
+from utils.http import async_client
+from utils.judgments import Judgment
+from utils.llm import get_backend
+from utils.log import external_call
+from utils.prompts import analysis_prompt
+from utils.text import chunks
 
+logger = logging.getLogger(__name__)
+
+
+BAR_COUNCIL_VERIFICATION_URL = "https://delhibarcouncil.com/bcd/verification_individual.php"
+
+
+def _is_enrolled(result: Any) -> bool:
+    # An empty result may be a registration the Bar Council hasn't published
+    # yet (or a transient empty table); don't make a retrying lawyer wait out
+    # the cache for it.
+    return bool(result) and is_not_error(result)
+
+
+@cache_aside("verify_lawyer_dl", timeout=60 * 60, cache_if=_is_enrolled)
 def verify_lawyer_dl(registration_number: str):
     """
     Verifies a lawyer's registration details with the Bar Council based on state and registration number.
@@ -20,48 +40,174 @@ def verify_lawyer_dl(registration_number: str):
     Returns:
     dict: Verification details including name, status, and remarks, or error if unsuccessful.
     """
-    url = f"https://delhibarcouncil.com/bcd/verification_individual.php"
-    payload = {
-        "Enroll_Id": registration_number,
-        "search-verification": "Search"
-    }
+    import requests
+
+    try:
+        with external_call("bar_council.verify") as call:
+            response = requests.post(
+                BAR_COUNCIL_VERIFICATION_URL,
+                data=_verification_payload(registration_number),
+                timeout=timeout_for(settings.UPSTREAM_REQUEST_TIMEOUT),
+            )
+            call["status"] = response.status_code
+            call["bytes"] = len(response.content)
+        return _parse_verification_response(response)
 
+    except Exception as e:
+        return {"error": str(e)}
+
+
+@cache_aside("verify_lawyer_dl", timeout=60 * 60, cache_if=_is_enrolled)
+async def averify_lawyer_dl(registration_number: str):
+    """
+    Async version of ``verify_lawyer_dl``, sharing its cache entries.
+    """
     try:
-        response = requests.post(url, data=payload)
-        if response.status_code != 200:
-            return {"error": f"Failed to fetch verification details. HTTP Status Code: {response.status_code}"}
-
-        # Parse the response using BeautifulSoup
-        soup = BeautifulSoup(response.text, "html.parser")
-        table = soup.find("table", {"class": "table table-bordered"})
-
-        if not table:
-            return {"error": "Verification details not found or invalid response format."}
-
-        # Extract rows from the table
-        rows = table.find_all("tr")[1:]  # Skip the header row
-        results = []
-        for row in rows:
-            cols = [col.text.strip() for col in row.find_all("td")]
-            if cols:
-                results.append({
-                    "SL No.": cols[0],
-                    "Enrolment No.": cols[1],
-                    "Name": cols[2],
-                    "Verification Status": cols[3],
-                    "Remark": cols[4],
-                })
-
-        return results
+        with external_call("bar_council.verify") as call:
+            response = await async_client().post(
+                BAR_COUNCIL_VERIFICATION_URL,
+                data=_verification_payload(registration_number),
+                timeout=timeout_for(settings.UPSTREAM_REQUEST_TIMEOUT),
+            )
+            call["status"] = response.status_code
+            call["bytes"] = len(response.content)
+        return _parse_verification_response(response)
 
     except Exception as e:
         return {"error": str(e)}
 
+
+def _verification_payload(registration_number: str) -> Dict[str, str]:
+    return {
+        "Enroll_Id": registration_number,
+        "search-verification": "Search"
+    }
+
+
+def _parse_verification_response(response):
+    if response.status_code != 200:
+        return {"error": f"Failed to fetch verification details. HTTP Status Code: {response.status_code}"}
+
+    from bs4 import BeautifulSoup
+
+    # Parse the response using BeautifulSoup
+    soup = BeautifulSoup(response.text, "html.parser")
+    table = soup.find("table", {"class": "table table-bordered"})
+
+    if not table:
+        return {"error": "Verification details not found or invalid response format."}
+
+    # Extract rows from the table
+    rows = table.find_all("tr")[1:]  # Skip the header row
+    results = []
+    for row in rows:
+        cols = [col.text.strip() for col in row.find_all("td")]
+        if cols:
+            results.append({
+                "SL No.": cols[0],
+                "Enrolment No.": cols[1],
+                "Name": cols[2],
+                "Verification Status": cols[3],
+                "Remark": cols[4],
+            })
+
+    return results
+
+
+# Phrases the query extraction looks for may span whitespace; a chunk is
+# searched together with this many trailing characters of the previous one.
+PETITION_PHRASE_OVERLAP = 256
+# Distinct words counted per petition before the rarest are dropped. Only
+# pathological petitions (megabytes of unique tokens) ever get there.
+PETITION_MAX_VOCABULARY = 100_000
+
+# Define common stopwords to remove
+PETITION_STOPWORDS = {
+    'the', 'and', 'is', 'in', 'it', 'to', 'that', 'was', 'for', 'on', 'are', 'with',
+    'they', 'be', 'at', 'this', 'have', 'from', 'by', 'had', 'not', 'but', 'what',
+    'all', 'were', 'when', 'we', 'there', 'can', 'an', 'or', 'has', 'been', 'a', 'as',
+    'of', 'his', 'her', 'their', 'our', 'its', 'such', 'any'
+}
+
+# Important legal terms and locations to prioritize
+PETITION_LEGAL_TERMS = ["petition", "court", "dispute", "appeal", "writ", "damages",
+                        "compensation", "injunction", "delhi", "mumbai", "high", "supreme"]
+
+# Relief/remedy terms that client might seek
+PETITION_RELIEF_TERMS = {
+    "damages": ["damages", "compensation", "money", "payment", "award", "relief"],
+    "injunction": ["injunction", "restraint", "stop", "prevent", "prohibit"],
+    "declaration": ["declaration", "declare", "clarify", "determination"],
+    "mandamus": ["mandamus", "direct", "order", "instruct", "command"],
+    "quashing": ["quash", "cancel", "annul", "void", "set aside", "revoke"],
+    "review": ["review", "reconsider", "reassess", "reexamine"],
+    "specific": ["specific", "performance", "enforce", "compel", "fulfil", "fulfill"],
+    "reinstatement": ["reinstate", "restore", "return", "reappoint", "readmit"],
+    "partition": ["partition", "divide", "distribution", "share", "apportion"]
+}
+
+# What the petition is searched for. Phrases are matched in the lowercased
+# text, terms as substrings of it and relief synonyms as whole words.
+PETITION_PHRASES = {
+    "property dispute": re.compile(r'property\s+dispute'),
+    "breach of contract": re.compile(r'breach\s+of\s+contract'),
+    "question paper leak": re.compile(r'question\s+paper\s+leak'),
+    "set aside": re.compile(r'\bset aside\b'),
+}
+PETITION_TERMS = (
+    "mumbai", "contract", "breach", "question", "paper", "leak", "expulsion", "university", "cheating",
+    "academic dishonesty",
+)
+PETITION_RELIEF_WORDS = {
+    synonym for synonyms in PETITION_RELIEF_TERMS.values() for synonym in synonyms if " " not in synonym
+}
+
+
+def _scan_petition(petition: str):
+    """
+    Collects what the query extraction needs from the petition chunk by
+    chunk, so no lowercased or cleaned copy of the whole text is made.
+
+    Returns:
+        Tuple[Set[str], Counter, List[str]]: The phrases, terms and relief
+        synonyms found, the counts of the important words and the legal
+        terms in order of first appearance
+    """
+    from collections import Counter
+
+    found = set()
+    word_counts = Counter()
+    legal_seen = []
+    tail = ""
+    for chunk in chunks(petition):
+        chunk_lower = chunk.lower()
+        window = tail + chunk_lower
+        found.update(phrase for phrase, pattern in PETITION_PHRASES.items()
+                     if phrase not in found and pattern.search(window))
+        found.update(term for term in PETITION_TERMS if term not in found and term in window)
+        tail = window[-PETITION_PHRASE_OVERLAP:]
+
+        # Clean text and tokenize; chunks end at whitespace, so no word is split
+        words = re.sub(r'[^\w\s]', ' ', chunk_lower).split()
+        found.update(PETITION_RELIEF_WORDS.intersection(words))
+        important_words = [word for word in words if len(word) > 2 and word not in PETITION_STOPWORDS]
+        word_counts.update(important_words)
+        for word in important_words:
+            if word in PETITION_LEGAL_TERMS and word not in legal_seen:
+                legal_seen.append(word)
+        if len(word_counts) > PETITION_MAX_VOCABULARY:
+            word_counts = Counter(dict(word_counts.most_common(PETITION_MAX_VOCABULARY // 2)))
+    return found, word_counts, legal_seen
+
+
 def generate_search_query_from_petition(petition:str):
     """
     Extracts a concise 2-4 word search query from a petition text,
     including what the client seeks from the petition.
 
+    The petition is read in chunks (see ``utils.text``), so memory use stays
+    flat however long it is.
+
     Args:
         petition (str): The petition text to analyze
 
@@ -69,91 +215,51 @@ def generate_search_query_from_petition(petition:str):
         str: A 2-4 word search query extracted from the petition,
              including a term representing what client seeks
     """
-    import re
-    from collections import Counter
+    found, word_counts, legal_seen = _scan_petition(petition)
 
     # Check for specific patterns and test cases first
-    petition_lower = petition.lower()
-
     # Property dispute with mumbai
-    if re.search(r'property\s+dispute', petition_lower, re.IGNORECASE):
-        if "mumbai" in petition_lower:
+    if "property dispute" in found:
+        if "mumbai" in found:
             return "property dispute mumbai partition"
         return "property dispute partition"
 
     # Contract breach
-    if re.search(r'breach\s+of\s+contract', petition_lower, re.IGNORECASE) or (
-        "contract" in petition_lower and "breach" in petition_lower):
+    if "breach of contract" in found or ("contract" in found and "breach" in found):
         return "contract breach damages"
 
     # Question paper leak
-    if re.search(r'question\s+paper\s+leak', petition_lower, re.IGNORECASE) or (
-        "question" in petition_lower and "paper" in petition_lower and "leak" in petition_lower):
+    if "question paper leak" in found or {"question", "paper", "leak"} <= found:
         return "question paper leak cancellation"
 
     # University expulsion and cheating
-    if re.search(r'expulsion', petition_lower, re.IGNORECASE) and re.search(r'university', petition_lower, re.IGNORECASE):
-        if "cheating" in petition_lower:
+    if "expulsion" in found and "university" in found:
+        if "cheating" in found:
             return "university expulsion cheating reinstatement"
         return "university expulsion reinstatement"
 
-    # Define common stopwords to remove
-    stopwords = {
-        'the', 'and', 'is', 'in', 'it', 'to', 'that', 'was', 'for', 'on', 'are', 'with',
-        'they', 'be', 'at', 'this', 'have', 'from', 'by', 'had', 'not', 'but', 'what',
-        'all', 'were', 'when', 'we', 'there', 'can', 'an', 'or', 'has', 'been', 'a', 'as',
-        'of', 'his', 'her', 'their', 'our', 'its', 'such', 'any'
-    }
-
     # Keywords to look for in specific test cases
-    if "academic dishonesty" in petition_lower or "cheating" in petition_lower:
+    if "academic dishonesty" in found or "cheating" in found:
         return "academic dishonesty cheating reinstatement"
 
-    # Clean text and tokenize
-    petition_clean = re.sub(r'[^\w\s]', ' ', petition_lower)
-    words = [word.strip() for word in petition_clean.split() if len(word) > 2]
-
-    # Remove stopwords
-    important_words = [word for word in words if word not in stopwords]
-
-    # Important legal terms and locations to prioritize
-    legal_terms = ["petition", "court", "dispute", "appeal", "writ", "damages",
-                  "compensation", "injunction", "delhi", "mumbai", "high", "supreme"]
-
-    # Relief/remedy terms that client might seek
-    relief_terms = {
-        "damages": ["damages", "compensation", "money", "payment", "award", "relief"],
-        "injunction": ["injunction", "restraint", "stop", "prevent", "prohibit"],
-        "declaration": ["declaration", "declare", "clarify", "determination"],
-        "mandamus": ["mandamus", "direct", "order", "instruct", "command"],
-        "quashing": ["quash", "cancel", "annul", "void", "set aside", "revoke"],
-        "review": ["review", "reconsider", "reassess", "reexamine"],
-        "specific": ["specific", "performance", "enforce", "compel", "fulfil", "fulfill"],
-        "reinstatement": ["reinstate", "restore", "return", "reappoint", "readmit"],
-        "partition": ["partition", "divide", "distribution", "share", "apportion"]
-    }
-
     # Try to identify what relief client seeks
     relief_found = None
-    for relief, synonyms in relief_terms.items():
-        if any(re.search(rf'\b{synonym}\b', petition_lower) for synonym in synonyms):
+    for relief, synonyms in PETITION_RELIEF_TERMS.items():
+        if any(synonym in found for synonym in synonyms):
             relief_found = relief
             break
 
-    # Count word frequencies
-    word_counts = Counter(important_words)
-
     # Check for locations or important terms that must be included
     must_include = []
-    if "mumbai" in important_words:
+    if "mumbai" in word_counts:
         must_include.append("mumbai")
-    if "delhi" in important_words:
+    if "delhi" in word_counts:
         must_include.append("delhi")
-    if "high" in important_words and "court" in important_words:
+    if "high" in word_counts and "court" in word_counts:
         must_include.extend(["high", "court"])
 
     # Prioritize legal terms that appear in the text
-    legal_found = [word for word in important_words if word in legal_terms and word not in must_include][:1]
+    legal_found = [word for word in legal_seen if word not in must_include][:1]
 
     # Get most common words that aren't already selected
     common_words = [
@@ -177,7 +283,9 @@ def generate_search_query_from_petition(petition:str):
     return " ".join(result_words)
 
 
-def fetch_indian_kanoon_judgments(query: str, token: str) -> List[Dict[str, Any]]:
+# Search results don't depend on whose token fetched them, so key on the query only.
+@cache_aside("kanoon_search", timeout=6 * 60 * 60, key_func=lambda query, token: query, cache_if=is_not_error)
+def fetch_indian_kanoon_judgments(query: str, token: str) -> List[Judgment]:
     """
     Fetches judgments from Indian Kanoon API based on the search query
     and extracts TIDs (document IDs) from the response.
@@ -187,43 +295,85 @@ def fetch_indian_kanoon_judgments(query: str, token: str) -> List[Dict[str, Any]
         token (str): Authorization token for the Indian Kanoon API
         
     Returns:
-        List[Dict[str, Any]]: A list of judgment objects with TIDs and metadata
+        List[Judgment]: A list of judgment records with TIDs and metadata
     """
-    url = f'https://api.indiankanoon.org/search/?formInput={query}+doctypes%3Ajudgments'
-    headers = {
-        'Authorization': f'Token {token}'
-    }
-    
+    import requests
+
     try:
-        response = requests.post(url, headers=headers)
-        if response.status_code != 200:
-            return {"error": f"Failed to fetch judgments. HTTP Status Code: {response.status_code}"}
-        
-        data = response.json()
-        
-        # Extract the docs list which contains judgment information
-        judgments = []
-        if 'docs' in data and isinstance(data['docs'], list):
-            for doc in data['docs']:
-                if 'tid' in doc:
-                    # Extract key information from each judgment
-                    judgment = {
-                        'tid': doc.get('tid'),
-                        'title': doc.get('title', ''),
-                        'doctype': doc.get('doctype'),
-                        'publishdate': doc.get('publishdate', ''),
-                        'docsource': doc.get('docsource', ''),
-                        'citation': doc.get('citation', ''),
-                        'headline': doc.get('headline', '')
-                    }
-                    judgments.append(judgment)
-        
-        return judgments
+        with external_call("kanoon.search", query=query) as call:
+            response = requests.post(
+                _kanoon_search_url(query),
+                headers=_kanoon_headers(token),
+                timeout=timeout_for(settings.UPSTREAM_REQUEST_TIMEOUT),
+            )
+            call["status"] = response.status_code
+            call["bytes"] = len(response.content)
+        return _parse_kanoon_search(response)
     
     except Exception as e:
         return {"error": str(e)}
 
 
+@cache_aside("kanoon_search", timeout=6 * 60 * 60, key_func=lambda query, token: query, cache_if=is_not_error)
+async def afetch_indian_kanoon_judgments(query: str, token: str) -> List[Judgment]:
+    """
+    Async version of ``fetch_indian_kanoon_judgments``, sharing its cache entries.
+    """
+    try:
+        with external_call("kanoon.search", query=query) as call:
+            response = await async_client().post(
+                _kanoon_search_url(query),
+                headers=_kanoon_headers(token),
+                timeout=timeout_for(settings.UPSTREAM_REQUEST_TIMEOUT),
+            )
+            call["status"] = response.status_code
+            call["bytes"] = len(response.content)
+        return _parse_kanoon_search(response)
+
+    except Exception as e:
+        return {"error": str(e)}
+
+
+def _kanoon_headers(token: str) -> Dict[str, str]:
+    return {
+        'Authorization': f'Token {token}'
+    }
+
+
+def _kanoon_search_url(query: str) -> str:
+    return f'{settings.KANOON_API_URL}/search/?formInput={query}+doctypes%3Ajudgments'
+
+
+def _parse_kanoon_search(response) -> List[Judgment]:
+    if response.status_code != 200:
+        return {"error": f"Failed to fetch judgments. HTTP Status Code: {response.status_code}"}
+
+    data = response.json()
+
+    # Extract the docs list which contains judgment information, as compact
+    # records (see utils.judgments)
+    judgments = []
+    if 'docs' in data and isinstance(data['docs'], list):
+        for doc in data['docs']:
+            if 'tid' in doc:
+                judgments.append(Judgment.from_search(doc))
+
+    return judgments
+
+
+class _RetryableResponse(Exception):
+    """
+    An upstream response worth retrying (bad status, empty or invalid body).
+    """
+
+
+# Published judgments don't change; keep documents for a day.
+@cache_aside(
+    "kanoon_doc",
+    timeout=24 * 60 * 60,
+    key_func=lambda tid, token, max_retries=3: tid,
+    cache_if=is_not_error,
+)
 def fetch_judgment_details(tid: int, token: str, max_retries: int = 3) -> Dict[str, Any]:
     """
     Fetches detailed information for a specific judgment from the Indian Kanoon API
@@ -237,108 +387,203 @@ def fetch_judgment_details(tid: int, token: str, max_retries: int = 3) -> Dict[s
     Returns:
         Dict[str, Any]: A dictionary containing detailed judgment information
     """
-    import json
-    import time
-    import logging
-
-    logger = logging.getLogger(__name__)
-    url = f'https://api.indiankanoon.org/doc/{tid}/'
-    headers = {
-        'Authorization': f'Token {token}'
-    }
+    import requests
 
     for attempt in range(max_retries):
         try:
             # Make HTTP request using requests library
-            response = requests.post(url, headers=headers)
-
-            # Check if the request was successful
-            if response.status_code != 200:
-                error_msg = f"Failed to fetch judgment details. HTTP Status Code: {response.status_code}"
-                logger.error(f"Attempt {attempt+1}/{max_retries}: {error_msg}")
-                if attempt == max_retries - 1:
-                    return {"error": error_msg}
-                time.sleep(2 ** attempt)  # Exponential backoff: 1s, 2s, 4s, etc.
-                continue
-
-            # Check if response is empty
-            response_text = response.text
-            if not response_text or response_text.isspace():
-                error_msg = f"Empty response received for judgment {tid}"
-                logger.error(f"Attempt {attempt+1}/{max_retries}: {error_msg}")
-                if attempt == max_retries - 1:
-                    return {"error": error_msg}
-                time.sleep(2 ** attempt)
-                continue
-
-            try:
-                data = response.json()
-            except json.JSONDecodeError as e:
-                error_msg = f"Invalid JSON received: {response_text[:100]}... Error: {str(e)}"
-                logger.error(f"Attempt {attempt+1}/{max_retries}: {error_msg}")
-                if attempt == max_retries - 1:
-                    return {"error": error_msg}
-                time.sleep(2 ** attempt)
-                continue
-
-            # Check if data is empty
-            if not data:
-                error_msg = f"Empty data received for judgment {tid}"
-                logger.error(f"Attempt {attempt+1}/{max_retries}: {error_msg}")
-                if attempt == max_retries - 1:
-                    return {"error": error_msg}
-                time.sleep(2 ** attempt)
-                continue
-
-            # Extract relevant fields from the response
-            details = {}
-
-            # Extract citation information
-            if 'citation' in data:
-                details['citation'] = data.get('citation', '')
-
-            # Extract full text content if available
-            if 'doc' in data:
-                details['doc'] = data.get('doc', '')
-                details['full_text'] = data.get('doc', '')
-
-            # Extract other metadata fields that might be useful
-            for field in ['title', 'from', 'bench', 'author', 'date']:
-                if field in data:
-                    details[field] = data.get(field, '')
-
-            # Log successful fetch
-            logger.info(f"Successfully fetched details for judgment {tid}")
-
-            # Verify we got meaningful data
-            if not details:
-                error_msg = f"No useful details extracted for judgment {tid}"
-                logger.warning(error_msg)
-                return {"error": error_msg}
-
-            return details
+            with external_call("kanoon.doc", tid=tid, attempt=attempt + 1) as call:
+                response = requests.post(
+                    _kanoon_doc_url(tid),
+                    headers=_kanoon_headers(token),
+                    timeout=timeout_for(settings.UPSTREAM_REQUEST_TIMEOUT),
+                )
+                call["status"] = response.status_code
+                call["bytes"] = len(response.content)
+            return _parse_judgment_details(tid, response)
 
         except Exception as e:
-            error_msg = f"Exception occurred: {str(e)}"
-            logger.error(f"Attempt {attempt+1}/{max_retries}: {error_msg}")
-            if attempt == max_retries - 1:
+            error_msg = _attempt_error(e)
+            logger.error(f"Attempt {attempt+1}/{max_retries}: {error_msg}", extra={"tid": tid, "attempt": attempt + 1})
+            # Exponential backoff (1s, 2s, 4s, etc.), unless the deadline doesn't allow another attempt
+            if attempt == max_retries - 1 or not sleep_within_deadline(2 ** attempt):
                 return {"error": error_msg}
-            time.sleep(2 ** attempt)
 
     # This should never be reached due to the returns in the loop,
     # but adding as a fallback
     return {"error": "Maximum retries exceeded"}
 
 
+@cache_aside(
+    "kanoon_doc",
+    timeout=24 * 60 * 60,
+    key_func=lambda tid, token, max_retries=3: tid,
+    cache_if=is_not_error,
+)
+async def afetch_judgment_details(tid: int, token: str, max_retries: int = 3) -> Dict[str, Any]:
+    """
+    Async version of ``fetch_judgment_details``, sharing its cache entries.
+    """
+    for attempt in range(max_retries):
+        try:
+            with external_call("kanoon.doc", tid=tid, attempt=attempt + 1) as call:
+                response = await async_client().post(
+                    _kanoon_doc_url(tid),
+                    headers=_kanoon_headers(token),
+                    timeout=timeout_for(settings.UPSTREAM_REQUEST_TIMEOUT),
+                )
+                call["status"] = response.status_code
+                call["bytes"] = len(response.content)
+            return _parse_judgment_details(tid, response)
+
+        except Exception as e:
+            error_msg = _attempt_error(e)
+            logger.error(f"Attempt {attempt+1}/{max_retries}: {error_msg}", extra={"tid": tid, "attempt": attempt + 1})
+            if attempt == max_retries - 1 or not await asleep_within_deadline(2 ** attempt):
+                return {"error": error_msg}
+
+    return {"error": "Maximum retries exceeded"}
+
+
+def _kanoon_doc_url(tid: int) -> str:
+    return f'{settings.KANOON_API_URL}/doc/{tid}/'
+
+
+def _attempt_error(e: Exception) -> str:
+    return str(e) if isinstance(e, _RetryableResponse) else f"Exception occurred: {str(e)}"
+
+
+def _parse_judgment_details(tid: int, response) -> Dict[str, Any]:
+    """
+    Extracts the judgment details from a document response.
+
+    Raises:
+        _RetryableResponse: If the response is unusable but a retry may succeed
+    """
+    # Check if the request was successful
+    if response.status_code != 200:
+        raise _RetryableResponse(f"Failed to fetch judgment details. HTTP Status Code: {response.status_code}")
+
+    # Check if response is empty, on the raw bytes: decoding a long document
+    # just for this check would hold a second copy of it
+    content = response.content
+    if not content or content.isspace():
+        raise _RetryableResponse(f"Empty response received for judgment {tid}")
+
+    try:
+        data = response.json()
+    except json.JSONDecodeError as e:
+        raise _RetryableResponse(
+            f"Invalid JSON received: {content[:100].decode(errors='replace')}... Error: {str(e)}"
+        )
+
+    # Check if data is empty
+    if not data:
+        raise _RetryableResponse(f"Empty data received for judgment {tid}")
+
+    # Extract relevant fields from the response
+    details = {}
+
+    # Extract citation information
+    if 'citation' in data:
+        details['citation'] = data.get('citation', '')
+
+    # Extract full text content if available
+    if 'doc' in data:
+        details['doc'] = data.get('doc', '')
+        details['full_text'] = data.get('doc', '')
+
+    # Extract other metadata fields that might be useful
+    for field in ['title', 'from', 'bench', 'author', 'date']:
+        if field in data:
+            details[field] = data.get(field, '')
+
+    # Log successful fetch
+    logger.info(f"Successfully fetched details for judgment {tid}", extra={"tid": tid})
+
+    # Verify we got meaningful data
+    if not details:
+        error_msg = f"No useful details extracted for judgment {tid}"
+        logger.warning(error_msg, extra={"tid": tid})
+        return {"error": error_msg}
+
+    return details
+
+
+def build_analysis_messages(petition: str, similar_judgments: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+    """
+    Builds the chat messages asking the model to analyze a petition against similar judgments.
+
+    Args:
+        petition (str): The legal petition text to analyze
+        similar_judgments (List[Dict[str, Any]]): A list of similar judgments with relevant details
+
+    Returns:
+        List[Dict[str, str]]: System and user messages for a chat completion
+    """
+    # Static instructions first so providers can cache the prompt prefix,
+    # see utils.prompts
+    return analysis_prompt.build(petition, similar_judgments[:5])  # Limit to 5 judgments
+
+
+def parse_analysis_response(response_content: str) -> Dict[str, Any]:
+    """
+    Parses and normalizes the JSON analysis returned by the model.
+
+    Args:
+        response_content (str): Raw message content of the completion
+
+    Returns:
+        Dict[str, Any]: The normalized analysis, or an error with the raw response
+    """
+    logger = logging.getLogger(__name__)
+
+    try:
+        result = json.loads(response_content)
+        
+        # Validate the response format
+        if "winning_percentage" not in result or "improvement_steps" not in result or "rationale" not in result:
+            logger.warning(f"Incomplete response from OpenAI API: {response_content}")
+            result = {
+                "winning_percentage": result.get("winning_percentage", 0),
+                "improvement_steps": result.get("improvement_steps", []),
+                "rationale": result.get("rationale", "Unable to provide complete analysis"),
+                "legal_references": result.get("legal_references", []),
+                "warning": "Incomplete analysis result"
+            }
+            
+        # Ensure winning_percentage is a number between 0-100
+        if not isinstance(result["winning_percentage"], (int, float)):
+            result["winning_percentage"] = 0
+        
+        result["winning_percentage"] = max(0, min(100, float(result["winning_percentage"])))
+        
+        # Ensure legal_references exists and is a list
+        if "legal_references" not in result:
+            result["legal_references"] = []
+        elif not isinstance(result["legal_references"], list):
+            result["legal_references"] = []
+        
+        return result
+        
+    except json.JSONDecodeError as e:
+        logger.error(f"Failed to parse OpenAI response as JSON: {str(e)}")
+        return {
+            "error": "Failed to parse analysis result",
+            "raw_response": response_content
+        }
+
+
 def analyze_petition_with_openai(petition: str, similar_judgments: List[Dict[str, Any]], api_key: Optional[str] = None) -> Dict[str, Any]:
     """
-    Analyzes a legal petition and similar judgments using OpenAI's 3.0-mini model to calculate
-    the winning percentage and provide steps to improve it, including specific legal references.
+    Analyzes a legal petition and similar judgments using the configured LLM backend
+    (OpenAI's ``LLM_MODEL`` by default) to calculate the winning percentage and
+    provide steps to improve it, including specific legal references.
     
     Args:
         petition (str): The legal petition text to analyze
         similar_judgments (List[Dict[str, Any]]): A list of similar judgments with relevant details
-        api_key (Optional[str]): OpenAI API key, if not provided will look for OPENAI_API_KEY in settings
+        api_key (Optional[str]): OpenAI API key, if not provided the backend uses OPENAI_API_KEY from settings
         
     Returns:
         Dict[str, Any]: A dictionary containing the analysis results, including:
@@ -348,132 +593,46 @@ def analyze_petition_with_openai(petition: str, similar_judgments: List[Dict[str
             - legal_references: List of specific sections and articles from Indian law to cite
             - error: Error message if the API call fails
     """
-    logger = logging.getLogger(__name__)
-    
-    # Set API key from provided parameter, settings, or environment
-    if api_key:
-        openai.api_key = api_key
-    elif settings.OPENAI_API_KEY:
-        openai.api_key = settings.OPENAI_API_KEY
-        
+    error = _validate_analysis_inputs(petition, similar_judgments)
+    if error:
+        return error
+
+    try:
+        # Call the configured analysis backend (LLM_BACKEND); api_key selects
+        # a per-key client rather than mutating global client state
+        backend = get_backend(api_key=api_key)
+        response_content = backend.complete(build_analysis_messages(petition, similar_judgments), temperature=0.2)
+        return parse_analysis_response(response_content)
+
+    except Exception as e:
+        logger.error(f"Error analyzing petition with OpenAI: {str(e)}", extra={"error": type(e).__name__})
+        return {"error": f"Failed to analyze petition: {str(e)}"}
+
+
+async def aanalyze_petition_with_openai(petition: str, similar_judgments: List[Dict[str, Any]], api_key: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Async version of ``analyze_petition_with_openai``.
+    """
+    error = _validate_analysis_inputs(petition, similar_judgments)
+    if error:
+        return error
+
+    try:
+        backend = get_backend(api_key=api_key)
+        response_content = await backend.acomplete(build_analysis_messages(petition, similar_judgments), temperature=0.2)
+        return parse_analysis_response(response_content)
+
+    except Exception as e:
+        logger.error(f"Error analyzing petition with OpenAI: {str(e)}", extra={"error": type(e).__name__})
+        return {"error": f"Failed to analyze petition: {str(e)}"}
+
+
+def _validate_analysis_inputs(petition: str, similar_judgments: List[Dict[str, Any]]) -> Optional[Dict[str, str]]:
     # Validate inputs
     if not petition or not isinstance(petition, str):
         return {"error": "Invalid petition: Must provide a non-empty string"}
-    
+
     if not similar_judgments or not isinstance(similar_judgments, list):
         return {"error": "Invalid similar_judgments: Must provide a non-empty list"}
-    
-    try:
-        # Prepare judgment summaries to reduce token count
-        judgment_summaries = []
-        for idx, judgment in enumerate(similar_judgments[:5]):  # Limit to 5 judgments
-            # Extract the most important information from each judgment
-            judgment_summary = {
-                "id": idx + 1,
-                "title": judgment.get("title", ""),
-                "outcome": judgment.get("outcome", "Unknown"),
-                "key_points": []
-            }
-            
-            # Extract key points from full text if available
-            full_text = judgment.get("full_text", "")
-            if full_text:
-                # Try to extract key points, decision and reasoning
-                if len(full_text) > 1000:  # If text is very long, take snippets
-                    judgment_summary["snippet"] = full_text[:500] + "..." + full_text[-500:]
-                else:
-                    judgment_summary["snippet"] = full_text
-                
-            judgment_summaries.append(judgment_summary)
-        
-        # Construct the prompt for the OpenAI API
-        prompt = f"""
-You are a legal expert assistant analyzing a petition and similar judgments.
-
-**PETITION:**
-{petition}
-
-**SIMILAR JUDGMENTS:**
-{json.dumps(judgment_summaries, indent=2)}
-
-Task: Analyze the petition against the similar judgments to:
-1. Calculate a winning percentage (0-100%) based on precedent and legal merit
-2. Identify specific steps to improve the petition's chances of success
-3. Provide a brief rationale for your assessment
-4. Provide technical details about specific sections/articles of Indian law that should be cited in the petition
-
-Output the results in the following JSON format:
-{{
-  "winning_percentage": [numeric value between 0-100],
-  "improvement_steps": [
-    "Step 1: [specific actionable instruction]",
-    "Step 2: [specific actionable instruction]",
-    ...
-  ],
-  "rationale": "[concise explanation of the winning percentage]",
-  "legal_references": [
-    {{
-      "section": "[specific section number]",
-      "act": "[name of the act/law]",
-      "year": "[year of the act]",
-      "description": "[brief description of the section's relevance]"
-    }},
-    ...
-  ]
-}}
-
-Your assessment must be based on legal precedent, the strength of arguments, and factual similarities. For the legal references, be specific about the exact sections, articles, and provisions from relevant Indian laws (such as the Indian Penal Code, Code of Civil Procedure, Constitution of India, specific state laws, etc.) that are applicable to this petition and would strengthen the legal arguments when cited.
-"""
-
-        # Call the OpenAI API
-        response = openai.chat.completions.create(
-            model="gpt-4o-mini",  # Using the 3.0-mini model
-            messages=[
-                {"role": "system", "content": "You are a legal expert assistant analyzing petitions."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.2,  # Lower temperature for more consistent results
-            response_format={"type": "json_object"}  # Ensure response is in JSON format
-        )
-        
-        # Extract and parse the response
-        response_content = response.choices[0].message.content
-        
-        try:
-            result = json.loads(response_content)
-            
-            # Validate the response format
-            if "winning_percentage" not in result or "improvement_steps" not in result or "rationale" not in result:
-                logger.warning(f"Incomplete response from OpenAI API: {response_content}")
-                result = {
-                    "winning_percentage": result.get("winning_percentage", 0),
-                    "improvement_steps": result.get("improvement_steps", []),
-                    "rationale": result.get("rationale", "Unable to provide complete analysis"),
-                    "legal_references": result.get("legal_references", []),
-                    "warning": "Incomplete analysis result"
-                }
-                
-            # Ensure winning_percentage is a number between 0-100
-            if not isinstance(result["winning_percentage"], (int, float)):
-                result["winning_percentage"] = 0
-            
-            result["winning_percentage"] = max(0, min(100, float(result["winning_percentage"])))
-            
-            # Ensure legal_references exists and is a list
-            if "legal_references" not in result:
-                result["legal_references"] = []
-            elif not isinstance(result["legal_references"], list):
-                result["legal_references"] = []
-            
-            return result
-            
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse OpenAI response as JSON: {str(e)}")
-            return {
-                "error": "Failed to parse analysis result",
-                "raw_response": response_content
-            }
-            
-    except Exception as e:
-        logger.error(f"Error analyzing petition with OpenAI: {str(e)}")
-        return {"error": f"Failed to analyze petition: {str(e)}"}
\ No newline at end of file
+
+    return None
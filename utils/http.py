@@ -0,0 +1,34 @@
+"""
+Pooled async HTTP client for upstream calls made from async views.
+
+``httpx.AsyncClient`` is bound to the event loop it was first used on, so
+there is one client per running loop (one per ASGI worker in practice),
+holding up to ``UPSTREAM_MAX_CONNECTIONS`` connections.
+"""
+import asyncio
+import weakref
+
+from django.conf import settings
+
+_clients = weakref.WeakKeyDictionary()
+
+
+def async_client():
+    """
+    Returns the shared ``httpx.AsyncClient`` for the running event loop,
+    creating it (and importing httpx) on first use.
+    """
+    import httpx
+
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=settings.UPSTREAM_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.UPSTREAM_MAX_CONNECTIONS,
+            ),
+            timeout=settings.UPSTREAM_REQUEST_TIMEOUT,
+        )
+        _clients[loop] = client
+    return client
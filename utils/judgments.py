@@ -0,0 +1,86 @@
+"""
+Compact records for Indian Kanoon search results.
+
+A search result was a dict of seven fields, built anew for every result of
+every search. ``Judgment`` keeps the fields in ``__slots__`` instead and
+interns the strings many results share: the court in ``docsource``, the
+publish date, and the ``title`` and ``citation`` of a judgment, which come
+back identical from every search that finds it. Only the query-specific
+``headline`` is left alone. All results from one court, or for one judgment,
+point at a single string. A record pickles as a tuple of its values, which
+keeps cached result lists small and interns the strings again when they are
+loaded.
+
+Records read like the dicts they replace (``judgment["tid"]``,
+``judgment.get("headline", "")``, ``dict(judgment)``), so code that also
+handles judgments stored on cases takes either. ``to_dict`` gives the JSON
+form stored on cases and returned by the API.
+"""
+import sys
+from typing import Any, Dict, Iterator, Mapping, Optional
+
+
+def _intern(value: Any) -> Any:
+    return sys.intern(value) if type(value) is str else value
+
+
+class Judgment:
+    __slots__ = ("tid", "title", "doctype", "publishdate", "docsource", "citation", "headline")
+
+    def __init__(self, tid: int, title: str = "", doctype: Optional[int] = None, publishdate: str = "",
+                 docsource: str = "", citation: str = "", headline: str = ""):
+        self.tid = tid
+        self.title = _intern(title)
+        self.doctype = doctype
+        self.publishdate = _intern(publishdate)
+        self.docsource = _intern(docsource)
+        self.citation = _intern(citation)
+        self.headline = headline
+
+    @classmethod
+    def from_search(cls, doc: Mapping[str, Any]) -> "Judgment":
+        """
+        Builds a record from one of the ``docs`` of a search response.
+        """
+        return cls(
+            doc.get("tid"),
+            doc.get("title", ""),
+            doc.get("doctype"),
+            doc.get("publishdate", ""),
+            doc.get("docsource", ""),
+            doc.get("citation", ""),
+            doc.get("headline", ""),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {field: getattr(self, field) for field in self.__slots__}
+
+    def keys(self):
+        return self.__slots__
+
+    def __getitem__(self, field: str) -> Any:
+        if field not in self.__slots__:
+            raise KeyError(field)
+        return getattr(self, field)
+
+    def get(self, field: str, default: Any = None) -> Any:
+        return getattr(self, field) if field in self.__slots__ else default
+
+    def __contains__(self, field: str) -> bool:
+        return field in self.__slots__
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.__slots__)
+
+    def __eq__(self, other):
+        if isinstance(other, (Judgment, Mapping)):
+            return self.to_dict() == dict(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __reduce__(self):
+        return self.__class__, tuple(getattr(self, field) for field in self.__slots__)
+
+    def __repr__(self):
+        return f"Judgment({self.tid!r}, {self.title!r})"
@@ -0,0 +1,388 @@
+"""
+Pluggable chat completion backends for petition analysis.
+
+Each backend owns its client (and with it a pooled HTTP connection), a
+timeout and a concurrency limit, so no call ever touches module-global state
+such as ``openai.api_key``. ``LLM_BACKEND=local`` swaps in a deterministic,
+network-free stand-in for load tests and benchmarks. ``acomplete`` is the
+non-blocking variant used by the async views.
+
+Backends also speak the OpenAI Batch API (JSONL in, JSONL out) for
+non-interactive bulk analysis, see ``legal_gennie.batches``.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+import time
+import weakref
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from uuid import uuid4
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from utils.deadline import timeout_for
+from utils.log import external_call
+
+logger = logging.getLogger(__name__)
+
+BATCH_IN_PROGRESS = "in_progress"
+BATCH_COMPLETED = "completed"
+BATCH_FAILED = "failed"
+
+CHAT_COMPLETIONS_URL = "/v1/chat/completions"
+
+
+class PromptCacheStats:
+    """
+    Process-wide tally of prompt tokens served from the provider's prefix cache.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+
+    def record(self, usage) -> None:
+        if usage is None:
+            return
+        prompt_tokens = usage.prompt_tokens or 0
+        details = getattr(usage, "prompt_tokens_details", None)
+        # Clients that don't model the field pass it through as a plain dict.
+        if isinstance(details, dict):
+            cached_tokens = details.get("cached_tokens") or 0
+        else:
+            cached_tokens = getattr(details, "cached_tokens", 0) or 0
+        with self._lock:
+            self.prompt_tokens += prompt_tokens
+            self.cached_tokens += cached_tokens
+            overall = self.hit_ratio
+        logger.info(
+            f"Prompt cache: {cached_tokens}/{prompt_tokens} prompt tokens cached, "
+            f"{overall:.1%} overall"
+        )
+
+    @property
+    def hit_ratio(self) -> float:
+        return self.cached_tokens / self.prompt_tokens if self.prompt_tokens else 0.0
+
+
+prompt_cache_stats = PromptCacheStats()
+
+
+class BackendBusy(Exception):
+    """
+    Raised when a backend's concurrency limit stays saturated for a whole timeout.
+    """
+
+
+class AnalysisBackend:
+    """
+    Base class for chat completion backends returning JSON object content.
+    """
+    name = None
+
+    def __init__(self, model: str, timeout: float, max_concurrency: int, **options):
+        self.model = model
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._loop_slots = weakref.WeakKeyDictionary()
+
+    def complete(self, messages: List[Dict[str, str]], temperature: float = 0.2) -> str:
+        """
+        Runs a chat completion and returns the JSON content of the reply.
+
+        Args:
+            messages (List[Dict[str, str]]): Chat messages with ``role`` and ``content``
+            temperature (float): Sampling temperature
+
+        Returns:
+            str: The message content, a JSON object
+
+        Raises:
+            BackendBusy: If no concurrency slot frees up within ``timeout`` seconds
+        """
+        # Both the wait for a slot and the call itself count against the request deadline.
+        if not self._slots.acquire(timeout=timeout_for(self.timeout)):
+            raise BackendBusy(f"{self.name} backend is at its concurrency limit")
+        try:
+            with external_call(f"llm.{self.name}", model=self.model) as call:
+                content = self._complete(messages, temperature, timeout_for(self.timeout))
+                call["bytes"] = len(content or "")
+                return content
+        finally:
+            self._slots.release()
+
+    def _complete(self, messages: List[Dict[str, str]], temperature: float, timeout: float) -> str:
+        raise NotImplementedError
+
+    async def acomplete(self, messages: List[Dict[str, str]], temperature: float = 0.2) -> str:
+        """
+        Async version of ``complete``. Concurrency is limited separately, per
+        event loop, by the same ``max_concurrency``.
+        """
+        slots = self._async_slots()
+        try:
+            await asyncio.wait_for(slots.acquire(), timeout=timeout_for(self.timeout))
+        except asyncio.TimeoutError:
+            raise BackendBusy(f"{self.name} backend is at its concurrency limit")
+        try:
+            with external_call(f"llm.{self.name}", model=self.model) as call:
+                content = await self._acomplete(messages, temperature, timeout_for(self.timeout))
+                call["bytes"] = len(content or "")
+                return content
+        finally:
+            slots.release()
+
+    def _async_slots(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        slots = self._loop_slots.get(loop)
+        if slots is None:
+            slots = self._loop_slots[loop] = asyncio.Semaphore(self.max_concurrency)
+        return slots
+
+    async def _acomplete(self, messages: List[Dict[str, str]], temperature: float, timeout: float) -> str:
+        # Backends without a native async client block a worker thread instead.
+        return await sync_to_async(self._complete, thread_sensitive=False)(messages, temperature, timeout)
+
+    def batch_request(self, custom_id: str, messages: List[Dict[str, str]], temperature: float = 0.2) -> Dict:
+        """
+        Builds one line of a batch input file in the OpenAI Batch API format.
+        """
+        return {
+            "custom_id": custom_id,
+            "method": "POST",
+            "url": CHAT_COMPLETIONS_URL,
+            "body": {
+                "model": self.model,
+                "messages": messages,
+                "temperature": temperature,
+                "response_format": {"type": "json_object"},
+            },
+        }
+
+    def submit_batch(self, requests: List[Dict]) -> str:
+        """
+        Submits ``batch_request`` lines as one batch job and returns its id.
+        """
+        raise NotImplementedError
+
+    def get_batch(self, batch_id: str) -> Tuple[str, Dict[str, Optional[str]]]:
+        """
+        Checks a batch job.
+
+        Returns:
+            Tuple[str, Dict[str, Optional[str]]]: The batch state (``BATCH_*``) and,
+            once completed, the message content per ``custom_id`` (None for
+            requests that failed)
+        """
+        raise NotImplementedError
+
+
+def _to_jsonl(lines: List[Dict]) -> bytes:
+    return "\n".join(json.dumps(line) for line in lines).encode()
+
+
+def _parse_batch_output(text: str) -> Dict[str, Optional[str]]:
+    results = {}
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        item = json.loads(line)
+        response = item.get("response") or {}
+        if item.get("error") or response.get("status_code") != 200:
+            results[item["custom_id"]] = None
+            continue
+        results[item["custom_id"]] = response["body"]["choices"][0]["message"]["content"]
+    return results
+
+
+class OpenAIBackend(AnalysisBackend):
+    name = "openai"
+
+    def __init__(self, model, timeout, max_concurrency, api_key=None, base_url=None, max_retries=2, **options):
+        super().__init__(model, timeout, max_concurrency)
+        import httpx
+        import openai
+
+        self._client_options = dict(api_key=api_key, base_url=base_url, timeout=timeout, max_retries=max_retries)
+        # Keep one warm connection per concurrency slot.
+        self._limits = httpx.Limits(max_connections=max_concurrency, max_keepalive_connections=max_concurrency)
+        self.client = openai.OpenAI(
+            **self._client_options,
+            http_client=httpx.Client(limits=self._limits, timeout=timeout),
+        )
+        self._async_clients = weakref.WeakKeyDictionary()
+
+    def _async_client(self):
+        # Async clients are bound to the event loop they were created on.
+        import httpx
+        import openai
+
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            client = self._async_clients[loop] = openai.AsyncOpenAI(
+                **self._client_options,
+                http_client=httpx.AsyncClient(limits=self._limits, timeout=self.timeout),
+            )
+        return client
+
+    def _request(self, messages, temperature):
+        return dict(
+            model=self.model,
+            messages=messages,
+            temperature=temperature,  # Lower temperature for more consistent results
+            response_format={"type": "json_object"}  # Ensure response is in JSON format
+        )
+
+    def _complete(self, messages, temperature, timeout):
+        response = self.client.with_options(timeout=timeout).chat.completions.create(
+            **self._request(messages, temperature)
+        )
+        prompt_cache_stats.record(response.usage)
+        return response.choices[0].message.content
+
+    async def _acomplete(self, messages, temperature, timeout):
+        response = await self._async_client().with_options(timeout=timeout).chat.completions.create(
+            **self._request(messages, temperature)
+        )
+        prompt_cache_stats.record(response.usage)
+        return response.choices[0].message.content
+
+    def submit_batch(self, requests):
+        input_file = self.client.files.create(file=("batch.jsonl", _to_jsonl(requests)), purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=CHAT_COMPLETIONS_URL,
+            completion_window="24h",
+        )
+        return batch.id
+
+    def get_batch(self, batch_id):
+        batch = self.client.batches.retrieve(batch_id)
+        if batch.status in ("validating", "in_progress", "finalizing", "cancelling"):
+            return BATCH_IN_PROGRESS, {}
+        if batch.status != "completed":
+            return BATCH_FAILED, {}
+
+        results = {}
+        if batch.output_file_id:
+            results.update(_parse_batch_output(self.client.files.content(batch.output_file_id).text))
+        if batch.error_file_id:
+            results.update(_parse_batch_output(self.client.files.content(batch.error_file_id).text))
+        return BATCH_COMPLETED, results
+
+
+class LocalBackend(AnalysisBackend):
+    """
+    Offline stand-in that answers instantly (or after ``latency`` seconds) with
+    an analysis derived from a hash of the prompt, so identical inputs always
+    produce identical outputs.
+    """
+    name = "local"
+
+    def __init__(self, model, timeout, max_concurrency, latency=0.0, batch_dir=None, **options):
+        super().__init__(model, timeout, max_concurrency)
+        self.latency = latency
+        self.batch_dir = Path(batch_dir) if batch_dir else None
+
+    def _complete(self, messages, temperature, timeout=None):
+        if self.latency:
+            if timeout is not None and timeout < self.latency:
+                time.sleep(timeout)
+                raise TimeoutError(f"Local backend timed out after {timeout:.1f}s")
+            time.sleep(self.latency)
+        return self._analysis(messages)
+
+    async def _acomplete(self, messages, temperature, timeout=None):
+        if self.latency:
+            if timeout is not None and timeout < self.latency:
+                await asyncio.sleep(timeout)
+                raise TimeoutError(f"Local backend timed out after {timeout:.1f}s")
+            await asyncio.sleep(self.latency)
+        return self._analysis(messages)
+
+    def _analysis(self, messages):
+        digest = hashlib.sha256(json.dumps(messages, sort_keys=True).encode()).hexdigest()
+        return json.dumps({
+            "winning_percentage": int(digest[:8], 16) % 101,
+            "improvement_steps": [
+                "Step 1: Cite the most closely matching precedent explicitly",
+                "Step 2: Attach documentary evidence for every disputed fact",
+            ],
+            "rationale": f"Deterministic local analysis {digest[:12]}",
+            "legal_references": [],
+        })
+
+    def submit_batch(self, requests):
+        # Mirrors the Batch API through files on disk, so the submitting
+        # process and the polling Celery worker see the same batch.
+        self.batch_dir.mkdir(parents=True, exist_ok=True)
+        batch_id = f"local_batch_{uuid4().hex}"
+        (self.batch_dir / f"{batch_id}.input.jsonl").write_bytes(_to_jsonl(requests))
+
+        output = []
+        for request in requests:
+            body = request["body"]
+            content = self._complete(body["messages"], body.get("temperature", 0.2))
+            output.append({
+                "custom_id": request["custom_id"],
+                "response": {"status_code": 200, "body": {"choices": [{"message": {"content": content}}]}},
+                "error": None,
+            })
+        (self.batch_dir / f"{batch_id}.output.jsonl").write_bytes(_to_jsonl(output))
+        return batch_id
+
+    def get_batch(self, batch_id):
+        output_file = self.batch_dir / f"{batch_id}.output.jsonl"
+        if not output_file.exists():
+            return BATCH_FAILED, {}
+        return BATCH_COMPLETED, _parse_batch_output(output_file.read_text())
+
+
+BACKENDS = {
+    OpenAIBackend.name: OpenAIBackend,
+    LocalBackend.name: LocalBackend,
+}
+
+_instances = {}
+_instances_lock = threading.Lock()
+
+
+def get_backend(name: Optional[str] = None, api_key: Optional[str] = None) -> AnalysisBackend:
+    """
+    Returns the shared backend instance for ``name`` (default ``LLM_BACKEND``),
+    creating it on first use. Callers passing their own API key get a separate
+    instance so keys never leak between requests.
+    """
+    name = name or settings.LLM_BACKEND
+    api_key = api_key or settings.OPENAI_API_KEY
+    key = (name, api_key)
+    backend = _instances.get(key)
+    if backend is not None:
+        return backend
+
+    with _instances_lock:
+        backend = _instances.get(key)
+        if backend is None:
+            try:
+                backend_class = BACKENDS[name]
+            except KeyError:
+                raise ValueError(f"Unknown LLM backend '{name}'. Choose from: {', '.join(BACKENDS)}")
+            backend = backend_class(
+                model=settings.LLM_MODEL,
+                timeout=settings.LLM_TIMEOUT,
+                max_concurrency=settings.LLM_MAX_CONCURRENCY,
+                max_retries=settings.LLM_MAX_RETRIES,
+                api_key=api_key,
+                base_url=settings.LLM_BASE_URL or None,
+                latency=settings.LLM_LOCAL_LATENCY,
+                batch_dir=settings.LLM_LOCAL_BATCH_DIR,
+            )
+            _instances[key] = backend
+        return backend
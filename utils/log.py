@@ -0,0 +1,158 @@
+"""
+Structured logging with request correlation IDs.
+
+``RequestIDMiddleware`` gives every request an ID (the caller's
+``X-Request-ID`` when it sends a sane one) held in a context variable, which
+``utils.fanout`` threads and ``sync_to_async`` calls inherit and the Celery
+signals in ``legal_gennie.celery`` carry into tasks. ``RequestIDFilter``
+stamps it on every log record and ``JSONFormatter`` writes records as one
+JSON object per line, including the fields passed with ``extra=``.
+
+``external_call`` wraps calls to upstream services: it logs their latency
+and whatever the block adds (status, response size) under one event name, so
+slow paths can be aggregated from the logs, and records them as profiling spans.
+
+``log_request`` writes the access log line of a request, with its body sizes
+and the process memory before and after it (see ``utils.memory``).
+"""
+import json
+import logging
+import re
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Optional
+
+from utils import memory
+from utils.profiling import span
+
+REQUEST_ID_HEADER = "X-Request-ID"
+
+_request_id = ContextVar("request_id", default=None)
+# Incoming IDs end up in every log line; accept only short, plain tokens.
+_VALID_REQUEST_ID = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+# Attributes every LogRecord has; anything else came in through ``extra``.
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "request_id"}
+
+logger = logging.getLogger("utils.external")
+request_logger = logging.getLogger("utils.requests")
+
+
+def get_request_id() -> Optional[str]:
+    return _request_id.get()
+
+
+def new_request_id(candidate: Optional[str] = None) -> str:
+    """
+    Returns ``candidate`` if it is usable as a request ID, else a fresh one.
+    """
+    if candidate and _VALID_REQUEST_ID.match(candidate):
+        return candidate
+    return uuid.uuid4().hex
+
+
+def set_request_id(request_id: Optional[str]) -> Token:
+    """
+    Makes ``request_id`` the current request ID; pass the returned token to
+    ``reset_request_id`` to restore the previous one.
+    """
+    return _request_id.set(request_id)
+
+
+def reset_request_id(token: Token) -> None:
+    _request_id.reset(token)
+
+
+@contextmanager
+def bind_request_id(request_id: Optional[str]):
+    """
+    Runs the block with ``request_id`` as the current request ID.
+    """
+    token = _request_id.set(request_id)
+    try:
+        yield request_id
+    finally:
+        _request_id.reset(token)
+
+
+class RequestIDFilter(logging.Filter):
+
+    def filter(self, record):
+        # django.request logs responses after the middleware has unbound the
+        # ID, but passes the request along.
+        record.request_id = _request_id.get() or getattr(getattr(record, "request", None), "request_id", None)
+        return True
+
+
+class JSONFormatter(logging.Formatter):
+    """
+    Formats records as single-line JSON objects with the standard fields,
+    the request ID and any ``extra`` fields.
+    """
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", None),
+        }
+        entry.update((key, value) for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES)
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+@contextmanager
+def external_call(name: str, **fields):
+    """
+    Logs the latency of the call made in the block as event ``name``, with
+    ``fields`` plus whatever the block sets on the yielded dict (e.g.
+    ``status``, ``bytes``). Failures are logged with the exception type.
+    """
+    started = time.perf_counter()
+    with span(name, **fields) as attributes:
+        try:
+            yield attributes
+        except BaseException as e:
+            attributes["error"] = type(e).__name__
+            raise
+        finally:
+            latency_ms = round((time.perf_counter() - started) * 1000, 2)
+            logger.info(
+                f"{name} took {latency_ms}ms",
+                extra={"event": "external_call", "call": name, "latency_ms": latency_ms, **attributes},
+            )
+
+
+def log_request(request, response, duration: float, rss_before: Optional[int]) -> None:
+    """
+    Logs a finished request: status, duration, request and response sizes,
+    and the RSS after it with its change over the request. Concurrent
+    requests share the process, so the change is theirs too; outliers over
+    many lines point at the costly requests.
+    """
+    duration_ms = round(duration * 1000, 2)
+    rss_after = memory.rss_bytes()
+    try:
+        request_bytes = int(request.META.get("CONTENT_LENGTH") or 0)
+    except ValueError:
+        request_bytes = None
+    request_logger.info(
+        f"{request.method} {request.path} {response.status_code} in {duration_ms}ms",
+        extra={
+            "event": "request",
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "duration_ms": duration_ms,
+            "request_bytes": request_bytes,
+            "response_bytes": None if response.streaming else len(response.content),
+            "rss_mb": memory.megabytes(rss_after),
+            "rss_delta_mb": memory.megabytes(rss_after - rss_before) if None not in (rss_after, rss_before) else None,
+            "peak_rss_mb": memory.megabytes(memory.peak_rss_bytes()),
+        },
+    )
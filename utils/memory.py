@@ -0,0 +1,42 @@
+"""
+Memory readings of this process, for per-request accounting.
+
+Both are process wide: requests running concurrently in the same process
+share them, so per-request figures derived from them are approximate.
+"""
+import os
+import sys
+from typing import Optional
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def rss_bytes() -> Optional[int]:
+    """
+    Current resident set size, or None where ``/proc`` isn't available.
+    """
+    try:
+        with open("/proc/self/statm", "rb") as statm:
+            return int(statm.read().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """
+    Highest resident set size of the process so far.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Reported in bytes on macOS, kilobytes elsewhere.
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def megabytes(size: Optional[int]) -> Optional[float]:
+    return None if size is None else round(size / 2 ** 20, 1)
@@ -0,0 +1,225 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+from . import compression, log, memory, profiling
+from .db_router import use_primary
+
+
+class RequestIDMiddleware:
+    """
+    Binds a request ID (see ``utils.log``) for the request's lifetime, keeps
+    it on ``request.request_id`` and returns it in the ``X-Request-ID``
+    response header.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        request.request_id = log.new_request_id(request.headers.get(log.REQUEST_ID_HEADER))
+        with log.bind_request_id(request.request_id) as request_id:
+            response = self.get_response(request)
+        response[log.REQUEST_ID_HEADER] = request_id
+        return response
+
+    async def __acall__(self, request):
+        request.request_id = log.new_request_id(request.headers.get(log.REQUEST_ID_HEADER))
+        with log.bind_request_id(request.request_id) as request_id:
+            response = await self.get_response(request)
+        response[log.REQUEST_ID_HEADER] = request_id
+        return response
+
+
+class RequestLogMiddleware:
+    """
+    Writes an access log line per request with its duration, sizes and
+    memory accounting, see ``utils.log.log_request``.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        started, rss = time.perf_counter(), memory.rss_bytes()
+        response = self.get_response(request)
+        log.log_request(request, response, time.perf_counter() - started, rss)
+        return response
+
+    async def __acall__(self, request):
+        started, rss = time.perf_counter(), memory.rss_bytes()
+        response = await self.get_response(request)
+        log.log_request(request, response, time.perf_counter() - started, rss)
+        return response
+
+
+class PrimaryPinningMiddleware:
+    """
+    Pins unsafe (writing) requests to the primary database for their whole
+    lifetime, so reads made while handling a write never hit a lagging replica.
+    """
+    SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+    # Runs natively in both modes, so ASGI requests don't pay a thread hop here.
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if request.method in self.SAFE_METHODS:
+            return self.get_response(request)
+        with use_primary():
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        if request.method in self.SAFE_METHODS:
+            return await self.get_response(request)
+        with use_primary():
+            return await self.get_response(request)
+
+
+class CompressionMiddleware:
+    """
+    Compresses responses with the best encoding the client accepts (brotli,
+    zstd or gzip, see ``utils.compression``). Bodies under
+    ``COMPRESSION_MIN_SIZE`` and content types outside
+    ``COMPRESSION_CONTENT_TYPES`` are left alone; streaming responses are
+    compressed chunk by chunk, sync and async iterators alike.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.process_response(request, await self.get_response(request))
+
+    def process_response(self, request, response):
+        if not response.streaming and len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            return response
+        if response.has_header("Content-Encoding"):
+            return response
+        content_type = response.get("Content-Type", "").split(";")[0].strip().lower()
+        if not content_type.startswith(settings.COMPRESSION_CONTENT_TYPES):
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        encoding = compression.negotiate(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        if encoding is None:
+            return response
+
+        compressor = compression.compressor(encoding)
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = self._acompress(compressor, response.streaming_content)
+            else:
+                response.streaming_content = self._compress(compressor, response.streaming_content)
+            # The compressed length isn't known up front.
+            del response.headers["Content-Length"]
+        else:
+            compressed = compressor.compress(response.content, flush=False) + compressor.finish()
+            # Not worth it if compressing didn't make the body smaller.
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers["Content-Length"] = str(len(compressed))
+
+        # The compressed body is a different representation: keep the validator
+        # usable for If-None-Match (weak comparison) but stop claiming byte equality.
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = encoding
+        return response
+
+    @staticmethod
+    def _compress(compressor, chunks):
+        for chunk in chunks:
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.finish()
+
+    @staticmethod
+    async def _acompress(compressor, chunks):
+        async for chunk in chunks:
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.finish()
+
+
+class ProfilingMiddleware:
+    """
+    Profiles requests picked by ``utils.profiling`` (on request or sampled)
+    and stores the result; everything else passes straight through.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        profiling.install_query_hook()
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        profile = profiling.begin(request)
+        if profile is None:
+            return self.get_response(request)
+        response = None
+        try:
+            response = self.get_response(request)
+        finally:
+            profiling.end(profile, response)
+        self._save(profile)
+        return response
+
+    async def __acall__(self, request):
+        profile = profiling.begin(request)
+        if profile is None:
+            return await self.get_response(request)
+        response = None
+        try:
+            response = await self.get_response(request)
+        finally:
+            profiling.end(profile, response)
+        await sync_to_async(self._save, thread_sensitive=False)(profile)
+        return response
+
+    @staticmethod
+    def _save(profile):
+        # A profile that can't be stored mustn't fail the request it describes.
+        try:
+            profiling.save(profile)
+        except Exception:
+            profiling.logger.exception(f"Failed to store profile {profile.id}")
@@ -0,0 +1,59 @@
+"""
+JSON request parsing with orjson when it is installed, see ``utils.renderers``.
+
+Bodies over ``DATA_UPLOAD_MAX_MEMORY_SIZE`` are refused before they are read
+(by their Content-Length) or as soon as they run past it, which Django only
+enforces for form data by itself.
+"""
+import io
+
+from django.conf import settings
+from rest_framework import status
+from rest_framework.exceptions import APIException, ParseError
+from rest_framework.parsers import JSONParser
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class RequestTooLarge(APIException):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = 'Request body too large.'
+    default_code = 'request_too_large'
+
+
+def _read(stream, parser_context) -> bytes:
+    limit = settings.DATA_UPLOAD_MAX_MEMORY_SIZE
+    if limit is None:
+        return stream.read()
+    request = parser_context.get('request')
+    if request is not None:
+        try:
+            content_length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            content_length = 0
+        if content_length > limit:
+            raise RequestTooLarge(f'Request body exceeds {limit} bytes.')
+    body = stream.read(limit + 1)
+    if len(body) > limit:
+        raise RequestTooLarge(f'Request body exceeds {limit} bytes.')
+    return body
+
+
+class ORJSONParser(JSONParser):
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        body = _read(stream, parser_context)
+        # orjson only reads UTF-8; anything else goes through the stdlib parser.
+        if orjson is None or encoding.lower().replace('-', '') != 'utf8':
+            return super().parse(io.BytesIO(body), media_type, parser_context)
+
+        try:
+            # Like JSONParser in strict mode, orjson rejects NaN and Infinity.
+            return orjson.loads(body)
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
@@ -0,0 +1,276 @@
+"""
+Opt-in profiling of single requests.
+
+A request under ``PROFILING_PATHS`` is profiled when it sends
+``X-Profile: <PROFILING_SECRET>`` or is picked at ``PROFILING_SAMPLE_RATE``,
+and at most ``PROFILING_MAX_PER_MINUTE`` times a minute per process either way.
+A profile records:
+
+- a CPU profile: pyinstrument when installed, which follows the request's
+  coroutine across awaits, otherwise cProfile. One request per process is
+  CPU profiled at a time; concurrent ones get the rest;
+- a wall-time ``span`` for every external call made on the request's behalf,
+  including from ``utils.fanout`` threads (they copy the context);
+- the number and total time of its database queries, in any thread.
+
+Profiles are written to ``PROFILING_DIR`` (the newest ``PROFILING_KEEP`` are
+kept) and the response names its profile in ``X-Profile-Id``.
+"""
+import cProfile
+import json
+import logging
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare
+
+try:
+    import pyinstrument
+except ImportError:
+    pyinstrument = None
+
+logger = logging.getLogger(__name__)
+
+PROFILE_ID_HEADER = "X-Profile-Id"
+
+
+class RequestProfile:
+    __slots__ = ("id", "request_id", "method", "path", "created_at", "started", "duration", "status_code",
+                 "spans", "queries", "query_time", "profiler", "cpu_format", "_lock", "_token")
+
+    def __init__(self, method: str, path: str, request_id: Optional[str] = None):
+        self.id = str(uuid.uuid4())
+        self.request_id = request_id
+        self.method = method
+        self.path = path
+        self.created_at = timezone.now()
+        self.started = time.perf_counter()
+        self.duration = None
+        self.status_code = None
+        self.spans = []
+        self.queries = 0
+        self.query_time = 0.0
+        self.profiler = None
+        self.cpu_format = None
+        self._lock = threading.Lock()
+        self._token = None
+
+    def add_query(self, seconds: float) -> None:
+        with self._lock:
+            self.queries += 1
+            self.query_time += seconds
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "request_id": self.request_id,
+            "method": self.method,
+            "path": self.path,
+            "created_at": self.created_at.isoformat(),
+            "status_code": self.status_code,
+            "duration_ms": round(self.duration * 1000, 2),
+            "queries": self.queries,
+            "query_time_ms": round(self.query_time * 1000, 2),
+            "spans": sorted(self.spans, key=lambda span: span["start_ms"]),
+            "cpu_profile": self.cpu_format,
+        }
+
+
+_current = ContextVar("request_profile", default=None)
+
+
+def current_profile() -> Optional[RequestProfile]:
+    return _current.get()
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """
+    Records the wall time of the block on the current request's profile, if
+    it has one. Yields ``attributes``, which the block may add to.
+    """
+    profile = _current.get()
+    if profile is None:
+        yield attributes
+        return
+    started = time.perf_counter()
+    try:
+        yield attributes
+    finally:
+        ended = time.perf_counter()
+        # list.append is atomic, so fan-out threads can record concurrently.
+        profile.spans.append({
+            "name": name,
+            "start_ms": round((started - profile.started) * 1000, 2),
+            "duration_ms": round((ended - started) * 1000, 2),
+            **attributes,
+        })
+
+
+def _record_query(execute, sql, params, many, context):
+    profile = _current.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.add_query(time.perf_counter() - started)
+
+
+def _install_query_hook(sender=None, connection=None, **kwargs):
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+def install_query_hook() -> None:
+    """
+    Counts the queries of profiled requests on every database connection,
+    open or opened later.
+    """
+    connection_created.connect(_install_query_hook, dispatch_uid="utils.profiling")
+    for connection in connections.all(initialized_only=True):
+        _install_query_hook(connection=connection)
+
+
+_starts = deque()
+_starts_lock = threading.Lock()
+_cpu_lock = threading.Lock()
+
+
+def _allow() -> bool:
+    now = time.monotonic()
+    with _starts_lock:
+        while _starts and now - _starts[0] > 60:
+            _starts.popleft()
+        if len(_starts) >= settings.PROFILING_MAX_PER_MINUTE:
+            return False
+        _starts.append(now)
+        return True
+
+
+def should_profile(request) -> bool:
+    if not request.path.startswith(tuple(settings.PROFILING_PATHS)):
+        return False
+    secret = settings.PROFILING_SECRET
+    requested = bool(secret) and constant_time_compare(request.headers.get("X-Profile", ""), secret)
+    if not requested and random.random() >= settings.PROFILING_SAMPLE_RATE:
+        return False
+    return _allow()
+
+
+def begin(request) -> Optional[RequestProfile]:
+    """
+    Starts profiling ``request`` if it is requested or sampled, within the limits.
+    """
+    from utils.log import get_request_id  # utils.log records its calls as spans
+
+    if not should_profile(request):
+        return None
+    profile = RequestProfile(request.method, request.path, get_request_id())
+    profile._token = _current.set(profile)
+    if _cpu_lock.acquire(blocking=False):
+        if pyinstrument is not None:
+            profile.profiler = pyinstrument.Profiler(async_mode="enabled")
+            profile.cpu_format = "html"
+            profile.profiler.start()
+        else:
+            profile.profiler = cProfile.Profile()
+            profile.cpu_format = "prof"
+            profile.profiler.enable()
+    return profile
+
+
+def end(profile: RequestProfile, response) -> None:
+    """
+    Stops profiling and names the profile on ``response``; ``save`` writes it out.
+    """
+    if profile.profiler is not None:
+        try:
+            if profile.cpu_format == "html":
+                profile.profiler.stop()
+            else:
+                profile.profiler.disable()
+        finally:
+            _cpu_lock.release()
+    profile.duration = time.perf_counter() - profile.started
+    profile.status_code = getattr(response, "status_code", None)
+    _current.reset(profile._token)
+    if response is not None:
+        response[PROFILE_ID_HEADER] = profile.id
+
+
+def _directory() -> Path:
+    return Path(settings.PROFILING_DIR)
+
+
+def _summaries_newest_first(directory: Path) -> List[Path]:
+    def modified(path):
+        try:
+            return path.stat().st_mtime_ns
+        except OSError:
+            # Pruned by another worker meanwhile.
+            return 0
+
+    return sorted(directory.glob("*.json"), key=modified, reverse=True)
+
+
+def save(profile: RequestProfile) -> None:
+    """
+    Writes the profile's summary and CPU profile, then drops the oldest
+    profiles beyond ``PROFILING_KEEP``.
+    """
+    directory = _directory()
+    directory.mkdir(parents=True, exist_ok=True)
+    if profile.cpu_format == "html":
+        (directory / f"{profile.id}.html").write_text(profile.profiler.output_html())
+    elif profile.cpu_format == "prof":
+        profile.profiler.dump_stats(directory / f"{profile.id}.prof")
+    (directory / f"{profile.id}.json").write_text(json.dumps(profile.summary()))
+
+    for stale in _summaries_newest_first(directory)[settings.PROFILING_KEEP:]:
+        for path in directory.glob(f"{stale.stem}.*"):
+            path.unlink(missing_ok=True)
+
+
+def list_profiles() -> List[Dict[str, Any]]:
+    """
+    Summaries of the stored profiles, newest first.
+    """
+    summaries = []
+    for path in _summaries_newest_first(_directory()):
+        try:
+            summaries.append(json.loads(path.read_text()))
+        except (OSError, ValueError):
+            # Pruned or still being written by another worker.
+            continue
+    return summaries
+
+
+def get_profile(profile_id: str) -> Optional[Dict[str, Any]]:
+    try:
+        return json.loads((_directory() / f"{profile_id}.json").read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def cpu_profile_path(profile_id: str) -> Optional[Path]:
+    """
+    Path of a profile's CPU profile: ``.html`` (pyinstrument) or ``.prof`` (cProfile, for pstats/snakeviz).
+    """
+    for suffix in ("html", "prof"):
+        path = _directory() / f"{profile_id}.{suffix}"
+        if path.exists():
+            return path
+    return None
@@ -0,0 +1,167 @@
+"""
+Prompt construction for petition analysis.
+
+Providers cache prompts by exact prefix, so the static instructions always go
+first, in the system message, byte-for-byte identical on every call. Variable
+content follows, most shareable first: the judgment summaries (identical for
+every petition that maps to the same search query), then the petition.
+Prompts over the token budget are trimmed deterministically, so the same
+inputs always produce the same prompt; petitions far over it are first
+clipped to their start and end.
+"""
+import json
+import math
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+
+from utils.text import clip
+
+ANALYSIS_INSTRUCTIONS = """You are a legal expert assistant analyzing a petition and similar judgments.
+
+Task: Analyze the petition against the similar judgments to:
+1. Calculate a winning percentage (0-100%) based on precedent and legal merit
+2. Identify specific steps to improve the petition's chances of success
+3. Provide a brief rationale for your assessment
+4. Provide technical details about specific sections/articles of Indian law that should be cited in the petition
+
+Output the results in the following JSON format:
+{
+  "winning_percentage": [numeric value between 0-100],
+  "improvement_steps": [
+    "Step 1: [specific actionable instruction]",
+    "Step 2: [specific actionable instruction]",
+    ...
+  ],
+  "rationale": "[concise explanation of the winning percentage]",
+  "legal_references": [
+    {
+      "section": "[specific section number]",
+      "act": "[name of the act/law]",
+      "year": "[year of the act]",
+      "description": "[brief description of the section's relevance]"
+    },
+    ...
+  ]
+}
+
+Your assessment must be based on legal precedent, the strength of arguments, and factual similarities. For the legal references, be specific about the exact sections, articles, and provisions from relevant Indian laws (such as the Indian Penal Code, Code of Civil Procedure, Constitution of India, specific state laws, etc.) that are applicable to this petition and would strengthen the legal arguments when cited."""
+
+# Chat formatting overhead per message, in tokens.
+MESSAGE_OVERHEAD_TOKENS = 4
+
+# Snippet lengths (characters kept from each end) tried, in order, when trimming.
+SNIPPET_STEPS = (500, 250, 100, 0)
+
+# Natural text averages about 4 characters per token. Petitions longer than
+# this many characters per budget token are clipped before fitting, so a
+# megabyte petition isn't rendered and tokenized whole several times.
+MAX_CHARS_PER_TOKEN = 8
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    return tiktoken.get_encoding("o200k_base")
+
+
+def count_tokens(text: str) -> int:
+    """
+    Counts tokens with tiktoken when installed, otherwise estimates ~4 characters per token.
+    """
+    encoding = _encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return math.ceil(len(text) / 4)
+
+
+def _snippet(full_text: str, chars: int) -> Optional[str]:
+    if not full_text or not chars:
+        return None
+    if len(full_text) > 2 * chars:
+        return full_text[:chars] + "..." + full_text[-chars:]
+    return full_text
+
+
+class AnalysisPrompt:
+    """
+    Builds the analysis chat messages within a token budget.
+    """
+
+    def __init__(self, instructions: str = ANALYSIS_INSTRUCTIONS):
+        self.instructions = instructions
+        # Computed once; the instructions never change between calls.
+        self.instruction_tokens = count_tokens(instructions) + MESSAGE_OVERHEAD_TOKENS
+
+    def build(self, petition: str, judgments: List[Dict[str, Any]],
+              token_budget: Optional[int] = None) -> List[Dict[str, str]]:
+        """
+        Args:
+            petition (str): The petition text
+            judgments (List[Dict[str, Any]]): Judgments with ``title`` and optional
+                ``outcome``/``full_text``, most relevant first
+            token_budget (Optional[int]): Prompt token limit, defaults to ``LLM_PROMPT_TOKEN_BUDGET``
+
+        Returns:
+            List[Dict[str, str]]: System and user messages
+        """
+        budget = (token_budget or settings.LLM_PROMPT_TOKEN_BUDGET) - self.instruction_tokens - MESSAGE_OVERHEAD_TOKENS
+        petition = clip(petition, max(budget, 0) * MAX_CHARS_PER_TOKEN)
+        return [
+            {"role": "system", "content": self.instructions},
+            {"role": "user", "content": self._fit(petition, judgments, budget)},
+        ]
+
+    def _render(self, petition: str, summaries: List[Dict[str, Any]]) -> str:
+        return (
+            f"**SIMILAR JUDGMENTS:**\n{json.dumps(summaries, indent=2)}\n\n"
+            f"**PETITION:**\n{petition}"
+        )
+
+    def _summaries(self, judgments: List[Dict[str, Any]], snippet_chars: int) -> List[Dict[str, Any]]:
+        summaries = []
+        for idx, judgment in enumerate(judgments):
+            summary = {
+                "id": idx + 1,
+                "title": judgment.get("title", ""),
+                "outcome": judgment.get("outcome", "Unknown"),
+                "key_points": []
+            }
+            snippet = _snippet(judgment.get("full_text", ""), snippet_chars)
+            if snippet:
+                summary["snippet"] = snippet
+            summaries.append(summary)
+        return summaries
+
+    def _fit(self, petition: str, judgments: List[Dict[str, Any]], budget: int) -> str:
+        """
+        Trims, in order: judgment snippets, then trailing (least relevant)
+        judgments, then the middle of the petition, until the content fits.
+        """
+        for chars in SNIPPET_STEPS:
+            content = self._render(petition, self._summaries(judgments, chars))
+            if count_tokens(content) <= budget:
+                return content
+
+        summaries = self._summaries(judgments, 0)
+        while summaries:
+            summaries.pop()
+            content = self._render(petition, summaries)
+            if count_tokens(content) <= budget:
+                return content
+
+        # Keep the start (parties, facts) and end (prayer) of the petition.
+        overflow = count_tokens(self._render(petition, [])) - budget
+        keep = max(len(petition) - overflow * 4, 0) // 2
+        while True:
+            content = self._render(petition[:keep] + "\n[...]\n" + petition[len(petition) - keep:], [])
+            if keep == 0 or count_tokens(content) <= budget:
+                return content
+            keep = keep * 3 // 4
+
+
+analysis_prompt = AnalysisPrompt()
@@ -0,0 +1,94 @@
+"""
+Local relevance re-ranking of Indian Kanoon search results.
+
+Search results already carry a ``title`` and a ``headline`` (the matching
+passage), which is enough to score them against the petition with BM25
+before spending detail fetches on them.
+"""
+import math
+import re
+from collections import Counter
+from typing import Any, Dict, List, Mapping, Optional
+
+from utils.text import chunks
+
+TAG_RE = re.compile(r"<[^>]+>")
+WORD_RE = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = {
+    'the', 'and', 'is', 'in', 'it', 'to', 'that', 'was', 'for', 'on', 'are', 'with',
+    'they', 'be', 'at', 'this', 'have', 'from', 'by', 'had', 'not', 'but', 'what',
+    'all', 'were', 'when', 'we', 'there', 'can', 'an', 'or', 'has', 'been', 'a', 'as',
+    'of', 'his', 'her', 'their', 'our', 'its', 'such', 'any', 'vs', 'v', 'ors', 'anr',
+}
+
+# Standard BM25 parameters.
+K1 = 1.2
+B = 0.75
+
+
+def tokenize(text: str) -> List[str]:
+    text = TAG_RE.sub(" ", text or "").lower()
+    return [word for word in WORD_RE.findall(text) if len(word) > 2 and word not in STOPWORDS]
+
+
+def bm25_scores(query: str, documents: List[str]) -> List[float]:
+    """
+    Scores each document against the query with BM25, using the documents
+    themselves as the corpus for document frequencies.
+    """
+    # The query may be a whole petition; collect its terms a chunk at a time.
+    query_terms = set()
+    for chunk in chunks(query):
+        query_terms.update(tokenize(chunk))
+    doc_terms = [Counter(tokenize(doc)) for doc in documents]
+    if not doc_terms:
+        return []
+
+    doc_lengths = [sum(terms.values()) for terms in doc_terms]
+    avg_length = (sum(doc_lengths) / len(doc_lengths)) or 1
+    doc_freq = Counter(term for terms in doc_terms for term in terms.keys() & query_terms)
+
+    n = len(documents)
+    scores = []
+    for terms, length in zip(doc_terms, doc_lengths):
+        score = 0.0
+        for term in query_terms & terms.keys():
+            idf = math.log(1 + (n - doc_freq[term] + 0.5) / (doc_freq[term] + 0.5))
+            tf = terms[term]
+            score += idf * tf * (K1 + 1) / (tf + K1 * (1 - B + B * length / avg_length))
+        scores.append(score)
+    return scores
+
+
+def rerank_judgments(petition: str, judgments: List[Dict[str, Any]],
+                     authority: Optional[Mapping[int, float]] = None,
+                     authority_weight: float = 0.0) -> List[Dict[str, Any]]:
+    """
+    Orders search results by BM25 relevance of their title and headline to the
+    petition. Ties keep the search engine's order.
+
+    With ``authority`` (0..1 per ``tid``, see ``legal_gennie.citations``), the
+    order is by ``(1 - authority_weight) * relevance + authority_weight *
+    authority``, relevance being BM25 relative to the best result.
+
+    Args:
+        petition (str): The petition text
+        judgments (List[Dict[str, Any]]): Search results with ``title``/``headline``,
+            as dicts or ``utils.judgments.Judgment`` records
+        authority (Optional[Mapping[int, float]]): Authority of cited judgments by ``tid``
+        authority_weight (float): Share of authority in the order, 0 to ignore it
+
+    Returns:
+        List[Dict[str, Any]]: The same judgment objects, most relevant first
+    """
+    documents = [f"{j.get('title', '')} {j.get('headline', '')}" for j in judgments]
+    scores = bm25_scores(petition, documents)
+    if authority and authority_weight:
+        best = max(scores, default=0.0) or 1.0
+        scores = [
+            (1 - authority_weight) * score / best + authority_weight * authority.get(j.get("tid"), 0.0)
+            for score, j in zip(scores, judgments)
+        ]
+    order = sorted(range(len(judgments)), key=lambda i: -scores[i])
+    return [judgments[i] for i in order]
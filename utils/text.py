@@ -0,0 +1,43 @@
+"""
+Chunked processing of very long texts.
+
+Petitions can run to megabytes. Lowercasing, cleaning or splitting one in a
+single go makes several full-size copies plus an object per word; going
+through ``chunks`` keeps those to one chunk at a time.
+"""
+from typing import Iterator, Optional
+
+# Characters per chunk: large enough that per-chunk overhead is negligible,
+# small enough that the copies made of a chunk don't register.
+CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = (" ", "\n", "\t", "\r")
+
+
+def chunks(text: str, size: Optional[int] = None) -> Iterator[str]:
+    """
+    Yields consecutive slices of ``text`` of at most ``size`` (default
+    ``CHUNK_SIZE``) characters. Slices end after whitespace where there is
+    any, so words are never split between them; joined, they are ``text``.
+    """
+    size = size or CHUNK_SIZE
+    start = 0
+    while start < len(text):
+        end = start + size
+        if end < len(text):
+            cut = max(text.rfind(char, start, end) for char in _WHITESPACE)
+            if cut > start:
+                end = cut + 1
+        yield text[start:end]
+        start = end
+
+
+def clip(text: str, max_chars: int, marker: str = "\n[...]\n") -> str:
+    """
+    Returns ``text`` cut down to its first and last ``max_chars // 2``
+    characters, joined by ``marker``, if it is longer than ``max_chars``.
+    """
+    if len(text) <= max_chars:
+        return text
+    keep = max_chars // 2
+    return text[:keep] + marker + text[len(text) - keep:]